@@ -0,0 +1,122 @@
+# live_plot.py
+"""Standalone high-rate live plot of the USB-2416 analog inputs.
+
+Replaces the grapy*.py FuncAnimation scripts. The channels come from the
+dashboard's continuous background scan (my_daq_dashboard/utils), and are
+drawn with pyqtgraph by dashboard/pg_plot.py: preallocated arrays,
+clip-to-view and peak downsampling. That holds 60 fps with 8 channels of
+10k points each.
+
+    python Analogin/live_plot.py --channels 0-7 --rate 1000 --window 10
+    python Analogin/live_plot.py --channels 0,2,5 --mode SE --simulate
+
+Needs pyqtgraph and a Qt binding, both of which come with PyMoDAQ.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+DASHBOARD_DIR = Path(__file__).resolve().parents[1] / "my_daq_dashboard"
+sys.path.insert(0, str(DASHBOARD_DIR))
+
+if os.environ.get("DAQ_SIMULATE") or "--simulate" in sys.argv:
+    from utils import simulated_ul
+    simulated_ul.install()
+
+from utils.acquisition import get_engine  # noqa: E402
+from utils.channel_config import DATA_RATES, MODES, RANGES, ChannelConfig, ChannelTable  # noqa: E402
+
+
+def parse_channels(text):
+    """'0-3,6' -> [0, 1, 2, 3, 6]"""
+    channels = set()
+    for part in text.replace(';', ',').split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            channels.update(range(int(first), int(last) + 1))
+        elif part.strip():
+            channels.add(int(part))
+    return sorted(channels)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Live plot of USB-2416 analog inputs.")
+    parser.add_argument("--channels", type=parse_channels, default=[0], help="e.g. 0-7 or 0,2,5 (default: 0)")
+    parser.add_argument("--rate", type=float, default=1000, help="scan rate per channel in S/s")
+    parser.add_argument("--window", type=float, default=10, help="seconds shown")
+    parser.add_argument("--mode", choices=MODES, default="DIFF", help="input mode of every channel")
+    parser.add_argument("--range", choices=RANGES, default="BIP10VOLTS", help="input range of every channel")
+    parser.add_argument("--data-rate", type=int, choices=DATA_RATES, default=3750, help="ADC data rate in S/s")
+    parser.add_argument("--fps", type=float, default=60, help="frame rate to draw at")
+    parser.add_argument("--duration", type=float, help="close after this many seconds and print the frame rate")
+    parser.add_argument("--board", type=int, default=0, help="board number")
+    parser.add_argument("--simulate", action="store_true", help="plot the simulated USB-2416")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    table = ChannelTable([ChannelConfig(chan, args.mode, args.range, args.data_rate) for chan in args.channels])
+    plan = table.plan(args.rate)
+    print(plan.summary())
+    for error in plan.errors:
+        print(f"Error: {error}")
+    if plan.errors:
+        return 1
+
+    import pyqtgraph as pg
+    from pyqtgraph.Qt import QtCore
+    from dashboard.pg_plot import PgLivePlot
+
+    app = pg.mkQApp("USB-2416 Live Plot")
+    # Poll the board twice per frame, so every frame has new samples to draw
+    engine = get_engine(args.board, poll_interval=0.5 / args.fps)
+    try:
+        device = engine.open()
+    except Exception as e:
+        print(f"Initialization Error: {e}")
+        return 1
+    engine.configure(table, args.rate)
+    subscription = engine.subscribe(args.channels, maxsize=256)
+    plot = PgLivePlot(len(args.channels), args.rate, args.window, labels=[f"AI{chan}" for chan in args.channels])
+    plot.widget.resize(1000, 600)
+    plot.widget.show()
+
+    title = f"{device.product_name}: {len(args.channels)} ch at {args.rate:g} S/s"
+    start = last_time = time.monotonic()
+    last_frames = 0
+
+    def next_frame():
+        nonlocal last_time, last_frames
+        for block in subscription.get_all():
+            plot.append(block.data)
+        plot.update()
+        now = time.monotonic()
+        if now - last_time >= 1:
+            fps = (plot.frames - last_frames) / (now - last_time)
+            plot.widget.setWindowTitle(f"{title}, {fps:.0f} fps, dropped {subscription.dropped}, "
+                                       f"overruns {engine.overruns}")
+            last_time, last_frames = now, plot.frames
+        if args.duration and now - start >= args.duration:
+            app.quit()
+
+    timer = QtCore.QTimer()
+    timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+    timer.timeout.connect(next_frame)
+    timer.start(int(1000 / args.fps))
+    try:
+        app.exec()
+    finally:
+        timer.stop()
+        subscription.close()
+        engine.close()
+    elapsed = time.monotonic() - start
+    print(f"{plot.frames} frames in {elapsed:.1f} s ({plot.frames / elapsed:.1f} fps), "
+          f"dropped blocks {subscription.dropped}, overruns {engine.overruns}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,421 @@
+# run_benchmarks.py
+"""Benchmarks for the acquisition pipeline, from the UL buffer to the screen.
+
+Runs against the simulated USB-2416 (no board or display needed) and times
+each stage the way the dashboard drives it, for every channel count and
+per-channel rate of the grid:
+
+    ring_read      RingBufferReader.read of one engine poll (50 ms) of scans
+    deinterleave   AcquisitionEngine._publish: transpose, per-subscriber rows, DataBlocks
+    record_<ext>   one chunk through each recording backend (.csv, .bin, .i32, .h5 if pymodaq is there)
+    plot_prep      the per-sample part of a display frame: TrendHistory/WindowedStats appends,
+                   the 10 s window and its min/max envelope
+    plot_frame     one whole AnalogInDisplay frame, ending in a BlitPlot update on an Agg
+                   canvas (the Tk blit comes on top)
+    pg_frame       one frame of the pyqtgraph live plot (dashboard/pg_plot.py) at 60 fps, painted
+                   on an offscreen Qt window; skipped without pyqtgraph
+    latency        sample to screen: age of the newest sample when the frame that shows it is drawn,
+                   with the engine scanning the simulator in real time
+
+    python benchmarks/run_benchmarks.py -o results.json
+    python benchmarks/run_benchmarks.py --quick --baseline results.json
+    python benchmarks/run_benchmarks.py --hardware
+
+Per-call costs are checked against thresholds.json as max_call_us, plus
+max_channel_us per channel and max_sample_ns per sample handled in the
+call, so one limit holds across the grid and a stage that goes back to a
+Python loop per sample fails at the larger configurations. plot_frame's
+limit is the display's 5 ms frame budget at 16 channels. Latency is
+checked as max_p95_ms plus one scan period, the age the newest sample can
+already have when it is read. --baseline also fails anything more than
+--tolerance times slower than a previous results file. The exit status is
+1 when any check fails.
+
+Configurations beyond the 2416's aggregate rate (e.g. 32 channels at
+1 kHz) only run on the simulator; they bound the cost of the software.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Imports are rooted at the dashboard directory, like main.py
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DASHBOARD_DIR)
+
+if "--hardware" not in sys.argv:
+    from utils import simulated_ul
+    simulated_ul.install()
+
+from matplotlib.figure import Figure  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+
+from dashboard.blit_plot import BlitPlot  # noqa: E402
+from utils.acquisition import AcquisitionEngine, Subscription  # noqa: E402
+from utils.channel_config import ChannelConfig, ChannelTable  # noqa: E402
+from utils.clock_sync import SampleClock  # noqa: E402
+from utils.decimation import minmax_envelope  # noqa: E402
+from utils.recorders import make_backend  # noqa: E402
+from utils.ring_buffer import RingBufferReader  # noqa: E402
+from utils.statistics import WindowedStats  # noqa: E402
+from utils.trend_history import TrendHistory  # noqa: E402
+
+CHANNELS = [1, 4, 16, 32]
+RATES = [10, 100, 1000]
+QUICK_CHANNELS = [1, 32]
+QUICK_RATES = [10, 1000]
+BENCHMARKS = ["ring_read", "deinterleave", "record", "plot_prep", "plot_frame", "pg_frame", "latency"]
+FORMATS = [".csv", ".bin", ".i32", ".h5"]
+
+# The dashboard's own cadence: engine poll, AnalogInDisplay frame and window
+POLL_INTERVAL = 0.05
+FRAME_INTERVAL = 0.05
+WINDOW_SECONDS = 10
+BUFFER_SECONDS = 2
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+# Differences below these are timer noise, not regressions
+BASELINE_SLACK = {"call_us": 10.0, "p95_ms": 20.0}
+
+
+def measure(func, min_time):
+    """Median seconds per call of func() over at least `min_time` seconds (after one warm-up call)."""
+    func()
+    times = []
+    end = time.perf_counter() + min_time
+    while time.perf_counter() < end or len(times) < 5:
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def signal_block(num_chans, scans, start=0, rate=1000.0):
+    """(num_chans, scans) of a 5 Hz sine plus noise, a stand-in for a real input."""
+    t = (start + np.arange(scans)) / rate
+    rng = np.random.default_rng(start)
+    return np.sin(2 * np.pi * 5 * t) + 0.01 * rng.standard_normal((num_chans, scans))
+
+
+def chunk_scans(rate, interval):
+    return max(int(round(rate * interval)), 1)
+
+
+def timed(name, num_chans, rate, seconds, samples, **extra):
+    result = {"benchmark": name, "channels": num_chans, "rate": rate, "samples": samples,
+              "call_us": seconds * 1e6, "sample_ns": seconds * 1e9 / samples}
+    result.update(extra)
+    return result
+
+
+def bench_ring_read(num_chans, rate, min_time):
+    scans = chunk_scans(rate, POLL_INTERVAL)
+    size = max(int(rate * BUFFER_SECONDS), 10) * num_chans
+    reader = RingBufferReader(np.random.default_rng(0).standard_normal(size), num_chans)
+    count = [0]
+
+    def call():
+        # The board always has exactly one poll's worth of new scans
+        count[0] += scans * num_chans
+        reader.read(count[0])
+
+    return [timed("ring_read", num_chans, rate, measure(call, min_time), scans * num_chans)]
+
+
+def bench_deinterleave(num_chans, rate, min_time):
+    scans = chunk_scans(rate, POLL_INTERVAL)
+    # A plot of every channel and a single-channel readout, as on a typical tab
+    engine = AcquisitionEngine(0, rate=rate)
+    engine.low_chan, engine.high_chan = 0, num_chans - 1
+    engine.clock = SampleClock(rate, time.monotonic())
+    engine.subscriptions = [Subscription(engine, range(num_chans)), Subscription(engine, [0])]
+    interleaved = np.ascontiguousarray(signal_block(num_chans, scans, rate=rate).T)
+
+    def call():
+        engine._publish(interleaved, 0)
+        for sub in engine.subscriptions:
+            sub.get_all()
+
+    return [timed("deinterleave", num_chans, rate, measure(call, min_time), scans * num_chans)]
+
+
+def bench_record(num_chans, rate, min_time, directory):
+    scans = chunk_scans(rate, POLL_INTERVAL)
+    data = signal_block(num_chans, scans, rate=rate)
+    results = []
+    for extension in FORMATS:
+        name = f"record_{extension[1:]}"
+        backend = make_backend(os.path.join(directory, f"bench_{num_chans}_{rate}{extension}"),
+                               list(range(num_chans)), rate)
+        try:
+            backend.open()
+        except ImportError as e:
+            results.append({"benchmark": name, "channels": num_chans, "rate": rate, "skipped": str(e)})
+            continue
+        written = [0]
+
+        def call():
+            # What RecordingWriter does with each block
+            written[0] = backend.write(np.ascontiguousarray(data.T))
+
+        try:
+            seconds = measure(call, min_time)
+        finally:
+            backend.close()
+        results.append(timed(name, num_chans, rate, seconds, scans * num_chans,
+                             mb_per_s=written[0] / seconds / 1e6))
+    return results
+
+
+def make_plot(num_chans, rate):
+    """The AnalogInDisplay plot stack on an off-screen 600x400 canvas."""
+    fig = Figure(figsize=(6, 4))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_ylim(-10, 10)
+    plot = BlitPlot(canvas, ax, num_chans, WINDOW_SECONDS)
+    history = TrendHistory(num_chans, rate)
+    stats = WindowedStats(num_chans, rate)
+    return plot, history, stats
+
+
+def bench_plot_prep(num_chans, rate, min_time):
+    plot, history, stats = make_plot(num_chans, rate)
+    window = int(rate * WINDOW_SECONDS)
+    history.append(signal_block(num_chans, window, rate=rate))
+    block = signal_block(num_chans, chunk_scans(rate, FRAME_INTERVAL), window, rate)
+    envelope = np.empty((num_chans, 2 * plot.width))
+
+    def call():
+        history.append(block)
+        stats.append(block)
+        minmax_envelope(history.window(WINDOW_SECONDS), envelope.shape[1] // 2, out=envelope)
+
+    return [timed("plot_prep", num_chans, rate, measure(call, min_time), window * num_chans)]
+
+
+def bench_plot_frame(num_chans, rate, min_time):
+    plot, history, stats = make_plot(num_chans, rate)
+    window = int(rate * WINDOW_SECONDS)
+    history.append(signal_block(num_chans, window, rate=rate))
+    block = signal_block(num_chans, chunk_scans(rate, FRAME_INTERVAL), window, rate)
+
+    def call():
+        history.append(block)
+        stats.append(block)
+        plot.update(history.window(WINDOW_SECONDS))
+
+    return [timed("plot_frame", num_chans, rate, measure(call, min_time), window * num_chans)]
+
+
+def bench_pg_frame(num_chans, rate, min_time):
+    # Painting needs no display; a real window would use the platform plugin
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        import pyqtgraph as pg
+        from dashboard.pg_plot import PgLivePlot
+    except ImportError as e:
+        return [{"benchmark": "pg_frame", "channels": num_chans, "rate": rate, "skipped": str(e)}]
+
+    app = pg.mkQApp()
+    plot = PgLivePlot(num_chans, rate, WINDOW_SECONDS)
+    plot.widget.resize(1000, 600)
+    plot.widget.show()
+    window = int(rate * WINDOW_SECONDS)
+    plot.append(signal_block(num_chans, window, rate=rate))
+    block = signal_block(num_chans, chunk_scans(rate, 1 / 60), window, rate)
+
+    def call():
+        plot.append(block)
+        plot.update()
+        # Runs the paint the update scheduled, as the event loop would
+        app.processEvents()
+
+    try:
+        seconds = measure(call, min_time)
+    finally:
+        plot.widget.close()
+    return [timed("pg_frame", num_chans, rate, seconds, window * num_chans, fps=1 / seconds)]
+
+
+def bench_latency(num_chans, rate, seconds, warmup=0.5):
+    channels = list(range(num_chans))
+    table = ChannelTable([ChannelConfig(chan, mode="SE", data_rate=3750) for chan in channels])
+    engine = AcquisitionEngine(0, rate=rate, poll_interval=POLL_INTERVAL)
+    plot, history, stats = make_plot(num_chans, rate)
+    latencies = []
+    subscription = None
+    try:
+        engine.open()
+        engine.configure(table, rate)
+        subscription = engine.subscribe(channels)
+        start = time.monotonic()
+        while time.monotonic() - start < warmup + seconds:
+            # The display's after() loop: sleep a frame, drain, draw
+            time.sleep(FRAME_INTERVAL)
+            blocks = subscription.get_all()
+            for block in blocks:
+                history.append(block.data)
+                stats.append(block.data)
+            if not blocks:
+                continue
+            plot.update(history.window(WINDOW_SECONDS))
+            now = time.monotonic()
+            last = blocks[-1]
+            newest = last.t0 - engine.clock.epoch_offset + (last.data.shape[1] - 1) * last.dt
+            if now - start >= warmup:
+                latencies.append(now - newest)
+        dropped = subscription.dropped
+    finally:
+        if subscription:
+            subscription.close()
+        overruns = engine.overruns
+        engine.close()
+    latencies = np.array(latencies) * 1e3
+    result = {"benchmark": "latency", "channels": num_chans, "rate": rate, "frames": len(latencies),
+              "dropped": dropped, "overruns": overruns}
+    if len(latencies):
+        result.update(median_ms=float(np.median(latencies)), p95_ms=float(np.percentile(latencies, 95)),
+                      max_ms=float(latencies.max()))
+    return [result]
+
+
+def check(result, limits):
+    """Failure message for a result over its threshold, else None; stores the limit in the result."""
+    limit = limits.get(result["benchmark"])
+    if limit is None or "skipped" in result:
+        return None
+    if result["benchmark"] == "latency":
+        if "p95_ms" not in result:
+            return "no frames drawn"
+        result["limit_ms"] = limit["max_p95_ms"] + 1000 / result["rate"]
+        if result["p95_ms"] > result["limit_ms"]:
+            return f"p95 {result['p95_ms']:.1f} ms > {result['limit_ms']:.1f} ms"
+        return None
+    allowed = (limit["max_call_us"] + limit.get("max_channel_us", 0) * result["channels"]
+               + limit["max_sample_ns"] * result["samples"] / 1000)
+    result["limit_us"] = allowed
+    if result["call_us"] > allowed:
+        return f"{result['call_us']:.1f} us/call > {allowed:.1f} us ({result['sample_ns']:.1f} ns/sample)"
+    return None
+
+
+def compare(result, baseline, tolerance):
+    """Failure message when `result` is over `tolerance` times its baseline entry, else None."""
+    metric = "p95_ms" if result["benchmark"] == "latency" else "call_us"
+    key = (result["benchmark"], result["channels"], result["rate"])
+    for entry in baseline:
+        if (entry["benchmark"], entry["channels"], entry["rate"]) == key and metric in entry \
+                and metric in result:
+            if result[metric] > tolerance * entry[metric] + BASELINE_SLACK[metric]:
+                return f"{metric} {result[metric]:.1f} vs baseline {entry[metric]:.1f}"
+            return None
+    return None
+
+
+def describe(result):
+    label = f"{result['benchmark']:<14}{result['channels']:>3} ch {result['rate']:>5g} Hz  "
+    if "skipped" in result:
+        return label + f"skipped: {result['skipped']}"
+    if result["benchmark"] == "latency":
+        if "p95_ms" not in result:
+            return label + "no frames"
+        return label + (f"median {result['median_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  "
+                        f"max {result['max_ms']:7.1f} ms  dropped {result['dropped']}")
+    text = label + f"{result['call_us']:10.1f} us/call {result['sample_ns']:9.2f} ns/sample"
+    if "mb_per_s" in result:
+        text += f"  {result['mb_per_s']:8.1f} MB/s"
+    if "fps" in result:
+        text += f"  {result['fps']:8.1f} fps"
+    return text
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the acquisition pipeline against the simulated USB-2416.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="results JSON file")
+    parser.add_argument("--channels", type=int, nargs="+", help=f"channel counts (default: {CHANNELS})")
+    parser.add_argument("--rates", type=float, nargs="+", help=f"per-channel rates in S/s (default: {RATES})")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"only {QUICK_CHANNELS} channels at {QUICK_RATES} S/s, shorter runs")
+    parser.add_argument("--only", choices=BENCHMARKS, nargs="+", help="run only these benchmarks")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent timing each per-call benchmark")
+    parser.add_argument("--latency-seconds", type=float, default=3.0, help="seconds of scanning per latency run")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH, help="regression thresholds JSON")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="allowed slowdown factor vs --baseline")
+    parser.add_argument("--hardware", action="store_true",
+                        help="scan board 0 instead of the simulator; only latency uses the board, "
+                             "so it is the only benchmark run unless --only names others")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    channel_counts = args.channels or (QUICK_CHANNELS if args.quick else CHANNELS)
+    rates = args.rates or (QUICK_RATES if args.quick else RATES)
+    benchmarks = args.only or (["latency"] if args.hardware else BENCHMARKS)
+    min_time = args.min_time / 2 if args.quick else args.min_time
+    latency_seconds = args.latency_seconds / 2 if args.quick else args.latency_seconds
+    with open(args.thresholds, 'r') as file:
+        limits = json.load(file)
+    baseline = []
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)["results"]
+
+    results = []
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name in benchmarks:
+            for num_chans in channel_counts:
+                for rate in rates:
+                    if name == "ring_read":
+                        new = bench_ring_read(num_chans, rate, min_time)
+                    elif name == "deinterleave":
+                        new = bench_deinterleave(num_chans, rate, min_time)
+                    elif name == "record":
+                        new = bench_record(num_chans, rate, min_time, directory)
+                    elif name == "plot_prep":
+                        new = bench_plot_prep(num_chans, rate, min_time)
+                    elif name == "plot_frame":
+                        new = bench_plot_frame(num_chans, rate, min_time)
+                    elif name == "pg_frame":
+                        new = bench_pg_frame(num_chans, rate, min_time)
+                    else:
+                        new = bench_latency(num_chans, rate, latency_seconds)
+                    for result in new:
+                        problems = [problem for problem in (check(result, limits),
+                                                            compare(result, baseline, args.tolerance)) if problem]
+                        result["ok"] = not problems
+                        print(describe(result) + ("" if result["ok"] else "  FAIL: " + "; ".join(problems)))
+                        failures += [f"{result['benchmark']} {num_chans} ch {rate:g} Hz: {problem}"
+                                     for problem in problems]
+                        results.append(result)
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "backend": "hardware" if args.hardware else "simulated",
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "poll_interval": POLL_INTERVAL,
+        "frame_interval": FRAME_INTERVAL,
+        "window_seconds": WINDOW_SECONDS,
+        "thresholds": limits,
+        "results": results,
+        "failures": failures,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=1)
+    print(f"{len(results)} results, {len(failures)} failures in {args.output}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,20 @@
 import tkinter as tk
-from tkinter import Menu, messagebox, ttk, filedialog, PhotoImage
+from tkinter import Menu, messagebox, ttk, filedialog, simpledialog, PhotoImage
 from mcculw import ul
-from mcculw.enums import InterfaceType, DigitalPortType, InfoType, BoardInfo
+from mcculw.enums import DigitalPortType, InfoType, BoardInfo
 from dashboard.widgets.digital_out_button import DigitalOutButton
 from dashboard.widgets.digital_in_binary_indicator import DigitalInBinaryIndicator
 from dashboard.widgets.counter_display import CounterDisplay
 from dashboard.widgets.analog_in_display import AnalogInDisplay
 from dashboard.widgets.ContinuousDataRecorder import ContinuousDataRecorder
+from dashboard.widgets.channel_table_editor import ChannelTableEditor
+from dashboard.widgets.analog_out_waveform import AnalogOutWaveform
+from dashboard.widgets.spectrum_display import SpectrumDisplay
+from utils.acquisition import get_engine
+from utils.channel_config import ChannelTable
+from utils.io_poller import get_poller
+from utils.ao_stream import get_ao_stream
+from utils.tcp_publisher import DEFAULT_PORT, StreamPublisher
 import os
 import json
 
@@ -16,6 +24,11 @@ class DashboardApp:
         self.root.title('DAQ Dashboard')
         self.root.geometry("800x600")
         self.board_num = 0
+        self.engine = get_engine(self.board_num)
+        self.poller = get_poller(self.board_num)
+        # Ports and counters in the channel table come from the scan instead of being polled
+        self.engine.add_io_listener(self.poller.feed)
+        self.publisher = None
         self.serial_number = "Unknown"
         self.logo_image = PhotoImage(file="C:/Users/mbhardwaj/OneDrive - Inogen/Documents/Measurement Computing/MC-USB-2416/USB-2416-DAQdash/my_daq_dashboard/ino.png")
 
@@ -37,6 +50,10 @@ class DashboardApp:
         # Initialize device
         self.initialize_device()
 
+        # Deliver digital input and counter changes from the background poller
+        self.engine_connected = self.engine.connected
+        self.pump_io()
+
         # Handle window close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
@@ -58,6 +75,7 @@ class DashboardApp:
 
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
         self.status_frame = ttk.Frame(self.root, padding="5")
         self.status_frame.pack(side=tk.BOTTOM, fill=tk.X)
@@ -67,7 +85,9 @@ class DashboardApp:
 
     def add_continuous_data_recorder(self):
         current_tab = self.notebook.nametowidget(self.notebook.select())
-        recorder = ContinuousDataRecorder(current_tab, self.board_num)
+        channels = self.engine.channel_table.channels or [0]
+        recorder = ContinuousDataRecorder(current_tab, self.board_num, low_chan=channels[0], high_chan=channels[-1],
+                                          status_callback=self.update_status)
         recorder.place(x=20, y=340)
         self.update_status("Added Continuous Data Recorder")
 
@@ -95,7 +115,11 @@ class DashboardApp:
         self.dashboard_menu.add_command(label='Add Digital In', command=self.add_digital_in)
         self.dashboard_menu.add_command(label='Add Counter Display', command=self.add_counter)
         self.dashboard_menu.add_command(label='Add Analog In Display', command=self.add_analog_in)
+        self.dashboard_menu.add_command(label='Add Spectrum Display', command=self.add_spectrum)
         self.dashboard_menu.add_command(label='Add Continuous Data Recorder', command=self.add_continuous_data_recorder)
+        self.dashboard_menu.add_command(label='Add Waveform Output', command=self.add_waveform_output)
+        self.dashboard_menu.add_separator()
+        self.dashboard_menu.add_command(label='Channel Table...', command=self.open_channel_table)
         self.dashboard_menu.add_separator()
         self.dashboard_menu.add_command(label='New Tab', command=self.add_tab)
         self.dashboard_menu.add_command(label='Save Tab', command=self.save_tab)
@@ -103,13 +127,33 @@ class DashboardApp:
 
         self.file_menu = Menu(self.menu, tearoff=0)
         self.menu.add_cascade(label='File', menu=self.file_menu)
+        self.file_menu.add_command(label='Publish Stream...', command=self.start_publishing)
+        self.file_menu.add_command(label='Stop Publishing', command=self.stop_publishing)
 
     def add_tab(self):
         tab_count = len(self.notebook.tabs()) + 1
         new_tab = ttk.Frame(self.notebook)
         self.notebook.add(new_tab, text=f"Tab {tab_count}")
+        # New and loaded tabs open in front, so their widgets start out visible
+        self.notebook.select(new_tab)
         self.create_widgets(new_tab)
 
+    def on_tab_changed(self, event):
+        # Only the visible tab renders and acquires; widgets on hidden tabs pause.
+        # Each widget decides what pausing means (e.g. a recorder keeps recording).
+        # Hidden tabs pause first, so the engine only restarts its scan when the
+        # visible tab needs channels nobody else is still scanning; giving
+        # channels back never interrupts a recorder left running elsewhere.
+        current = self.notebook.select()
+        for tab_id in self.notebook.tabs():
+            if tab_id != current:
+                for widget in self.notebook.nametowidget(tab_id).winfo_children():
+                    if hasattr(widget, 'pause'):
+                        widget.pause()
+        for widget in self.notebook.nametowidget(current).winfo_children():
+            if hasattr(widget, 'resume'):
+                widget.resume()
+
     def create_widgets(self, parent_frame):
         # Any widgets specific to the tab should be added here
         pass
@@ -134,22 +178,80 @@ class DashboardApp:
 
     def add_analog_in(self):
         current_tab = self.notebook.nametowidget(self.notebook.select())
-        display = AnalogInDisplay(current_tab, app=self)
+        display = AnalogInDisplay(current_tab, app=self, channels=self.engine.channel_table.channels or [0])
         display.place(x=20, y=260)
         self.update_status("Added Analog In Display")
 
+    def add_spectrum(self):
+        current_tab = self.notebook.nametowidget(self.notebook.select())
+        display = SpectrumDisplay(current_tab, app=self, channels=self.engine.channel_table.channels or [0])
+        display.place(x=20, y=260)
+        self.update_status("Added Spectrum Display")
+
+    def add_waveform_output(self):
+        current_tab = self.notebook.nametowidget(self.notebook.select())
+        new_output = AnalogOutWaveform(current_tab, self.board_num)
+        new_output.place(x=20, y=340)
+        self.update_status("Added Waveform Output")
+
+    def start_publishing(self):
+        if self.publisher:
+            messagebox.showinfo("Publish Stream", self.publisher.status_text())
+            return
+        port = simpledialog.askinteger("Publish Stream", "TCP port:", initialvalue=DEFAULT_PORT,
+                                       minvalue=1, maxvalue=65535, parent=self.root)
+        if port is None:
+            return
+        decimation = simpledialog.askinteger("Publish Stream", "Send every Nth scan:", initialvalue=1,
+                                             minvalue=1, parent=self.root)
+        if decimation is None:
+            return
+        publisher = StreamPublisher(self.engine, self.engine.channel_table.channels or [0], port,
+                                    decimation=decimation)
+        try:
+            publisher.start()
+        except Exception as e:
+            messagebox.showerror("Publish Error", str(e))
+            self.update_status("Publish Error")
+            return
+        self.publisher = publisher
+        self.update_status(f"Publishing on port {publisher.port}")
+
+    def stop_publishing(self):
+        if self.publisher:
+            self.publisher.stop()
+            self.publisher = None
+            self.update_status("Stopped publishing")
+
+    def open_channel_table(self):
+        ChannelTableEditor(self.root, self)
+
+    def apply_channel_table(self, table, rate=None):
+        try:
+            plan = self.engine.configure(table, rate)
+            self.update_status(f"Channel table applied: {plan.summary()}")
+        except Exception as e:
+            messagebox.showerror("Channel Table Error", str(e))
+            self.update_status("Channel Table Error")
+
     def read_analog_input(self, channel):
-        value = 0.0  # Placeholder for actual data reading
-        return value
+        """Mean of `channel` over its display's statistics window, or None if no display scans it.
+
+        The value comes from the running scan, so polling it costs no USB traffic.
+        """
+        for tab_id in self.notebook.tabs():
+            for widget in self.notebook.nametowidget(tab_id).winfo_children():
+                if isinstance(widget, AnalogInDisplay):
+                    stats = widget.read_channel(channel)
+                    if stats is not None:
+                        return stats["mean"]
+        return None
 
     def initialize_device(self):
         try:
-            ul.ignore_instacal()
-            devices = ul.get_daq_device_inventory(InterfaceType.USB)
-            if devices:
-                device = devices[0]
-                ul.create_daq_device(self.board_num, device)
-                
+            # The engine owns the board; widgets reuse it instead of re-creating board 0
+            device = self.engine.open()
+            if device:
                 max_config_len = 100
                 self.serial_number = ul.get_config_string(
                     InfoType.BOARDINFO, self.board_num, 0, BoardInfo.DEVUNIQUEID, max_config_len
@@ -165,13 +267,34 @@ class DashboardApp:
             messagebox.showerror("Initialization Error", str(e))
             self.update_status("Initialization Error")
 
+    def pump_io(self):
+        # One GUI-thread loop for every DIO/counter widget; it never touches USB
+        self.poller.dispatch()
+        # The engine reconnects on its own thread; the status bar just follows it
+        if self.engine.connected != self.engine_connected:
+            self.engine_connected = self.engine.connected
+            if self.engine.error:
+                self.update_status(self.engine.error)
+            else:
+                self.update_status("Device reconnected, scan restarted" if self.engine_connected
+                                   else "Device disconnected, waiting for it to come back")
+        self.pump_io_id = self.root.after(50, self.pump_io)
+
     def update_status(self, message):
         self.status_label.config(text=f"Status: {message}")
 
     def on_closing(self):
-        for widget in self.root.winfo_children():
-            if isinstance(widget, AnalogInDisplay):
-                widget.remove_widget()
+        for tab_id in self.notebook.tabs():
+            for widget in self.notebook.nametowidget(tab_id).winfo_children():
+                if isinstance(widget, (AnalogInDisplay, SpectrumDisplay)):
+                    widget.remove_widget()
+                elif isinstance(widget, ContinuousDataRecorder):
+                    widget.on_closing()
+        self.root.after_cancel(self.pump_io_id)
+        self.poller.close()
+        self.stop_publishing()
+        get_ao_stream(self.board_num).stop()
+        self.engine.close()
         self.root.destroy()
 
     def save_tab(self):
@@ -189,8 +312,21 @@ class DashboardApp:
             # Add custom name if applicable
             if hasattr(widget, 'custom_name'):
                 widget_info['custom_name'] = widget.custom_name
+            if isinstance(widget, AnalogInDisplay):
+                widget_info['channels'] = widget.channels
+                widget_info['stats_seconds'] = widget.stats_seconds
+            if isinstance(widget, SpectrumDisplay):
+                widget_info.update(channels=widget.channels, nperseg=widget.spectrum.nperseg,
+                                   averaging=widget.spectrum.averaging, num_averages=widget.spectrum.num_averages)
+            if isinstance(widget, AnalogOutWaveform):
+                widget_info.update(widget.settings(), channel=widget.channel, shape=widget.shape_var.get())
             tab_config.append(widget_info)
 
+        # The channel table has no position; it is applied before any widget on load
+        table_info = {"class": "ChannelTable", "rate": self.engine.rate}
+        table_info.update(self.engine.channel_table.to_dict())
+        tab_config.append(table_info)
+
         file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
         if file_path:
             with open(file_path, 'w') as file:
@@ -206,8 +342,14 @@ class DashboardApp:
             self.add_tab()
             current_tab = self.notebook.nametowidget(self.notebook.select())
 
+            for widget_info in tab_config:
+                if widget_info["class"] == "ChannelTable":
+                    self.apply_channel_table(ChannelTable.from_dict(widget_info), widget_info.get("rate"))
+
             for widget_info in tab_config:
                 class_name = widget_info["class"]
+                if class_name == "ChannelTable":
+                    continue
                 x = widget_info["x"]
                 y = widget_info["y"]
                 custom_name = widget_info.get('custom_name', None)
@@ -221,7 +363,22 @@ class DashboardApp:
                 elif class_name == "CounterDisplay":
                     new_widget = CounterDisplay(current_tab, self.board_num, custom_name=custom_name)
                 elif class_name == "AnalogInDisplay":
-                    new_widget = AnalogInDisplay(current_tab, app=self)
+                    new_widget = AnalogInDisplay(current_tab, app=self, channels=widget_info.get("channels", [0]),
+                                                 stats_seconds=widget_info.get("stats_seconds", 1.0))
+                    if custom_name:
+                        new_widget.rename(custom_name)
+                elif class_name == "SpectrumDisplay":
+                    new_widget = SpectrumDisplay(current_tab, app=self, channels=widget_info.get("channels", [0]),
+                                                 nperseg=widget_info.get("nperseg", 1024),
+                                                 averaging=widget_info.get("averaging", "exponential"),
+                                                 num_averages=widget_info.get("num_averages", 8))
+                    if custom_name:
+                        new_widget.rename(custom_name)
+                elif class_name == "AnalogOutWaveform":
+                    # Loaded generators come back stopped; the user starts them
+                    new_widget = AnalogOutWaveform(current_tab, self.board_num, widget_info.get("channel", 0),
+                                                   widget_info.get("shape", "Sine"), widget_info.get("frequency", 1.0),
+                                                   widget_info.get("amplitude", 1.0), widget_info.get("offset", 0.0))
                     if custom_name:
                         new_widget.rename(custom_name)
                 else:
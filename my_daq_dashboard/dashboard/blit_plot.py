@@ -0,0 +1,145 @@
+# blit_plot.py
+import numpy as np
+import matplotlib
+from matplotlib import colors as mcolors
+from utils.decimation import minmax_envelope
+
+
+class BlitPlot:
+    """Blitted multi-line plot of min/max envelopes on an embedded Agg canvas.
+
+    Each pixel column of the axes gets one envelope bin, painted as a
+    vertical span from the bin's min to its max (widened to meet the
+    neighbouring column, so steep edges stay joined) straight into the
+    canvas' RGBA buffer over a cached background, then blitted. Agg never
+    strokes the zigzag polyline of a noisy envelope, which cost tens of ms
+    per frame; painting is a few vectorized NumPy ops over the covered
+    pixels. A full redraw happens only when the y-axis has to move: data
+    leaving the current limits, or shrinking below `hysteresis` of the
+    current span.
+
+    With fewer than two samples per pixel column each column gets the
+    linearly interpolated sample instead, which paints as a 1 px line.
+    """
+
+    def __init__(self, canvas, ax, num_lines, window_seconds, hysteresis=0.25, margin=0.1):
+        self.canvas = canvas
+        self.ax = ax
+        self.num_lines = num_lines
+        self.window_seconds = window_seconds
+        self.hysteresis = hysteresis
+        self.margin = margin
+        # The axes' default line colours, as RGBA pixels in the buffer's uint32 words
+        cycle = matplotlib.rcParams["axes.prop_cycle"].by_key()["color"]
+        rgba = [np.round(np.array(mcolors.to_rgba(cycle[i % len(cycle)])) * 255) for i in range(num_lines)]
+        self.colors = np.array(rgba, dtype=np.uint8).view(np.uint32).ravel()
+        self.background = None
+        self._pixels = None
+        self._origin = 0
+        self._stride = 0
+        self._height = 0
+        self._drawn_width = 0
+        self._width = 0
+        self._n = 0
+        self._envelope = None
+        self._columns = None
+        self._span_colors = None
+        self._ramp = np.empty(0, dtype=np.intp)
+        self._left = None
+        self._right = None
+        self._fraction = None
+
+        ax.set_xlim(-window_seconds, 0)
+        ax.set_xlabel("Time (s)")
+        ax.set_ylabel("Volts")
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    @property
+    def width(self):
+        """Envelope bins per frame: one per pixel column of the axes."""
+        return max(int(self.ax.bbox.width), 1)
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        # The renderer (and its buffer) is replaced when the canvas is resized
+        buffer = np.asarray(self.canvas.get_renderer().buffer_rgba())
+        self._pixels = buffer.view(np.uint32).reshape(-1)
+        if buffer.shape[1] != self._stride:
+            self._stride = buffer.shape[1]
+            self._ramp = np.empty(0, dtype=np.intp)
+        self._drawn_width = self.width
+        x0, y0, x1, y1 = self.ax.bbox.extents
+        top = int(np.ceil(buffer.shape[0] - y1))
+        self._origin = top * self._stride + int(np.ceil(x0))
+        self._height = max(int(np.floor(buffer.shape[0] - y0)) - top, 1)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        # Before the first update(), or after a resize the envelope no longer fits
+        if self._n and self._width == self._drawn_width:
+            self._paint(self._envelope)
+        self.canvas.blit(self.ax.bbox)
+
+    def _resize(self, n):
+        width = self.width
+        if (width, n) == (self._width, self._n):
+            return
+        self._width = width
+        self._n = n
+        self._envelope = np.empty((self.num_lines, 2 * width))
+        self._columns = np.tile(np.arange(width), self.num_lines)
+        self._span_colors = np.repeat(self.colors, width)
+        # Where each column falls between samples, for windows too short to bin
+        position = np.linspace(0, n - 1, width)
+        self._left = np.minimum(position.astype(np.intp), max(n - 2, 0))
+        self._right = np.minimum(self._left + 1, n - 1)
+        self._fraction = (position - self._left)[np.newaxis, :]
+
+    def _paint(self, y):
+        """Paint each line's min/max spans, one per pixel column, into the canvas buffer."""
+        low, high = self.ax.get_ylim()
+        scale = self._height / (high - low)
+        last = self._height - 1
+        # Buffer rows count down from the top of the axes
+        top = np.clip((high - y[:, 1::2]) * scale, 0, last).astype(np.intp)
+        bottom = np.clip((high - y[:, 0::2]) * scale, 0, last).astype(np.intp)
+        # Reach the previous column, like a line through the envelope would
+        np.minimum(top[:, 1:], bottom[:, :-1], out=top[:, 1:])
+        np.maximum(bottom[:, 1:], top[:, :-1], out=bottom[:, 1:])
+        lengths = (bottom - top + 1).ravel()
+        ends = np.cumsum(lengths)
+        total = int(ends[-1])
+        if len(self._ramp) < total:
+            self._ramp = np.arange(2 * total, dtype=np.intp) * self._stride
+        # Flat buffer index of every covered pixel: each span's first pixel, then one row down per step
+        first = self._origin + top.ravel() * self._stride + self._columns - (ends - lengths) * self._stride
+        index = np.repeat(first, lengths)
+        index += self._ramp[:total]
+        # Later lines paint over earlier ones, as they would be drawn
+        self._pixels[index] = np.repeat(self._span_colors, lengths)
+
+    def _rescale(self, y):
+        low, high = self.ax.get_ylim()
+        data_low, data_high = float(y.min()), float(y.max())
+        span = high - low
+        if low <= data_low and data_high <= high and (data_high - data_low) >= self.hysteresis * span:
+            return False
+        pad = max((data_high - data_low) * self.margin, 1e-3)
+        self.ax.set_ylim(data_low - pad, data_high + pad)
+        return True
+
+    def update(self, data):
+        """Draw (num_lines, n) samples spanning the last window_seconds."""
+        self._resize(data.shape[-1])
+        y = minmax_envelope(data, self._width, out=self._envelope)
+        if y is data:
+            y = self._envelope
+            y[:, 0::2] = data[:, self._left] * (1 - self._fraction) + data[:, self._right] * self._fraction
+            y[:, 1::2] = y[:, 0::2]
+
+        if self._rescale(y) or self.background is None or self._width != self._drawn_width:
+            # Full redraw; _on_draw re-caches the background and paints the lines
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_lines()
@@ -0,0 +1,72 @@
+# pg_plot.py
+import numpy as np
+from utils.ring_buffer import HistoryBuffer
+
+
+class PgLivePlot:
+    """High-rate multi-line plot of the newest `window_seconds` on a pyqtgraph PlotWidget.
+
+    Samples go into a preallocated HistoryBuffer and the time axis is built
+    once, so a frame is one setData per line on views of existing arrays.
+    pyqtgraph then draws only the visible part (clip-to-view) and, with more
+    samples than pixels, a peak (min/max) downsample of it, so the cost of a
+    frame follows the plot width rather than the window length.
+
+    pyqtgraph and a Qt binding are only needed once a plot is created.
+    """
+
+    def __init__(self, num_lines, rate, window_seconds=10, labels=None, units="V", samples_per_pixel=1.0,
+                 parent=None):
+        import pyqtgraph as pg
+
+        self.rate = rate
+        self.samples_per_pixel = samples_per_pixel
+        self.window_seconds = window_seconds
+        self.history = HistoryBuffer(num_lines, max(int(rate * window_seconds), 2))
+        capacity = self.history.capacity
+        # Seconds before the newest sample, fixed for the life of the plot
+        self.x = (np.arange(capacity) - (capacity - 1)) / rate
+        self.frames = 0
+        self._dirty = False
+
+        self.widget = pg.PlotWidget(parent=parent)
+        self.plot_item = self.widget.getPlotItem()
+        self.plot_item.setClipToView(True)
+        self.plot_item.setDownsampling(auto=True, mode='peak')
+        self.plot_item.setXRange(self.x[0], 0, padding=0)
+        self.plot_item.enableAutoRange(axis='y')
+        self.plot_item.setAutoVisible(y=True)
+        self.plot_item.setLabel('bottom', 'Time', units='s')
+        self.plot_item.setLabel('left', units=units)
+        if labels:
+            self.plot_item.addLegend()
+        self.curves = [self.plot_item.plot(pen=pg.intColor(row, max(num_lines, 9)),
+                                           name=labels[row] if labels else None,
+                                           autoDownsampleFactor=self.samples_per_pixel)
+                       for row in range(num_lines)]
+
+    def append(self, data):
+        """Append a (num_lines, n) block of samples; drawn on the next update()."""
+        if data.shape[1]:
+            self.history.append(data)
+            self._dirty = True
+
+    def update(self):
+        """Hand the newest samples to the curves. Returns False if nothing arrived since the last call."""
+        if not self._dirty:
+            return False
+        # Until the window has filled, only the samples received so far are drawn
+        count = min(self.history.count, self.history.capacity)
+        first = self.history.capacity - count
+        view = self.history.view()
+        for curve, row in zip(self.curves, view):
+            curve.setData(self.x[first:], row[first:])
+        self._dirty = False
+        self.frames += 1
+        return True
+
+    def clear(self):
+        self.history.clear()
+        for curve in self.curves:
+            curve.setData([], [])
+        self._dirty = False
@@ -1,25 +1,25 @@
 import tkinter as tk
 from tkinter import simpledialog, filedialog, messagebox
-import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.animation import FuncAnimation
-from mcculw import ul
-from mcculw.enums import ScanOptions, ULRange, FunctionType, Status, InterfaceType, InfoType, BoardInfo, AiChanType, AnalogInputMode
-from mcculw.device_info import DaqDeviceInfo
-from ctypes import c_double
-import threading
+from dashboard.blit_plot import BlitPlot
 from utils.events import on_drag_start, on_drag_motion, right_click_menu
-from utils.device_utils import initialize_device, set_channel_settings
+from utils.acquisition import get_engine
+from utils.trend_history import TrendHistory
+from utils.statistics import WindowedStats
 
 class AnalogInDisplay(tk.Frame):
-    def __init__(self, master, app, **kwargs):
+    def __init__(self, master, app, channels=(0,), window_seconds=10, stats_seconds=1.0, **kwargs):
         """
         Initialize an instance of the AnalogInDisplay class.
 
         Args:
             master (tk.Tk): The parent widget.
             app: The main application instance.
+            channels: Analog input channels to plot.
+            window_seconds: Length of the plotted time window; minutes or hours are
+                drawn from the coarser tiers of the trend history.
+            stats_seconds: Window of the mean/RMS/p-p readout under the name.
             **kwargs: Additional keyword arguments for the tk.Frame initialization.
         """
         super().__init__(master, **kwargs)
@@ -29,27 +29,26 @@ class AnalogInDisplay(tk.Frame):
         self.custom_name = "Analog In"
         self.value = 0.00
         self.locked = False
-        self.scalar_label = tk.Label(self, text=f"{self.custom_name}: {self.value:.2f} V", font=('Helvetica', 14), height=2, width=20)
+        self.board_num = 0
+        self.channels = sorted(set(channels))
+        self.scalar_label = tk.Label(self, text=f"{self.custom_name}: {self.value:.2f} V", font=('Helvetica', 14),
+                                     height=len(self.channels) + 1, width=44, justify=tk.LEFT)
         self.scalar_label.pack()
         self.update_display_id = None
+        self.update_plot_id = None
 
         # Configuration Parameters
-        self.board_num = 0
-        self.low_chan = 0
-        self.high_chan = 0
-        self.rate = 80
-        self.points_per_channel = 100
-        self.total_count = self.points_per_channel * (self.high_chan - self.low_chan + 1)
-        self.ai_range = ULRange.BIP10VOLTS
-        self.scan_options = ScanOptions.BACKGROUND | ScanOptions.SCALEDATA | ScanOptions.CONTINUOUS
-
-        # Initialize buffer
-        self.buffer = np.zeros(self.total_count, dtype=np.float64)
+        self.window_seconds = window_seconds
+        self.frame_interval = 50  # ms
+        self.engine = get_engine(self.board_num)
+        self.stats_seconds = stats_seconds
+        self.make_history()
+        self.subscription = None
+        self.paused = False
 
         try:
-            # Initialize and configure DAQ device
-            device = initialize_device(self.board_num)
-            set_channel_settings(self.board_num)
+            # The shared engine opens the board once for every widget
+            device = self.engine.open()
             self.scalar_label.config(text=f"Connected to {device.product_name}")
         except Exception as e:
             messagebox.showerror("Initialization Error", str(e))
@@ -57,6 +56,7 @@ class AnalogInDisplay(tk.Frame):
         # Initialize plot and start data acquisition
         self.init_plot()
         self.run_scan()
+        self.update_display()
 
         # Bind mouse events
         self.bind("<Button-1>", on_drag_start)
@@ -65,92 +65,114 @@ class AnalogInDisplay(tk.Frame):
 
     # ... rest of the AnalogInDisplay class remains unchanged ..
     def init_plot(self):
-        self.fig, self.ax = plt.subplots()
-        self.x_data = np.arange(0, self.points_per_channel)
-        self.y_data = np.zeros(self.points_per_channel)
-        self.ln, = self.ax.plot(self.x_data, self.y_data, 'r-')
+        self.fig = Figure(figsize=(6, 4))
+        self.ax = self.fig.add_subplot()
         self.ax.set_ylim(-10, 10)  # Initial y-axis limits
 
         self.canvas = FigureCanvasTkAgg(self.fig, master=self)
         self.canvas_widget = self.canvas.get_tk_widget()
         self.canvas_widget.pack(fill=tk.BOTH, expand=True)
 
-        self.ani = FuncAnimation(self.fig, self.update_plot, interval=100, blit=True, save_count=50)
+        self.plot = BlitPlot(self.canvas, self.ax, len(self.channels), self.window_seconds)
+        self.update_plot_id = self.after(self.frame_interval, self.update_plot)
 
-    def update_plot(self, frame):
+    def make_history(self):
+        # Trend bins and stats windows are counted in samples, so they follow the engine's scan rate
+        self.history = TrendHistory(len(self.channels), self.engine.rate)
+        self.stats = WindowedStats(len(self.channels), self.engine.rate, self.stats_seconds)
+
+    def update_plot(self):
         try:
-            status, curr_count, curr_index = ul.get_status(self.board_num, FunctionType.AIFUNCTION)
-            if status == Status.RUNNING:
-                new_data = np.frombuffer(self.buffer, dtype=np.float64)[:self.points_per_channel]
-                self.ln.set_ydata(new_data)
-                self.ax.set_ylim(new_data.min() - 1, new_data.max() + 1)  # Dynamically adjust y-limits
-            self.canvas.draw()
-            return self.ln,
+            blocks = self.subscription.get_all() if self.subscription else []
+            if self.history.rate != self.engine.rate:
+                # The Channel Table changed the scan rate: samples at the old rate no longer fit the bins
+                self.make_history()
+            for block in blocks:
+                self.history.append(block.data)
+                self.stats.append(block.data)
+            if blocks:
+                self.plot.update(self.history.window(self.window_seconds))
+        except tk.TclError:
+            return
         except Exception as e:
             print(f"Error updating plot: {e}")
+        self.update_plot_id = self.after(self.frame_interval, self.update_plot)
 
-    def run_scan(self):
-        try:
-            scan_thread = threading.Thread(target=self._run_scan_thread, daemon=True)
-            scan_thread.start()
-        except Exception as e:
-            print(f"Error starting scan: {e}")
+    def read_channel(self, channel):
+        """Windowed stats of `channel` (a dict, see RunningStats.channel), or None."""
+        if channel not in self.channels or not self.stats.total.count:
+            return None
+        return self.stats.window().channel(self.channels.index(channel))
 
-    def _run_scan_thread(self):
+    def run_scan(self):
         try:
-            ul.a_in_scan(self.board_num, self.low_chan, self.high_chan, self.total_count, self.rate, self.ai_range, self.buffer.ctypes.data, self.scan_options)
-            print("Scan started successfully.")
+            self.subscription = self.engine.subscribe(self.channels)
         except Exception as e:
             print(f"Error starting scan: {e}")
 
-    def discover_and_configure_device(self):
-        try:
-            self.release_device()  # Ensure any previously configured device is released
-            devices = ul.get_daq_device_inventory(InterfaceType.ANY)
-            if not devices:
-                raise Exception("No DAQ devices found")
-            
-            for device in devices:
-                if device.product_id in [208, 209, 253, 254]:
-                    ul.create_daq_device(self.board_num, device)
-                    print(f"Configured device: {device.product_name}")
-                    return
-            else:
-                raise Exception("No supported DAQ device found")
-        except Exception as e:
-            print(f"Error discovering and configuring device: {e}")
-
-    def set_channel_settings(self, board_num):
-        try:
-            channel = 0
-            ul.set_config(InfoType.BOARDINFO, board_num, channel, BoardInfo.ADCHANTYPE, AiChanType.VOLTAGE)
-            ul.a_chan_input_mode(board_num, channel, AnalogInputMode.DIFFERENTIAL)
-            ul.set_config(InfoType.BOARDINFO, board_num, channel, BoardInfo.ADDATARATE, 1000)
-            print("Channel settings configured successfully.")
-        except Exception as e:
-            print(f"Error setting channel settings: {e}")
+    def pause(self):
+        # Hidden tab: stop drawing and give the channels back to the engine, which
+        # keeps scanning them for anyone else subscribed (e.g. a recorder)
+        if self.paused:
+            return
+        self.paused = True
+        if self.update_plot_id:
+            self.after_cancel(self.update_plot_id)
+            self.update_plot_id = None
+        if self.update_display_id:
+            self.after_cancel(self.update_display_id)
+            self.update_display_id = None
+        if self.subscription:
+            self.subscription.close()
+            self.subscription = None
 
-    def release_device(self):
-        try:
-            ul.release_daq_device(self.board_num)
-            print("Released DAQ device successfully.")
-        except Exception as e:
-            print(f"Error releasing device: {e}")
+    def resume(self):
+        if not self.paused:
+            return
+        self.paused = False
+        # The trend history is kept, so long views survive a tab switch (with a gap)
+        self.run_scan()
+        self.update_plot_id = self.after(self.frame_interval, self.update_plot)
+        # The readout should describe the signal now, not the time before the pause
+        self.stats.reset()
+        self.update_display()
+
+    def display_text(self):
+        if not self.stats.total.count:
+            return f"{self.custom_name}: {self.value:.2f} V"
+        stats = self.stats.window()
+        self.value = stats.mean[0]
+        lines = [f"{self.custom_name} ({self.stats_seconds:g} s)"]
+        for row, channel in enumerate(self.channels):
+            # Thermocouple rows arrive already converted to degC
+            unit = "degC" if self.engine.channel_table.get(channel).tc_type else "V"
+            lines.append(f"CH{channel}: {stats.mean[row]:.4f} {unit}  rms {stats.rms[row]:.4f}  "
+                         f"std {stats.std[row]:.4f}  p-p {stats.peak_to_peak[row]:.4f}")
+        return "\n".join(lines)
 
     def update_display(self):
+        # The readout comes from the scan's own blocks; no extra a_in calls
         try:
-            self.value = self.app.read_analog_input(0)
-            self.scalar_label.config(text=f"{self.custom_name}: {self.value:.2f} V")
-            self.update_display_id = self.after(100, self.update_display)
+            if self.subscription and self.subscription.error:
+                self.scalar_label.config(text=f"{self.custom_name}: {self.subscription.error}")
+            elif self.stats.total.count:
+                self.scalar_label.config(text=self.display_text())
+            self.update_display_id = self.after(250, self.update_display)
         except tk.TclError:
             return
 
     def remove_widget(self):
         if self.update_display_id:
             self.after_cancel(self.update_display_id)
-        self.release_device()
+        if self.update_plot_id:
+            self.after_cancel(self.update_plot_id)
+        if self.subscription:
+            self.subscription.close()
+            self.subscription = None
         self.destroy()
 
     def rename_widget(self, new_name):
         self.custom_name = new_name
-        self.scalar_label.config(text=f"{self.custom_name}: {self.value:.2f} V")
+        self.scalar_label.config(text=self.display_text())
+
+    rename = rename_widget
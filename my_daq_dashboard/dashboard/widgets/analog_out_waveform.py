@@ -0,0 +1,111 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from utils.events import on_drag_start, on_drag_motion, right_click_menu
+from utils.ao_stream import get_ao_stream, Waveform, TABLES
+
+# Outputs on the USB-2416-4AO
+NUM_AO_CHANS = 4
+
+
+class AnalogOutWaveform(tk.Frame):
+    """Function generator block for one analog output of a -4AO board.
+
+    Every block on the board shares one AnalogOutputStream, so several
+    channels play together from a single scan. Frequency, amplitude and
+    offset changes are applied to the running stream; only switching the
+    wave shape swaps in a new table.
+    """
+
+    def __init__(self, master, board_num, channel=0, shape="Sine", frequency=1.0, amplitude=1.0, offset=0.0,
+                 **kwargs):
+        super().__init__(master, bg='lightgrey', padx=5, pady=5, **kwargs)
+        self.board_num = board_num
+        self.channel = channel
+        self.locked = False
+        self.running = False
+        self.custom_name = f"AO{channel}"
+        self.stream = get_ao_stream(board_num)
+
+        self.title = tk.Label(self, text=self.custom_name, font=('Helvetica', 14), bg='lightgrey')
+        self.title.grid(row=0, column=0, columnspan=2, sticky="w")
+        self.channel_var = tk.IntVar(value=channel)
+        tk.Spinbox(self, from_=0, to=NUM_AO_CHANS - 1, textvariable=self.channel_var, width=3, state="readonly",
+                   command=self.change_channel).grid(row=0, column=2)
+        self.shape_var = tk.StringVar(value=shape)
+        ttk.Combobox(self, textvariable=self.shape_var, values=list(TABLES), state="readonly",
+                     width=10).grid(row=0, column=3)
+
+        self.frequency_var = tk.DoubleVar(value=frequency)
+        self.amplitude_var = tk.DoubleVar(value=amplitude)
+        self.offset_var = tk.DoubleVar(value=offset)
+        for column, (label, var) in enumerate([("Hz", self.frequency_var), ("Vpk", self.amplitude_var),
+                                               ("Offset", self.offset_var)]):
+            tk.Label(self, text=label, bg='lightgrey').grid(row=1, column=column)
+            entry = tk.Entry(self, textvariable=var, width=8)
+            entry.grid(row=2, column=column)
+            entry.bind("<Return>", lambda event: self.apply())
+
+        self.start_button = tk.Button(self, text="Start", width=6, command=self.toggle)
+        self.start_button.grid(row=2, column=3)
+        self.shape_var.trace_add("write", lambda *args: self.apply(new_shape=True))
+
+        for widget in (self, self.title):
+            widget.bind("<Button-1>", on_drag_start)
+            widget.bind("<B1-Motion>", on_drag_motion)
+            widget.bind("<Button-3>", lambda event: right_click_menu(event, self))
+        self.bind("<Destroy>", self.on_destroy)
+
+    def settings(self):
+        return {"frequency": self.frequency_var.get(), "amplitude": self.amplitude_var.get(),
+                "offset": self.offset_var.get()}
+
+    def toggle(self):
+        if self.running:
+            self.stop()
+        else:
+            self.apply(new_shape=True, start=True)
+
+    def change_channel(self):
+        if self.running:
+            self.stop()
+            self.channel = self.channel_var.get()
+            self.apply(new_shape=True, start=True)
+        else:
+            self.channel = self.channel_var.get()
+
+    def apply(self, new_shape=False, start=False):
+        if not (self.running or start):
+            return
+        try:
+            settings = self.settings()
+            if new_shape:
+                self.stream.set_waveform(self.channel, Waveform.named(self.shape_var.get(), **settings))
+            else:
+                self.stream.update(self.channel, **settings)
+        except Exception as e:
+            messagebox.showerror("Analog Output Error", str(e))
+            return
+        self.running = True
+        self.start_button.config(text="Stop")
+
+    def stop(self):
+        self.running = False
+        self.start_button.config(text="Start")
+        try:
+            self.stream.set_waveform(self.channel, None)
+        except Exception as e:
+            print(f"Error stopping analog output: {e}")
+
+    def on_destroy(self, event):
+        if event.widget is self and self.running:
+            self.running = False
+            self.stream.set_waveform(self.channel, None)
+
+    def rename_widget(self, new_name):
+        self.custom_name = new_name
+        self.title.config(text=new_name)
+
+    rename = rename_widget
+
+    def remove_widget(self):
+        self.destroy()
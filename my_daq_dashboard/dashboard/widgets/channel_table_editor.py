@@ -0,0 +1,141 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from utils.channel_config import (ChannelConfig, ChannelTable, DATA_RATES, MODES, RANGES, TC_TYPES, NUM_SE_CHANS,
+                                  DIGITAL_PORTS, NUM_COUNTERS)
+
+COLUMNS = ("channel", "mode", "range", "data_rate", "tc_type")
+
+
+class ChannelTableEditor(tk.Toplevel):
+    """Dialog for editing the analog input channel table.
+
+    The planner line under the table is refreshed after every edit, so a
+    configuration that cannot keep up with the scan rate is flagged before
+    it reaches the board.
+    """
+
+    def __init__(self, master, app, **kwargs):
+        super().__init__(master, **kwargs)
+        self.title("Channel Table")
+        self.app = app
+        self.table = ChannelTable.from_dict(app.engine.channel_table.to_dict())
+
+        self.tree = ttk.Treeview(self, columns=COLUMNS, show="headings", height=10)
+        for column, heading in zip(COLUMNS, ("Channel", "Mode", "Range", "Data rate (S/s)", "TC type")):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=110, anchor="center")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+        edit_frame = ttk.Frame(self)
+        edit_frame.pack(fill=tk.X, padx=5)
+        self.channel_var = tk.IntVar(value=0)
+        self.mode_var = tk.StringVar(value="DIFF")
+        self.range_var = tk.StringVar(value="BIP10VOLTS")
+        self.rate_var = tk.StringVar(value="1000")
+        self.tc_var = tk.StringVar(value="None")
+        ttk.Spinbox(edit_frame, from_=0, to=NUM_SE_CHANS - 1, textvariable=self.channel_var, width=5).pack(side=tk.LEFT)
+        ttk.Combobox(edit_frame, textvariable=self.mode_var, values=MODES, width=6, state="readonly").pack(side=tk.LEFT)
+        ttk.Combobox(edit_frame, textvariable=self.range_var, values=RANGES, width=14, state="readonly").pack(side=tk.LEFT)
+        ttk.Combobox(edit_frame, textvariable=self.rate_var, values=[f"{rate:g}" for rate in DATA_RATES], width=7,
+                     state="readonly").pack(side=tk.LEFT)
+        ttk.Combobox(edit_frame, textvariable=self.tc_var, values=["None"] + TC_TYPES, width=5,
+                     state="readonly").pack(side=tk.LEFT)
+        ttk.Button(edit_frame, text="Add/Update", command=self.add_channel).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(edit_frame, text="Remove", command=self.remove_channel).pack(side=tk.LEFT)
+
+        # Digital ports and counters sampled on the scan clock, with per-sample timestamps
+        sync_frame = ttk.Frame(self)
+        sync_frame.pack(fill=tk.X, padx=5, pady=(5, 0))
+        ttk.Label(sync_frame, text="Scan with analog inputs:").pack(side=tk.LEFT)
+        self.port_vars = {port: tk.BooleanVar(value=port in self.table.ports) for port in DIGITAL_PORTS}
+        self.counter_vars = {counter: tk.BooleanVar(value=counter in self.table.counters)
+                             for counter in range(NUM_COUNTERS)}
+        for port, var in self.port_vars.items():
+            ttk.Checkbutton(sync_frame, text=port, variable=var).pack(side=tk.LEFT)
+        for counter, var in self.counter_vars.items():
+            ttk.Checkbutton(sync_frame, text=f"Counter {counter}", variable=var).pack(side=tk.LEFT)
+
+        rate_frame = ttk.Frame(self)
+        rate_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(rate_frame, text="Scan rate (S/s per channel):").pack(side=tk.LEFT)
+        self.scan_rate_var = tk.StringVar(value=f"{app.engine.rate:g}")
+        self.scan_rate_var.trace_add("write", lambda *args: self.update_plan())
+        ttk.Entry(rate_frame, textvariable=self.scan_rate_var, width=8).pack(side=tk.LEFT)
+
+        self.plan_label = tk.Label(self, anchor="w", justify=tk.LEFT)
+        self.plan_label.pack(fill=tk.X, padx=5)
+
+        button_frame = ttk.Frame(self)
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="Apply", command=self.apply).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Close", command=self.destroy).pack(side=tk.RIGHT)
+
+        self.refresh()
+
+    def refresh(self):
+        self.tree.delete(*self.tree.get_children())
+        for config in self.table:
+            self.tree.insert("", tk.END, iid=str(config.channel), values=(
+                config.channel, config.mode, config.ai_range, f"{config.data_rate:g}", config.tc_type or ""))
+        self.update_plan()
+
+    def scan_rate(self):
+        try:
+            return float(self.scan_rate_var.get())
+        except ValueError:
+            return None
+
+    def update_plan(self):
+        rate = self.scan_rate()
+        if rate is None:
+            self.plan_label.config(text="Enter a numeric scan rate", fg="red")
+            return None
+        plan = self.table.plan(rate)
+        text = "\n".join([plan.summary()] + plan.errors)
+        self.plan_label.config(text=text, fg="black" if plan.ok else "red")
+        return plan
+
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        config = self.table.get(int(selection[0]))
+        self.channel_var.set(config.channel)
+        self.mode_var.set(config.mode)
+        self.range_var.set(config.ai_range)
+        self.rate_var.set(f"{config.data_rate:g}")
+        self.tc_var.set(config.tc_type or "None")
+
+    def add_channel(self):
+        try:
+            channel = int(self.channel_var.get())
+        except (ValueError, tk.TclError):
+            messagebox.showerror("Channel Table", "Channel must be a number", parent=self)
+            return
+        tc_type = None if self.tc_var.get() == "None" else self.tc_var.get()
+        self.table.set(ChannelConfig(channel, self.mode_var.get(), self.range_var.get(),
+                                     int(self.rate_var.get()), tc_type))
+        self.refresh()
+
+    def remove_channel(self):
+        for item in self.tree.selection():
+            self.table.remove(int(item))
+        self.refresh()
+
+    def apply(self):
+        plan = self.update_plan()
+        if plan is None:
+            return
+        if not len(self.table):
+            messagebox.showerror("Channel Table", "Add at least one channel", parent=self)
+            return
+        if plan.errors:
+            messagebox.showerror("Channel Table", "\n".join(plan.errors), parent=self)
+            return
+        if plan.overrun and not messagebox.askyesno(
+                "Channel Table", f"{plan.summary()}\n\nApply anyway?", parent=self):
+            return
+        self.table.ports = [port for port, var in self.port_vars.items() if var.get()]
+        self.table.counters = [counter for counter, var in self.counter_vars.items() if var.get()]
+        self.app.apply_channel_table(ChannelTable.from_dict(self.table.to_dict()), plan.rate)
@@ -0,0 +1,151 @@
+import tkinter as tk
+from tkinter import messagebox
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from utils.events import on_drag_start, on_drag_motion, right_click_menu
+from utils.acquisition import get_engine
+from utils.spectrum import WelchSpectrum, log_decimate
+
+
+class SpectrumDisplay(tk.Frame):
+    def __init__(self, master, app, channels=(0,), nperseg=1024, averaging="exponential", num_averages=8,
+                 **kwargs):
+        """
+        Live amplitude spectrum of analog input channels.
+
+        Args:
+            master (tk.Tk): The parent widget.
+            app: The main application instance.
+            channels: Analog input channels to analyse.
+            nperseg: FFT segment length; resolution is rate / nperseg Hz.
+            averaging: "exponential" (over ~num_averages segments) or "linear" (since start).
+            num_averages: Segments in the exponential average.
+            **kwargs: Additional keyword arguments for the tk.Frame initialization.
+        """
+        super().__init__(master, **kwargs)
+        self.app = app
+        self.custom_name = "Spectrum"
+        self.locked = False
+        self.board_num = 0
+        self.channels = sorted(set(channels))
+        self.frame_interval = 250  # ms; Welch averages move slowly
+        self.engine = get_engine(self.board_num)
+        self.nperseg = nperseg
+        self.averaging = averaging
+        self.num_averages = num_averages
+        self.make_spectrum()
+        self.subscription = None
+        self.update_plot_id = None
+        self.paused = False
+
+        self.peak_label = tk.Label(self, text=self.custom_name, font=('Helvetica', 14), height=2, width=44)
+        self.peak_label.pack()
+        try:
+            self.engine.open()
+        except Exception as e:
+            messagebox.showerror("Initialization Error", str(e))
+
+        self.init_plot()
+        self.run_scan()
+
+        self.bind("<Button-1>", on_drag_start)
+        self.bind("<B1-Motion>", on_drag_motion)
+        self.bind("<Button-3>", lambda event: right_click_menu(event, self))
+
+    def init_plot(self):
+        self.fig = Figure(figsize=(6, 4))
+        self.ax = self.fig.add_subplot()
+        self.ax.set_xscale("log")
+        self.ax.set_xlim(self.spectrum.freqs[1], self.spectrum.freqs[-1])
+        # From below the 2416's noise floor up to a full-scale +/-20 V sine
+        self.ax.set_ylim(-160, 30)
+        self.ax.set_xlabel("Frequency (Hz)")
+        self.ax.set_ylabel("dBV rms")
+        self.lines = [self.ax.plot([], [], lw=1, label=f"CH{chan}")[0] for chan in self.channels]
+        self.ax.legend(loc="upper right")
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+        self.canvas_widget = self.canvas.get_tk_widget()
+        self.canvas_widget.pack(fill=tk.BOTH, expand=True)
+        self.update_plot_id = self.after(self.frame_interval, self.update_plot)
+
+    def make_spectrum(self):
+        # Frequency bins and the ENBW follow the engine's scan rate
+        self.spectrum = WelchSpectrum(len(self.channels), self.engine.rate, self.nperseg, averaging=self.averaging,
+                                      num_averages=self.num_averages)
+
+    def update_plot(self):
+        try:
+            blocks = self.subscription.get_all() if self.subscription else []
+            if self.spectrum.rate != self.engine.rate:
+                # The Channel Table changed the scan rate: the bins and the average no longer fit
+                self.make_spectrum()
+                self.ax.set_xlim(self.spectrum.freqs[1], self.spectrum.freqs[-1])
+            segments = 0
+            for block in blocks:
+                if block.gap:
+                    # Segments cannot span the scans lost to a restart, so the average starts over
+                    self.spectrum.reset()
+                segments += self.spectrum.append(block.data)
+            if segments:
+                rms = self.spectrum.rms_spectrum()
+                freqs, display = log_decimate(self.spectrum.freqs, rms)
+                db = 20 * np.log10(np.maximum(display, 1e-12))
+                for line, values in zip(self.lines, db):
+                    line.set_data(freqs, values)
+                self.peak_label.config(text=self.peak_text(rms))
+                self.canvas.draw_idle()
+        except tk.TclError:
+            return
+        except Exception as e:
+            print(f"Error updating spectrum: {e}")
+        self.update_plot_id = self.after(self.frame_interval, self.update_plot)
+
+    def peak_text(self, rms):
+        # Strongest line above DC on the first channel, e.g. mains pickup
+        peak = int(np.argmax(rms[0, 1:])) + 1
+        return (f"{self.custom_name}: CH{self.channels[0]} peak {self.spectrum.freqs[peak]:.1f} Hz, "
+                f"{rms[0, peak]:.4g} V rms")
+
+    def run_scan(self):
+        try:
+            self.subscription = self.engine.subscribe(self.channels)
+        except Exception as e:
+            print(f"Error starting scan: {e}")
+
+    def pause(self):
+        if self.paused:
+            return
+        self.paused = True
+        if self.update_plot_id:
+            self.after_cancel(self.update_plot_id)
+            self.update_plot_id = None
+        # Unsubscribing never narrows the engine's running scan, so other
+        # subscribers (e.g. a recorder on another tab) keep every scan
+        if self.subscription:
+            self.subscription.close()
+            self.subscription = None
+
+    def resume(self):
+        if not self.paused:
+            return
+        self.paused = False
+        # Segments cannot span the gap, so the average starts over
+        self.spectrum.reset()
+        self.run_scan()
+        self.update_plot_id = self.after(self.frame_interval, self.update_plot)
+
+    def remove_widget(self):
+        if self.update_plot_id:
+            self.after_cancel(self.update_plot_id)
+        if self.subscription:
+            self.subscription.close()
+            self.subscription = None
+        self.destroy()
+
+    def rename_widget(self, new_name):
+        self.custom_name = new_name
+        self.peak_label.config(text=new_name)
+
+    rename = rename_widget
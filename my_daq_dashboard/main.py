@@ -1,4 +1,11 @@
+import os
 import tkinter as tk
+
+if os.environ.get("DAQ_SIMULATE"):
+    # Run the dashboard against the simulated USB-2416 instead of the UL driver
+    from utils import simulated_ul
+    simulated_ul.install()
+
 from dashboard.app import DashboardApp
 
 if __name__ == '__main__':
@@ -0,0 +1,226 @@
+"""Headless recorder for long unattended runs.
+
+Records the channels of a saved tab (or a channel table JSON) without
+starting the dashboard; nothing here imports tkinter or matplotlib.
+
+    python record.py preset1.json -o run.bin --duration 3600 --rotate-minutes 10
+    python -m my_daq_dashboard.record preset1.json -o run.csv --rate 50
+    python record.py preset1.json -o events.bin --rate 1000 --trigger edge --level 2.5 --pre-ms 50 --post-ms 200
+    python record.py preset1.json -o run.bin --publish 6341 --publish-decimation 10
+
+Ctrl+C stops the run cleanly: queued data is written, files are closed and
+a throughput/overrun summary is printed.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+# Imports are rooted at this directory, like main.py, so `python -m` works too
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+if os.environ.get("DAQ_SIMULATE") or "--simulate" in sys.argv:
+    from utils import simulated_ul
+    simulated_ul.install()
+
+from utils.acquisition import get_engine
+from utils.channel_config import DIGITAL_PORTS, ChannelConfig, ChannelTable
+from utils.recorders import RecordingWriter, RotatingBackend, make_backend
+from utils.seek_index import index_path
+from utils.tcp_publisher import StreamPublisher
+from utils.trigger import KINDS, SLOPES, TriggerCondition, TriggerStage
+
+
+def load_channel_table(file_path):
+    """Read a ChannelTable (and its rate, if saved) from a tab or channel JSON file.
+
+    A saved tab is a list of widget entries holding one "ChannelTable" entry;
+    a channel file is the ChannelTable dict itself. Tabs saved before the
+    channel table existed record the channels of their analog displays.
+    """
+    with open(file_path, 'r') as file:
+        config = json.load(file)
+    if isinstance(config, list):
+        entries = [entry for entry in config if entry.get("class") == "ChannelTable"]
+        if not entries:
+            channels = set()
+            for entry in config:
+                if entry.get("class") == "AnalogInDisplay":
+                    channels.update(entry.get("channels", [0]))
+            return ChannelTable([ChannelConfig(chan) for chan in sorted(channels)]), None
+        config = entries[0]
+    return ChannelTable.from_dict(config), config.get("rate")
+
+
+def save_events(output, stage):
+    """Write the trigger settings and event indices next to the recording."""
+    events_path = os.path.splitext(output)[0] + "_events.json"
+    with open(events_path, 'w') as file:
+        json.dump({"trigger": stage.condition.to_dict(), "rate": stage.rate, "pre": stage.pre, "post": stage.post,
+                   "events": stage.events}, file)
+    print(f"  {events_path}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Record analog input channels without the dashboard.")
+    parser.add_argument("config", help="saved tab or channel table JSON")
+    parser.add_argument("-o", "--output", required=True,
+                        help="output file; the extension picks the format (.csv, .bin, .i32, .h5)")
+    parser.add_argument("--rate", type=float, help="scan rate per channel in S/s (default: from the config, else 100)")
+    parser.add_argument("--duration", type=float, help="seconds to record (default: until Ctrl+C)")
+    parser.add_argument("--rotate-minutes", type=float, help="start a new file after this many minutes of data")
+    parser.add_argument("--rotate-mb", type=float, help="start a new file after this many MB")
+    parser.add_argument("--board", type=int, default=0, help="board number")
+    parser.add_argument("--status-interval", type=float, default=10.0, help="seconds between progress lines")
+    parser.add_argument("--simulate", action="store_true", help="record from the simulated USB-2416")
+    publish = parser.add_argument_group("publish", "stream to remote PyMoDAQ-protocol subscribers while recording")
+    publish.add_argument("--publish", type=int, metavar="PORT", help="TCP port to publish on (default: off)")
+    publish.add_argument("--publish-decimation", type=int, default=1,
+                         help="send every Nth scan unless a subscriber asks otherwise")
+    trigger = parser.add_argument_group("trigger", "record only the samples around events")
+    trigger.add_argument("--trigger", choices=KINDS, help="trigger condition (default: record everything)")
+    trigger.add_argument("--trigger-channel", type=int, help="channel to watch (default: the first one)")
+    trigger.add_argument("--trigger-port", choices=DIGITAL_PORTS, default=DIGITAL_PORTS[0],
+                         help="digital port a bit trigger watches; must be in the table's ports")
+    trigger.add_argument("--level", type=float, default=0.0, help="level/edge threshold")
+    trigger.add_argument("--slope", choices=SLOPES, default="rising", help="direction that fires")
+    trigger.add_argument("--low", type=float, help="window trigger lower bound")
+    trigger.add_argument("--high", type=float, help="window trigger upper bound")
+    trigger.add_argument("--bit", type=int, default=0, help="bit trigger bit number")
+    trigger.add_argument("--pre-ms", type=float, default=10.0, help="milliseconds kept before each event")
+    trigger.add_argument("--post-ms", type=float, default=10.0, help="milliseconds kept from each event on")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    table, saved_rate = load_channel_table(args.config)
+    rate = args.rate or saved_rate or 100
+    channels = table.channels
+    if not channels:
+        print(f"No channels in {args.config}")
+        return 1
+
+    plan = table.plan(rate)
+    print(plan.summary())
+    for error in plan.errors:
+        print(f"Error: {error}")
+    if plan.errors:
+        return 1
+
+    condition = None
+    if args.trigger:
+        trigger_channel = channels[0] if args.trigger_channel is None else args.trigger_channel
+        if args.trigger == "bit":
+            trigger_channel = args.trigger_port
+            if trigger_channel not in table.ports:
+                print(f"Error: port {trigger_channel} is not scanned; add it to the channel table's ports")
+                return 1
+        elif trigger_channel not in channels:
+            print(f"Error: trigger channel {trigger_channel} is not recorded")
+            return 1
+        try:
+            condition = TriggerCondition(args.trigger, trigger_channel, args.level, args.slope, args.low, args.high,
+                                         args.bit)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+
+    if args.rotate_minutes or args.rotate_mb:
+        backend = RotatingBackend(args.output, channels, rate,
+                                  max_seconds=args.rotate_minutes * 60 if args.rotate_minutes else None,
+                                  max_bytes=int(args.rotate_mb * 1e6) if args.rotate_mb else None)
+    else:
+        backend = make_backend(args.output, channels, rate)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    engine = get_engine(args.board)
+    engine.configure(table, rate)
+    subscription = None
+    writer = None
+    publisher = None
+    start = time.monotonic()
+    try:
+        try:
+            device = engine.open()
+        except Exception as e:
+            print(f"Initialization Error: {e}")
+            return 1
+        print(f"Recording {len(channels)} channels from {device.product_name} to {args.output}")
+        subscription = engine.subscribe(channels, maxsize=1024)
+        source = subscription
+        if condition:
+            source = TriggerStage(subscription, condition, rate, args.pre_ms / 1000, args.post_ms / 1000)
+        writer = RecordingWriter(source, backend)
+        writer.start()
+        if args.publish is not None:
+            publisher = StreamPublisher(engine, channels, args.publish, decimation=args.publish_decimation)
+            try:
+                publisher.start()
+                print(f"Publishing on port {publisher.port}")
+            except Exception as e:
+                print(f"Error starting publisher: {e}")
+                publisher = None
+
+        next_status = start + args.status_interval
+        while not stop.wait(0.2):
+            now = time.monotonic()
+            if args.duration and now - start >= args.duration:
+                break
+            if writer.error:
+                break
+            if now >= next_status:
+                status = f"{now - start:8.0f} s  {writer.status_text()}, overruns {engine.overruns}"
+                if publisher:
+                    status += f"; {publisher.status_text()}"
+                print(status)
+                next_status += args.status_interval
+    finally:
+        # Stop producing first, then let the writer drain and close the file
+        overruns = engine.overruns
+        clock = engine.clock
+        if publisher:
+            publisher.stop()
+        if subscription:
+            subscription.close()
+        if writer:
+            writer.stop(timeout=30)
+        engine.close()
+        elapsed = time.monotonic() - start
+
+    if writer is None:
+        return 1
+    scans = writer.samples_written // len(channels)
+    print(f"Recorded {scans} scans ({scans / rate:.1f} s of data) in {elapsed:.1f} s")
+    if condition:
+        print(f"Trigger events: {len(source.events)}, {source.record_length} scans each, "
+              f"{writer.bytes_written / 1e6:.3f} MB")
+    else:
+        print(f"Achieved {scans / elapsed:.1f} S/s/ch of {rate:g} requested, "
+              f"{writer.bytes_written / 1e6:.3f} MB at {writer.mb_per_s:.3f} MB/s")
+    print(f"Overruns: {overruns}, dropped blocks: {subscription.dropped}")
+    for scan, lost in writer.gaps:
+        print(f"Gap marker (NaN row) after scan {scan}: board reconnected, ~{lost} scans lost")
+    if condition:
+        save_events(args.output, source)
+    if writer.timing.t0 is not None:
+        print(f"Sample clock drift {clock.drift_ppm:+.1f} ppm vs host; {len(writer.timing.corrections)} "
+              f"timing corrections in {os.path.splitext(args.output)[0]}_timing.json")
+    for path in getattr(backend, "paths", [args.output]):
+        index = index_path(path)
+        print(f"  {path}" + (f" (seek index {index})" if os.path.exists(index) else ""))
+    if writer.error:
+        print(f"Writer error: {writer.error}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,20 @@
 # scan_to_file.py
 
+import os
 from ctypes import c_double, cast, POINTER, addressof, sizeof
-from time import sleep
+from time import sleep, monotonic
+import numpy as np
 from mcculw import ul
 from mcculw.enums import ScanOptions, FunctionType, Status
 from mcculw.device_info import DaqDeviceInfo
+from utils.recorders import write_binary_header
+from utils.ring_buffer import COUNT_MODULUS
+from utils.seek_index import build_index
+
+# Streaming mode tuning: aim for ~10 copies per second, and grow the output
+# file by at least this many bytes at a time
+TARGET_CHUNK_SECONDS = 0.1
+FILE_GROW_BYTES = 64 * 1024 * 1024
 
 class ScanToFile:
     def __init__(self, board_num, rate, file_name, low_chan=0, high_chan=3, buffer_size_seconds=2, num_buffers_to_write=5):
@@ -123,3 +133,139 @@ class ScanToFile:
             if self.memhandle:
                 ul.win_buf_free(self.memhandle)
             ul.release_daq_device(self.board_num)
+
+    def plan_stream(self, ul_buffer_count, num_chans):
+        """Chunk size (in samples) and poll interval for the streaming mode.
+
+        Both follow the aggregate rate: a chunk is about TARGET_CHUNK_SECONDS
+        of whole scans, capped at a quarter of the UL buffer so there is
+        always headroom, and the loop polls twice per chunk.
+        """
+        scans_per_chunk = max(int(self.rate * TARGET_CHUNK_SECONDS), 1)
+        scans_per_chunk = min(scans_per_chunk, max(ul_buffer_count // num_chans // 4, 1))
+        chunk_size = scans_per_chunk * num_chans
+        poll_interval = max(scans_per_chunk / self.rate / 2, 0.001)
+        return chunk_size, poll_interval
+
+    def run_stream(self):
+        """Stream the scan into a memory-mapped float64 file.
+
+        UL data is copied with scaled_win_buf_to_array directly into the
+        mapped file, so there is no per-sample Python work and no text
+        conversion. The file is written as <file_name>.bin with a JSON
+        header alongside, and trimmed to the exact size at the end, when
+        its seek index (<file_name>_index.npz) is built.
+        """
+        memmap = None
+        target = None
+        file_path = os.path.splitext(self.file_name)[0] + '.bin'
+        try:
+            daq_dev_info = self.validate_device()
+            ai_info = daq_dev_info.get_ai_info()
+            self.high_chan = min(self.high_chan, ai_info.num_chans - 1)
+            num_chans = self.high_chan - self.low_chan + 1
+            ul_buffer_count, points_to_write, _ = self.configure_scan(ai_info)
+            chunk_size, poll_interval = self.plan_stream(ul_buffer_count, num_chans)
+            ai_range = ai_info.supported_ranges[0]
+            scan_options = (ScanOptions.BACKGROUND | ScanOptions.CONTINUOUS | ScanOptions.SCALEDATA)
+
+            self.memhandle = ul.scaled_win_buf_alloc(ul_buffer_count)
+            if not self.memhandle:
+                raise Exception('Failed to allocate memory')
+
+            grow_points = max(FILE_GROW_BYTES // 8, self.rate * num_chans * 10)
+            grow_points -= grow_points % num_chans
+            capacity = min(grow_points, points_to_write)
+            with open(file_path, 'wb') as f:
+                f.truncate(capacity * 8)
+            memmap = np.memmap(file_path, dtype=np.float64, mode='r+', shape=(capacity,))
+            write_binary_header(file_path, range(self.low_chan, self.high_chan + 1), self.rate)
+
+            actual_rate = ul.a_in_scan(self.board_num, self.low_chan, self.high_chan, ul_buffer_count, self.rate,
+                                       ai_range, self.memhandle, scan_options)
+            print(f'Streaming to {file_path} in chunks of {chunk_size} samples, polling every {poll_interval * 1000:.1f} ms')
+
+            start_time = monotonic()
+            prev_count = 0
+            prev_index = 0
+            max_backlog = 0
+            overrun = False
+            while prev_count < points_to_write:
+                status, curr_count, _ = ul.get_status(self.board_num, FunctionType.AIFUNCTION)
+                # curr_count is a 32-bit counter in the UL and wraps on long scans
+                backlog = (curr_count - prev_count) % COUNT_MODULUS
+                max_backlog = max(max_backlog, backlog)
+                if backlog > ul_buffer_count:
+                    overrun = True
+                    print('A buffer overrun occurred')
+                    break
+                if status == Status.IDLE:
+                    break
+
+                count = min(backlog - backlog % chunk_size, points_to_write - prev_count)
+                if count <= 0:
+                    sleep(poll_interval)
+                    continue
+
+                if prev_count + count > capacity:
+                    # Drop every reference to the old map before resizing the file
+                    memmap.flush()
+                    memmap = target = None
+                    capacity = min(capacity + grow_points, points_to_write)
+                    with open(file_path, 'r+b') as f:
+                        f.truncate(capacity * 8)
+                    memmap = np.memmap(file_path, dtype=np.float64, mode='r+', shape=(capacity,))
+
+                # Copy straight from the UL buffer into the mapped file, in
+                # two pieces when the chunk wraps around the end of the buffer
+                first_chunk_size = min(count, ul_buffer_count - prev_index)
+                target = memmap[prev_count:prev_count + count]
+                ul.scaled_win_buf_to_array(self.memhandle, target.ctypes.data_as(POINTER(c_double)),
+                                           prev_index, first_chunk_size)
+                if count > first_chunk_size:
+                    ul.scaled_win_buf_to_array(self.memhandle,
+                                               target[first_chunk_size:].ctypes.data_as(POINTER(c_double)),
+                                               0, count - first_chunk_size)
+
+                _, curr_count, _ = ul.get_status(self.board_num, FunctionType.AIFUNCTION)
+                if (curr_count - prev_count) % COUNT_MODULUS > ul_buffer_count:
+                    overrun = True
+                    print('A buffer overrun occurred')
+                    break
+
+                prev_count += count
+                prev_index = (prev_index + count) % ul_buffer_count
+
+            elapsed = monotonic() - start_time
+            ul.stop_background(self.board_num, FunctionType.AIFUNCTION)
+
+            memmap.flush()
+            memmap = target = None
+            with open(file_path, 'r+b') as f:
+                f.truncate(prev_count * 8)
+
+            achieved_rate = prev_count / num_chans / elapsed if elapsed > 0 else 0
+            print(f'Wrote {prev_count} samples in {elapsed:.2f} s')
+            print(f'Requested rate: {self.rate} Hz, device rate: {actual_rate} Hz, achieved: {achieved_rate:.1f} Hz per channel')
+            print(f'Peak backlog: {max_backlog} of {ul_buffer_count} samples '
+                  f'({100.0 * max_backlog / ul_buffer_count:.1f}% of the buffer)' + (' - OVERRUN' if overrun else ''))
+            if prev_count:
+                print(f'Seek index: {build_index(file_path)}')
+            return {
+                'samples': prev_count,
+                'requested_rate': self.rate,
+                'achieved_rate': achieved_rate,
+                'peak_backlog': max_backlog / ul_buffer_count,
+                'overrun': overrun,
+            }
+        except Exception as e:
+            print('\n', e)
+        finally:
+            if memmap is not None:
+                memmap.flush()
+                memmap = target = None
+            print('Done')
+            if self.memhandle:
+                ul.win_buf_free(self.memhandle)
+                self.memhandle = None
+            ul.release_daq_device(self.board_num)
@@ -0,0 +1,553 @@
+# acquisition.py
+import queue
+import threading
+import time
+from ctypes import cast, POINTER, c_double
+
+import numpy as np
+from mcculw import ul
+from mcculw.enums import ScanOptions, FunctionType, Status, ULRange, ChannelType
+from .channel_config import ChannelTable
+from .clock_sync import SampleClock
+from .device_utils import find_device, initialize_device, set_channel_settings
+from .ring_buffer import RingBufferReader
+from .thermocouple import tc_to_celsius
+
+
+class DataBlock:
+    """A de-interleaved block of samples, one row per channel.
+
+    `gap` is the number of scans lost just before this block, when the
+    scan was restarted (the board dropped off USB and came back, an error,
+    or a wider channel span); 0 otherwise. `t0` is the
+    time.time() time of the first scan and `dt` the scan period, both from
+    the engine's SampleClock (None for blocks built elsewhere). `io` maps
+    the table's sync_keys to their int64 values for the same scans, when
+    the scan carries digital ports or counters.
+    """
+
+    def __init__(self, channels, data, start_index, gap=0, t0=None, dt=None, io=None):
+        self.channels = channels
+        self.data = data
+        self.start_index = start_index
+        self.gap = gap
+        self.t0 = t0
+        self.dt = dt
+        self.io = io or {}
+
+    def channel(self, chan):
+        return self.data[self.channels.index(chan)]
+
+    def port(self, name):
+        """Values of digital port `name` (a DigitalPortType name) in this block's scans."""
+        for (kind, num), values in self.io.items():
+            if kind == "port" and num.name == name:
+                return values
+        raise KeyError(f"Port {name} is not scanned with the analog inputs")
+
+
+class BlockQueue:
+    """Bounded queue of DataBlocks for one consumer.
+
+    When the consumer falls behind, the oldest block is dropped so the
+    producer never blocks on a slow widget or writer. `error` is set when
+    the producer gave up, so no more blocks will come.
+    """
+
+    def __init__(self, maxsize=32):
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+        self.error = None
+
+    def put(self, block):
+        while True:
+            try:
+                self.queue.put_nowait(block)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_all(self):
+        blocks = []
+        while True:
+            try:
+                blocks.append(self.queue.get_nowait())
+            except queue.Empty:
+                return blocks
+
+    @property
+    def depth(self):
+        return self.queue.qsize()
+
+    @property
+    def maxsize(self):
+        return self.queue.maxsize
+
+
+class Subscription(BlockQueue):
+    """BlockQueue fed by an AcquisitionEngine with a fixed set of channels."""
+
+    def __init__(self, engine, channels, maxsize=32):
+        super().__init__(maxsize)
+        self.engine = engine
+        self.channels = tuple(sorted(set(channels)))
+
+    def close(self):
+        self.engine.unsubscribe(self)
+
+
+class AcquisitionEngine:
+    """Owns one board and runs a single continuous background scan.
+
+    The scan covers the span of every channel requested by the current
+    subscribers. It only restarts to take in a channel outside its span (or
+    for configure()); unsubscribing never narrows a running scan, so the
+    remaining subscribers see no interruption. A restart publishes what the
+    old scan still holds and keeps scan indices running, with the scans
+    missed meanwhile in the next block's `gap`. Each new chunk of the UL buffer is de-interleaved once and
+    the rows each subscriber asked for are pushed to its queue. Per-channel
+    settings come from `channel_table`.
+
+    When the table has thermocouples, the scan runs through daq_in_scan
+    with the CJC sensor as an extra entry in every scan, and the raw EMF
+    rows are converted to degC in one vectorized pass per chunk. Those
+    channels then publish degC instead of volts.
+
+    The table's digital ports and counters (`sync_keys`) also go through
+    daq_in_scan, after the analog entries, so they are sampled on the same
+    clock. Their values are handed to `io_listeners` as
+    callback(key, values, timestamps), one call per key and chunk, with
+    each sample stamped at its scan's time.monotonic() time, and ride along
+    in every DataBlock's `io`, so consumers such as a bit trigger see them
+    next to the analog samples of the same scans.
+
+    Scan times come from `clock`, a SampleClock fed with the completed-scan
+    count of every get_status poll, so they follow the board's sample clock
+    rather than the time a chunk happened to be read.
+
+    If the board drops off USB mid-scan, the engine thread waits for the
+    same board (by unique id) to reappear in the inventory, recreates it
+    and restarts the scan. Subscriptions stay open throughout; the first
+    block afterwards carries the estimated number of lost scans in `gap`,
+    and scan indices continue as if the lost scans had been read.
+
+    Other errors (the board is still listed) restart the scan the same way,
+    after `reconnect_interval`, up to `max_restarts` times in a row. Then
+    the thread gives up: `error` is set on the engine and on every
+    subscription, and `connected` is cleared. A new subscribe() starts over.
+    """
+
+    def __init__(self, board_num, rate=100, ai_range=ULRange.BIP10VOLTS, buffer_seconds=2, poll_interval=0.05,
+                 reconnect_interval=1.0, max_restarts=5):
+        self.board_num = board_num
+        self.rate = rate
+        self.ai_range = ai_range
+        self.buffer_seconds = buffer_seconds
+        self.poll_interval = poll_interval
+        self.reconnect_interval = reconnect_interval
+        self.max_restarts = max_restarts
+        self.scan_options = ScanOptions.BACKGROUND | ScanOptions.CONTINUOUS | ScanOptions.SCALEDATA
+
+        self.device = None
+        self.error = None
+        self.subscriptions = []
+        self.low_chan = None
+        self.high_chan = None
+        self.actual_rate = None
+        self.channel_table = ChannelTable.single(0)
+        self.plan = None
+        self.cjc_temperature = None
+        self.io_listeners = []
+        self.scan_start = None
+        self.clock = None
+        self.connected = False
+        self.disconnects = 0
+
+        self._lock = threading.Lock()
+        self._restart = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._memhandle = None
+        self._reader = None
+        self._ul_buffer_count = 0
+        self._reconfigure = False
+        self._function_type = FunctionType.AIFUNCTION
+        self._thermocouples = []
+        self._cjc_row = None
+        self._io_rows = []
+        self._index_offset = 0
+        self._resume_index = None
+        self._pending_gap = 0
+
+    def open(self):
+        if self.device is None:
+            self.device = initialize_device(self.board_num)
+            set_channel_settings(self.board_num, self.channel_table)
+            self.connected = True
+        return self.device
+
+    def configure(self, table, rate=None):
+        """Apply a new ChannelTable (and optionally scan rate), restarting a running scan.
+
+        The board itself is only reconfigured by the engine thread, between
+        stopping the old scan and starting the new one.
+        """
+        with self._lock:
+            self.channel_table = table
+            if rate is not None:
+                self.rate = rate
+            self._reconfigure = True
+            self._restart.set()
+        return table.plan(self.rate)
+
+    def subscribe(self, channels, maxsize=32):
+        sub = Subscription(self, channels, maxsize)
+        with self._lock:
+            self.subscriptions.append(sub)
+            self._restart.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                if self.error is not None:
+                    self.error = None
+                    self.connected = self.device is not None
+                    for other in self.subscriptions:
+                        other.error = None
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        return sub
+
+    def add_io_listener(self, callback):
+        with self._lock:
+            self.io_listeners.append(callback)
+
+    def remove_io_listener(self, callback):
+        with self._lock:
+            if callback in self.io_listeners:
+                self.io_listeners.remove(callback)
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            if sub in self.subscriptions:
+                self.subscriptions.remove(sub)
+                self._restart.set()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self.device is not None:
+            try:
+                ul.release_daq_device(self.board_num)
+            except Exception as e:
+                print(f"Error releasing device: {e}")
+            self.device = None
+
+    @property
+    def overruns(self):
+        return self._reader.overruns if self._reader else 0
+
+    def _channel_span(self):
+        channels = set()
+        for sub in self.subscriptions:
+            channels.update(sub.channels)
+        if not channels:
+            return None, None
+        return min(channels), max(channels)
+
+    def _start_scan(self, low_chan, high_chan):
+        set_channel_settings(self.board_num, self.channel_table, low_chan, high_chan)
+        configs = self.channel_table.span(low_chan, high_chan)
+        self._thermocouples = [(row, config.tc_type) for row, config in enumerate(configs) if config.tc_type]
+        io_entries = self._io_entries(len(configs) + (1 if self._thermocouples else 0))
+        num_entries = len(configs) + (1 if self._thermocouples else 0) + len(io_entries)
+        points_per_channel = max(int(self.rate * self.buffer_seconds), 10)
+        self._ul_buffer_count = points_per_channel * num_entries
+
+        self._memhandle = ul.scaled_win_buf_alloc(self._ul_buffer_count)
+        if not self._memhandle:
+            raise Exception("Failed to allocate memory")
+        ctypes_array = cast(self._memhandle, POINTER(c_double))
+        buffer = np.ctypeslib.as_array(ctypes_array, shape=(self._ul_buffer_count,))
+        self._reader = RingBufferReader(buffer, num_entries)
+
+        self.plan = self.channel_table.plan(self.rate, low_chan, high_chan)
+        if self.plan.overrun:
+            print(f"Warning: {self.plan.summary()}")
+        if self._thermocouples or io_entries:
+            # The CJC sensor rides along after the analog entries, then the digital/counter entries
+            self._function_type = FunctionType.DAQIFUNCTION
+            chan_list = [config.channel for config in configs]
+            chan_types = [ChannelType.ANALOG] * len(configs)
+            gains = [config.ul_range for config in configs]
+            if self._thermocouples:
+                self._cjc_row = len(configs)
+                chan_list.append(0)
+                chan_types.append(ChannelType.CJC)
+                gains.append(self.ai_range)
+            else:
+                self._cjc_row = None
+            for chan, chan_type in io_entries:
+                chan_list.append(chan)
+                chan_types.append(chan_type)
+                gains.append(ULRange.NOTUSED)
+            result = ul.daq_in_scan(self.board_num, chan_list, chan_types, gains, len(chan_list), int(self.rate),
+                                    0, self._ul_buffer_count, self._memhandle, self.scan_options)
+            self.actual_rate = result.actual_rate
+        else:
+            self._function_type = FunctionType.AIFUNCTION
+            self._cjc_row = None
+            # Per-channel ranges go through the gain queue; a_in_scan's range is then ignored
+            ul.a_load_queue(self.board_num, [config.channel for config in configs],
+                            [config.ul_range for config in configs], len(configs))
+            self.actual_rate = ul.a_in_scan(self.board_num, low_chan, high_chan, self._ul_buffer_count, self.rate,
+                                            self.ai_range, self._memhandle, self.scan_options)
+        self.low_chan = low_chan
+        self.high_chan = high_chan
+        # Sample timestamps count from here; the first scan is clocked right after the start call
+        self.scan_start = time.monotonic()
+        self.clock = SampleClock(self.actual_rate, self.scan_start)
+        # Indices restart at 0 with each scan, unless it resumes one cut off by a disconnect;
+        # _switch_scan carries them on across span changes
+        self._index_offset = self._resume_index or 0
+        self._resume_index = None
+
+    def _io_entries(self, first_row):
+        """daq_in_scan entries for the table's ports and counters; fills self._io_rows."""
+        entries = []
+        self._io_rows = []
+        for key in self.channel_table.sync_keys:
+            kind, num = key
+            row = first_row + len(entries)
+            if kind == "port":
+                entries.append((num, ChannelType.DIGITAL8))
+                self._io_rows.append((key, [row]))
+            else:
+                # A 32-bit counter is read as two 16-bit halves, low word first
+                entries += [(num, ChannelType.CTR32LOW), (num, ChannelType.CTR32HIGH)]
+                self._io_rows.append((key, [row, row + 1]))
+        return entries
+
+    def _stop_scan(self):
+        if self._memhandle is None:
+            return
+        try:
+            ul.stop_background(self.board_num, self._function_type)
+        except Exception as e:
+            print(f"Error stopping scan: {e}")
+        ul.win_buf_free(self._memhandle)
+        self._memhandle = None
+        self._reader = None
+        self.low_chan = self.high_chan = None
+
+    def _run(self):
+        failures = 0
+        try:
+            while not self._stop.is_set():
+                try:
+                    if self._restart.is_set():
+                        with self._lock:
+                            self._restart.clear()
+                            low_chan, high_chan = self._channel_span()
+                            if low_chan is not None and self._reader is not None and not self._reconfigure:
+                                # Never narrow a running scan under the remaining subscribers;
+                                # only a channel outside it needs a restart
+                                low_chan = min(low_chan, self.low_chan)
+                                high_chan = max(high_chan, self.high_chan)
+                            restart = (low_chan, high_chan) != (self.low_chan, self.high_chan) or self._reconfigure
+                        if restart and not self._switch_scan(low_chan, high_chan):
+                            break
+
+                    status = self._poll()
+                    if status == Status.IDLE:
+                        break
+                    failures = 0
+                    time.sleep(self.poll_interval)
+                except Exception as e:
+                    print(f"Acquisition error: {e}")
+                    if self._reconnect() or self._stop.is_set():
+                        continue
+                    failures += 1
+                    if failures > self.max_restarts:
+                        self._fail(e)
+                        break
+                    if not self._restart_scan():
+                        break
+        finally:
+            with self._lock:
+                self._stop_scan()
+
+    def _poll(self):
+        """Read the scans completed since the last poll and publish them; returns the scan status."""
+        before = time.monotonic()
+        status, curr_count, curr_index = ul.get_status(self.board_num, self._function_type)
+        # The count was latched somewhere inside the USB transaction; take its middle
+        stamp = (before + time.monotonic()) / 2
+        start_index = self._index_offset + self._reader.scan_count
+        scans = self._reader.read(curr_count, curr_index)
+        self.clock.observe(self._reader.scan_count, stamp)
+        if len(scans):
+            _, curr_count, _ = ul.get_status(self.board_num, self._function_type)
+            if not self._reader.overwritten(curr_count):
+                self._publish(scans, start_index)
+        return status
+
+    def _switch_scan(self, low_chan, high_chan):
+        """Replace the running scan with one over low_chan..high_chan; False when none is left to run.
+
+        Whatever the old scan still holds is published first. Scan indices
+        then run on across the switch, and the scans missed while the board
+        was restarted go to the next block's `gap`, as after a disconnect.
+        """
+        lost_index = None
+        if self._reader is not None:
+            self._poll()
+            lost_index = self._index_offset + self._reader.scan_count
+        lost_at = time.monotonic()
+        with self._lock:
+            self._reconfigure = False
+            self._stop_scan()
+            if low_chan is None:
+                self._thread = None
+                return False
+            self._start_scan(low_chan, high_chan)
+            if lost_index is not None:
+                missed = max(int(round((self.scan_start - lost_at) * self.rate)), 0)
+                self._index_offset = lost_index + missed
+                self._pending_gap = missed
+        return True
+
+    def _reconnect(self):
+        """Wait for a board that dropped off USB to come back, then restart the scan.
+
+        Runs on the engine thread, so the inventory rescans never block the
+        GUI. Returns False when the error was not a disconnect (the board is
+        still listed) or the engine was closed while waiting.
+        """
+        lost_at = time.monotonic()
+        lost_index = self._index_offset + (self._reader.scan_count if self._reader else 0)
+        unique_id = getattr(self.device, "unique_id", None)
+        if self.device is None or find_device(unique_id, refresh=True) is not None:
+            return False
+        with self._lock:
+            self._stop_scan()
+        try:
+            ul.release_daq_device(self.board_num)
+        except Exception:
+            pass
+        self.device = None
+        self.connected = False
+        self.disconnects += 1
+        print(f"Board {self.board_num} disconnected; waiting for {unique_id} to come back")
+
+        while not self._stop.wait(self.reconnect_interval):
+            device = find_device(unique_id, refresh=True)
+            if device is None:
+                continue
+            try:
+                ul.create_daq_device(self.board_num, device)
+                set_channel_settings(self.board_num, self.channel_table)
+            except Exception as e:
+                print(f"Error reconnecting board {self.board_num}: {e}")
+                try:
+                    ul.release_daq_device(self.board_num)
+                except Exception:
+                    pass
+                continue
+            # The scans missed while unplugged are estimated from the wall clock
+            missed = int(round((time.monotonic() - lost_at) * self.rate))
+            with self._lock:
+                self.device = device
+                self.connected = True
+                self._resume_index = lost_index + missed
+                self._pending_gap = missed
+                self._reconfigure = True
+                self._restart.set()
+            print(f"Board {self.board_num} reconnected after {time.monotonic() - lost_at:.1f} s")
+            return True
+        return False
+
+    def _restart_scan(self):
+        """Stop the scan and start it again after `reconnect_interval`; False if closed meanwhile."""
+        lost_at = time.monotonic()
+        lost_index = self._index_offset + (self._reader.scan_count if self._reader else 0)
+        with self._lock:
+            self._stop_scan()
+        if self._stop.wait(self.reconnect_interval):
+            return False
+        missed = int(round((time.monotonic() - lost_at) * self.rate))
+        with self._lock:
+            self._resume_index = lost_index + missed
+            self._pending_gap = missed
+            self._reconfigure = True
+            self._restart.set()
+        print(f"Restarting the scan on board {self.board_num}")
+        return True
+
+    def _fail(self, error):
+        """Give up after repeated errors and tell every subscriber."""
+        self.error = f"Acquisition stopped after {self.max_restarts} restarts: {error}"
+        self.connected = False
+        print(self.error)
+        with self._lock:
+            self._stop_scan()
+            for sub in self.subscriptions:
+                sub.error = self.error
+
+    def _publish(self, scans, start_index):
+        # scans is the reader's scratch view, shape (n, num_entries); each
+        # subscriber gets its own copy of just the rows it asked for
+        data = scans.T
+        if self._thermocouples:
+            # Converting in place is safe: the scratch is refilled on the next read
+            cjc = data[self._cjc_row]
+            self.cjc_temperature = float(cjc[-1])
+            for row, tc_type in self._thermocouples:
+                data[row] = tc_to_celsius(tc_type, data[row], cjc)
+        with self._lock:
+            subscriptions = list(self.subscriptions)
+            listeners = list(self.io_listeners)
+        # The clock counts scans of this scan only; start_index also counts earlier ones
+        first = start_index - self._index_offset
+        t0 = float(self.clock.epoch(first))
+        io = {}
+        for key, rows in self._io_rows:
+            if len(rows) == 1:
+                io[key] = data[rows[0]].astype(np.int64)
+            else:
+                io[key] = data[rows[1]].astype(np.int64) * 65536 + data[rows[0]].astype(np.int64)
+        if io and listeners:
+            timestamps = self.clock.time_of(first + np.arange(data.shape[1]))
+            for key, values in io.items():
+                for callback in listeners:
+                    try:
+                        callback(key, values, timestamps)
+                    except Exception as e:
+                        print(f"Error delivering {key}: {e}")
+        gap, self._pending_gap = self._pending_gap, 0
+        for sub in subscriptions:
+            if sub.channels[0] < self.low_chan or sub.channels[-1] > self.high_chan:
+                # Subscribed since this scan started; it waits for the wider one
+                continue
+            rows = [chan - self.low_chan for chan in sub.channels]
+            sub.put(DataBlock(sub.channels, data[rows], start_index, gap, t0, self.clock.dt, io))
+
+
+_engines = {}
+
+
+def get_engine(board_num, **kwargs):
+    """Return the shared AcquisitionEngine for board_num, creating it once."""
+    if board_num not in _engines:
+        _engines[board_num] = AcquisitionEngine(board_num, **kwargs)
+    return _engines[board_num]
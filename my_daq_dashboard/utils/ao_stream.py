@@ -0,0 +1,219 @@
+# ao_stream.py
+import threading
+from ctypes import cast, POINTER, c_double
+
+import numpy as np
+from mcculw import ul
+from mcculw.enums import ScanOptions, FunctionType, Status, ULRange, InfoType, BoardInfo
+from .ring_buffer import COUNT_MODULUS
+
+TABLE_SIZE = 4096
+
+
+def sine_table(size=TABLE_SIZE):
+    return np.sin(2 * np.pi * np.arange(size) / size)
+
+
+def square_table(size=TABLE_SIZE, duty=0.5):
+    return np.where(np.arange(size) < duty * size, 1.0, -1.0)
+
+
+def ramp_table(size=TABLE_SIZE):
+    return np.linspace(-1.0, 1.0, size, endpoint=False)
+
+
+def triangle_table(size=TABLE_SIZE):
+    return 1.0 - 2.0 * np.abs(ramp_table(size))
+
+
+TABLES = {
+    "Sine": sine_table,
+    "Square": square_table,
+    "Ramp": ramp_table,
+    "Triangle": triangle_table,
+}
+
+
+class Waveform:
+    """A periodic output: one cycle of `table` (normalised to +/-1) played at
+    `frequency` Hz, scaled by `amplitude` and shifted by `offset` volts.
+
+    Any array works as an arbitrary table. The phase carries over between
+    render() calls, so frequency or amplitude changes are glitch-free.
+    """
+
+    def __init__(self, table, frequency=1.0, amplitude=1.0, offset=0.0):
+        self.table = np.asarray(table, dtype=np.float64)
+        self.frequency = frequency
+        self.amplitude = amplitude
+        self.offset = offset
+        self.phase = 0.0
+        # 0..n-1 and the integer table positions, kept for the last render length
+        self._ramp = np.empty(0)
+        self._positions = np.empty(0, dtype=np.intp)
+
+    @classmethod
+    def named(cls, name, frequency=1.0, amplitude=1.0, offset=0.0):
+        return cls(TABLES[name](), frequency, amplitude, offset)
+
+    def render(self, out, rate, index=None):
+        """Fill `out` with the next len(out) samples at `rate` samples/s.
+
+        `index` is an optional preallocated float array of the same length.
+        With it, and the same length every call, steady-state rendering
+        allocates nothing.
+        """
+        n = len(out)
+        size = len(self.table)
+        step = self.frequency * size / rate
+        if index is None:
+            index = np.empty(n)
+        if len(self._ramp) != n:
+            self._ramp = np.arange(n, dtype=np.float64)
+            self._positions = np.empty(n, dtype=np.intp)
+        np.multiply(self._ramp, step, out=index)
+        index += self.phase
+        np.mod(index, size, out=index)
+        np.copyto(self._positions, index, casting='unsafe')
+        # mode='raise' would buffer a copy of out; the positions are in range anyway
+        np.take(self.table, self._positions, out=out, mode='wrap')
+        out *= self.amplitude
+        out += self.offset
+        self.phase = (self.phase + step * n) % size
+        return out
+
+
+class AnalogOutputStream:
+    """Continuous waveform output on the analog outputs of a -4AO board.
+
+    A circular a_out_scan buffer is split in two halves. The background
+    thread watches get_status' curr_index, and as soon as the board starts
+    playing one half it renders the next stretch of every channel's
+    waveform into the other one. Work per refill is fixed, so CPU use does
+    not grow with the output duration, and waveform changes are heard
+    within one half buffer without stopping the scan.
+    """
+
+    def __init__(self, board_num, rate=1000, half_seconds=0.25, ao_range=ULRange.BIP10VOLTS):
+        self.board_num = board_num
+        self.rate = rate
+        self.half_seconds = half_seconds
+        self.ao_range = ao_range
+        self.waveforms = {}
+        self.num_chans = 0
+        self.actual_rate = None
+        self.underruns = 0
+        self.refills = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._memhandle = None
+        self._frames = None
+        self._scratch = None
+        self._index = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_waveform(self, channel, waveform):
+        """Play `waveform` on `channel` (None holds it at 0 V), starting the scan if needed."""
+        with self._lock:
+            if waveform is None:
+                self.waveforms.pop(channel, None)
+            else:
+                self.waveforms[channel] = waveform
+        if waveform is not None and not self.running:
+            self.start()
+
+    def update(self, channel, **settings):
+        """Change frequency, amplitude and/or offset of a playing channel."""
+        with self._lock:
+            waveform = self.waveforms.get(channel)
+            if waveform is not None:
+                for name, value in settings.items():
+                    setattr(waveform, name, value)
+
+    def start(self):
+        self.num_chans = ul.get_config(InfoType.BOARDINFO, self.board_num, 0, BoardInfo.NUMDACHANS)
+        if self.num_chans <= 0:
+            raise Exception("This board has no analog outputs")
+        half_frames = max(int(self.rate * self.half_seconds), 1)
+        count = 2 * half_frames * self.num_chans
+
+        self._memhandle = ul.scaled_win_buf_alloc(count)
+        if not self._memhandle:
+            raise Exception("Failed to allocate memory")
+        buffer = np.ctypeslib.as_array(cast(self._memhandle, POINTER(c_double)), shape=(count,))
+        self._frames = buffer.reshape(2, half_frames, self.num_chans)
+        self._scratch = np.empty(half_frames)
+        self._index = np.empty(half_frames)
+        self._fill(0)
+        self._fill(1)
+
+        options = ScanOptions.BACKGROUND | ScanOptions.CONTINUOUS | ScanOptions.SCALEDATA
+        self.actual_rate = ul.a_out_scan(self.board_num, 0, self.num_chans - 1, count, self.rate, self.ao_range,
+                                         self._memhandle, options)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(count,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _fill(self, half):
+        frames = self._frames[half]
+        with self._lock:
+            for chan in range(self.num_chans):
+                waveform = self.waveforms.get(chan)
+                if waveform is None:
+                    frames[:, chan] = 0.0
+                    continue
+                waveform.render(self._scratch, self.rate, self._index)
+                np.clip(self._scratch, self.ao_range.range_min, self.ao_range.range_max, out=self._scratch)
+                frames[:, chan] = self._scratch
+        self.refills += 1
+
+    def _run(self, count):
+        half_count = count // 2
+        # Both halves start full; half 1 holds the newest data
+        last_filled = 1
+        last_count = 0
+        try:
+            while not self._stop.wait(self.half_seconds / 4):
+                status, curr_count, curr_index = ul.get_status(self.board_num, FunctionType.AOFUNCTION)
+                if status == Status.IDLE:
+                    break
+                if (curr_count - last_count) % COUNT_MODULUS > count:
+                    # The board lapped a half we never refilled: it replayed stale samples
+                    self.underruns += 1
+                if curr_index < 0:
+                    continue
+                idle = 1 - curr_index // half_count
+                if idle != last_filled:
+                    self._fill(idle)
+                    last_filled = idle
+                    last_count = curr_count
+        except Exception as e:
+            print(f"Analog output error: {e}")
+        finally:
+            try:
+                ul.stop_background(self.board_num, FunctionType.AOFUNCTION)
+            except Exception as e:
+                print(f"Error stopping analog output: {e}")
+            ul.win_buf_free(self._memhandle)
+            self._memhandle = None
+
+
+_streams = {}
+
+
+def get_ao_stream(board_num, **kwargs):
+    """Return the shared AnalogOutputStream for board_num, creating it once."""
+    if board_num not in _streams:
+        _streams[board_num] = AnalogOutputStream(board_num, **kwargs)
+    return _streams[board_num]
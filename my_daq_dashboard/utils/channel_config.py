@@ -0,0 +1,219 @@
+# channel_config.py
+from mcculw.enums import DigitalPortType, ULRange
+from .thermocouple import SUPPORTED_TYPES
+
+NUM_SE_CHANS = 32
+NUM_DIFF_CHANS = 16
+# Inputs that can ride along in a daq_in_scan, sampled on the analog scan clock
+DIGITAL_PORTS = ["FIRSTPORTA"]
+NUM_COUNTERS = 2
+
+# ADDATARATE values accepted by the USB-2416, in samples/s. cbSetConfig only
+# takes an int, so the board's 2.5 S/s setting is left out.
+DATA_RATES = [3750, 2000, 1000, 500, 100, 60, 50, 25, 10, 5]
+
+# Settling time the multiplexer adds to each conversion once a scan has more
+# than one channel. With it, 1 / (1 / rate + MUX_SETTLING) gives the 2416's
+# published multi-channel throughput (1102.94 S/s at 3750, 93.98 S/s at 100).
+MUX_SETTLING = 640e-6
+
+MODES = ["DIFF", "SE"]
+RANGES = ["BIP20VOLTS", "BIP10VOLTS", "BIP5VOLTS", "BIP2PT5VOLTS", "BIP1PT25VOLTS",
+          "BIPPT625VOLTS", "BIPPT312VOLTS", "BIPPT156VOLTS", "BIPPT078VOLTS"]
+# Thermocouple types the engine can convert in block mode
+TC_TYPES = SUPPORTED_TYPES
+
+
+class ChannelConfig:
+    """Settings for one analog input channel, stored with JSON-friendly names."""
+
+    def __init__(self, channel, mode="DIFF", ai_range="BIP10VOLTS", data_rate=1000, tc_type=None):
+        self.channel = int(channel)
+        self.mode = mode
+        self.ai_range = ai_range
+        self.data_rate = data_rate
+        self.tc_type = tc_type
+
+    @property
+    def ul_range(self):
+        # Thermocouples are scanned as raw EMF on the most sensitive range
+        return ULRange.BIPPT078VOLTS if self.tc_type else ULRange[self.ai_range]
+
+    @property
+    def conversion_time(self):
+        return 1.0 / self.data_rate
+
+    def validate(self):
+        errors = []
+        limit = NUM_DIFF_CHANS if self.mode == "DIFF" else NUM_SE_CHANS
+        if self.mode not in MODES:
+            errors.append(f"Channel {self.channel}: unknown mode {self.mode}")
+        elif not 0 <= self.channel < limit:
+            errors.append(f"Channel {self.channel}: {self.mode} channels are 0-{limit - 1}")
+        if self.ai_range not in RANGES:
+            errors.append(f"Channel {self.channel}: unsupported range {self.ai_range}")
+        if self.data_rate not in DATA_RATES:
+            errors.append(f"Channel {self.channel}: unsupported data rate {self.data_rate}")
+        if self.tc_type is not None:
+            if self.tc_type not in TC_TYPES:
+                errors.append(f"Channel {self.channel}: unknown thermocouple type {self.tc_type}")
+            if self.mode != "DIFF":
+                errors.append(f"Channel {self.channel}: thermocouples need DIFF mode")
+        return errors
+
+    def to_dict(self):
+        return {
+            "channel": self.channel,
+            "mode": self.mode,
+            "range": self.ai_range,
+            "data_rate": self.data_rate,
+            "tc_type": self.tc_type,
+        }
+
+    @classmethod
+    def from_dict(cls, info):
+        return cls(info["channel"], info.get("mode", "DIFF"), info.get("range", "BIP10VOLTS"),
+                   info.get("data_rate", 1000), info.get("tc_type"))
+
+
+class ScanPlan:
+    """Result of plan_scan: what a scan over `configs` can sustain.
+
+    `entries` counts every entry of the scan: the analog channels plus the
+    CJC sensor and digital/counter words that ride along in a daq_in_scan.
+    """
+
+    def __init__(self, configs, rate, scan_time, entries=None):
+        self.configs = configs
+        self.rate = rate
+        self.scan_time = scan_time
+        self.entries = len(configs) if entries is None else entries
+        self.max_rate = 1.0 / scan_time if scan_time > 0 else 0.0
+        self.errors = [error for config in configs for error in config.validate()]
+
+    @property
+    def aggregate_rate(self):
+        return self.rate * len(self.configs)
+
+    @property
+    def max_aggregate_rate(self):
+        return self.max_rate * len(self.configs)
+
+    @property
+    def overrun(self):
+        return self.rate > self.max_rate
+
+    @property
+    def ok(self):
+        return not self.overrun and not self.errors
+
+    def summary(self):
+        text = f"{len(self.configs)} ch"
+        if self.entries > len(self.configs):
+            text += f" (+{self.entries - len(self.configs)} CJC/DIO/counter entries)"
+        text += (f" at {self.rate:g} S/s/ch = {self.aggregate_rate:g} S/s "
+                 f"(max {self.max_rate:.1f} S/s/ch, {self.max_aggregate_rate:.0f} S/s total)")
+        if self.overrun:
+            text += " - WILL OVERRUN"
+        return text
+
+
+def plan_scan(configs, rate, io_entries=0):
+    """Work out the per-channel scan rate the 2416 can sustain for `configs`.
+
+    The 2416 has one ADC behind a multiplexer, so a scan converts its
+    channels one after another at each channel's own ADDATARATE. One scan
+    takes the sum of the conversion times (plus multiplexer settling when
+    there is more than one entry), and the scan rate can be no faster
+    than its inverse.
+
+    Thermocouples add the CJC sensor to every scan, counted as one more
+    conversion at the slowest thermocouple's data rate. `io_entries` is the
+    number of digital port and counter words in the scan (see
+    ChannelTable.sync_keys); they are latched rather than converted, so
+    each only adds multiplexer settling.
+    """
+    configs = list(configs)
+    times = [config.conversion_time for config in configs]
+    thermocouples = [config.conversion_time for config in configs if config.tc_type]
+    if thermocouples:
+        times.append(max(thermocouples))
+    times += [0.0] * io_entries
+    scan_time = sum(times)
+    if len(times) > 1:
+        scan_time += MUX_SETTLING * len(times)
+    return ScanPlan(configs, rate, scan_time, len(times))
+
+
+class ChannelTable:
+    """The analog input channels in use and their per-channel settings.
+
+    Channels a scan covers but the table does not list (the engine scans a
+    contiguous span) fall back to `default`. `ports` (DigitalPortType names)
+    and `counters` are read in the same hardware-paced scan as the analog
+    channels instead of being polled.
+    """
+
+    def __init__(self, configs=(), default=None, ports=(), counters=()):
+        self.default = default or ChannelConfig(0)
+        self._configs = {}
+        for config in configs:
+            self.set(config)
+        self.ports = [port for port in DIGITAL_PORTS if port in ports]
+        self.counters = sorted({int(counter) for counter in counters if 0 <= int(counter) < NUM_COUNTERS})
+
+    @classmethod
+    def single(cls, channel=0):
+        """The dashboard's original setup: one DIFF voltage channel at 1000 S/s."""
+        return cls([ChannelConfig(channel)])
+
+    @property
+    def channels(self):
+        return sorted(self._configs)
+
+    def __iter__(self):
+        return iter(self._configs[chan] for chan in self.channels)
+
+    def __len__(self):
+        return len(self._configs)
+
+    @property
+    def sync_keys(self):
+        """IoPoller keys of the inputs scanned with the analog channels."""
+        return ([("port", DigitalPortType[port]) for port in self.ports]
+                + [("counter", counter) for counter in self.counters])
+
+    def get(self, channel):
+        if channel in self._configs:
+            return self._configs[channel]
+        default = ChannelConfig.from_dict(self.default.to_dict())
+        default.channel = channel
+        return default
+
+    def set(self, config):
+        self._configs[config.channel] = config
+
+    def remove(self, channel):
+        self._configs.pop(channel, None)
+
+    def span(self, low_chan, high_chan):
+        return [self.get(chan) for chan in range(low_chan, high_chan + 1)]
+
+    def plan(self, rate, low_chan=None, high_chan=None):
+        """Plan the contiguous scan the engine would run for this table."""
+        if not self._configs:
+            return plan_scan([], rate)
+        if low_chan is None:
+            low_chan, high_chan = self.channels[0], self.channels[-1]
+        # A port is one DIGITAL8 entry, a counter two CTR32 halves
+        io_entries = len(self.ports) + 2 * len(self.counters)
+        return plan_scan(self.span(low_chan, high_chan), rate, io_entries)
+
+    def to_dict(self):
+        return {"channels": [config.to_dict() for config in self], "ports": list(self.ports),
+                "counters": list(self.counters)}
+
+    @classmethod
+    def from_dict(cls, info):
+        return cls((ChannelConfig.from_dict(entry) for entry in info.get("channels", [])),
+                   ports=info.get("ports", []), counters=info.get("counters", []))
@@ -0,0 +1,139 @@
+# clock_sync.py
+import collections
+import json
+import os
+import time
+
+import numpy as np
+
+
+class SampleClock:
+    """Host time of every scan, regressed from periodic (scan count, time) pairs.
+
+    observe() takes the board's completed-scan count and the time.monotonic()
+    time it was read at; the scan in progress started half a period before
+    that on average. A least-squares line over the last `window` seconds of
+    pairs maps scan index to host time: USB latency jitter averages out and
+    the drift between the board's sample clock and the host clock shows up
+    as the slope `dt`. Until the first fit the nominal rate is used.
+
+    The remaining error is the constant part of the get_status latency,
+    typically well under a millisecond on USB.
+    """
+
+    def __init__(self, rate, start_time, window=60.0, refit_interval=1.0):
+        self.rate = rate
+        self.window = window
+        self.refit_interval = refit_interval
+        self.t0 = start_time
+        self.dt = 1.0 / rate
+        # Captured once, so an NTP step during the run cannot bend the time axis
+        self.epoch_offset = time.time() - time.monotonic()
+        self.fits = 0
+        self._points = collections.deque()
+        self._next_fit = None
+
+    def observe(self, count, timestamp):
+        self._points.append((count + 0.5, timestamp))
+        while self._points[0][1] < timestamp - self.window:
+            self._points.popleft()
+        if self._next_fit is None or timestamp >= self._next_fit:
+            self._fit()
+            self._next_fit = timestamp + self.refit_interval
+
+    def _fit(self):
+        points = np.array(self._points)
+        counts, times = points[:, 0], points[:, 1]
+        spread = counts - counts.mean()
+        variance = np.dot(spread, spread)
+        if variance > 0:
+            self.dt = np.dot(spread, times - times.mean()) / variance
+        # Anchor the line at the centroid, where the fit is most accurate
+        self.t0 = times.mean() - counts.mean() * self.dt
+        self.fits += 1
+
+    def time_of(self, index):
+        """time.monotonic() time of scan `index` (a number or an array)."""
+        return self.t0 + np.asarray(index) * self.dt
+
+    def epoch(self, index):
+        """time.time() time of scan `index`, for lining up with other instruments."""
+        return self.time_of(index) + self.epoch_offset
+
+    @property
+    def drift_ppm(self):
+        """How much slower (positive) the board's sample clock runs than nominal, in ppm."""
+        return (self.dt * self.rate - 1.0) * 1e6
+
+
+class FileTiming:
+    """Row -> time model of one recording: t0, dt and sparse correction points.
+
+    Blocks are added with the time of their first scan as the engine's
+    SampleClock estimated it. A correction point is only stored when a
+    block starts more than `tolerance` seconds away from where the current
+    model puts it, which happens now and then as the drift estimate
+    improves. After lost scans (the block's scan index is not the one that
+    should follow) the last row before the jump is pinned as well, so the
+    gap is not smeared over the rows before it. Rows in between points are
+    interpolated, rows after the last one are extrapolated with `dt`.
+    """
+
+    def __init__(self, tolerance=1e-4):
+        self.tolerance = tolerance
+        self.t0 = None
+        self.dt = None
+        self.corrections = []
+        self._anchor = None
+        self._end_row = 0
+        self._next_index = None
+
+    def add(self, row, index, t_first, dt, count):
+        """Add a block of `count` scans written from file `row`, starting at engine scan `index`."""
+        if self.t0 is None:
+            self.t0, self.dt = t_first, dt
+            self._anchor = (row, t_first)
+        else:
+            anchor_row, anchor_time = self._anchor
+            error = t_first - (anchor_time + (row - anchor_row) * self.dt)
+            if abs(error) > self.tolerance:
+                if index != self._next_index and self._end_row - 1 > anchor_row:
+                    last = self._end_row - 1
+                    self.corrections.append((last, anchor_time + (last - anchor_row) * self.dt))
+                self.corrections.append((row, t_first))
+                self._anchor = (row, t_first)
+            self.dt = dt
+        self._end_row = row + count
+        self._next_index = index + count
+
+    def times(self, rows):
+        return timing_times(self.to_dict(), rows)
+
+    def to_dict(self):
+        return {"t0": self.t0, "dt": self.dt, "corrections": [list(point) for point in self.corrections],
+                "clock": "time.time() seconds, regressed from the board's scan count"}
+
+
+def timing_times(timing, rows):
+    """Times of file `rows` from a t0/dt/corrections dict (FileTiming.to_dict or a _timing.json)."""
+    rows = np.asarray(rows, dtype=np.float64)
+    points = [(0, timing["t0"])] + [tuple(point) for point in timing["corrections"]]
+    anchor_rows = np.array([point[0] for point in points], dtype=np.float64)
+    anchor_times = np.array([point[1] for point in points])
+    times = np.interp(rows, anchor_rows, anchor_times)
+    after = rows > anchor_rows[-1]
+    times[after] = anchor_times[-1] + (rows[after] - anchor_rows[-1]) * timing["dt"]
+    return times
+
+
+def write_timing(file_path, timing):
+    """Store a recording's FileTiming as <stem>_timing.json next to it."""
+    timing_path = os.path.splitext(file_path)[0] + "_timing.json"
+    with open(timing_path, 'w') as file:
+        json.dump(timing.to_dict(), file)
+    return timing_path
+
+
+def read_timing(file_path):
+    with open(os.path.splitext(file_path)[0] + "_timing.json", 'r') as file:
+        return json.load(file)
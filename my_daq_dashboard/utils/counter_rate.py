@@ -0,0 +1,66 @@
+# counter_rate.py
+import collections
+
+# c_in_32 returns an unsigned 32-bit count that rolls over to 0
+COUNTER_MODULUS = 2 ** 32
+
+
+class CounterRateMeter:
+    """Turns timestamped raw counter reads into a pulse rate in Hz.
+
+    Counts are unwrapped with modular differences, so 32-bit rollover is
+    invisible as long as fewer than 2**32 pulses arrive between two reads.
+    Two rates are kept:
+
+    - `rate`: a gated rate, recomputed once every `gate` seconds from the
+      counts accumulated over that gate, like a frequency counter.
+    - `average`: a moving-window rate over the last `window` seconds,
+      updated on every read.
+
+    Timestamps must come from time.monotonic() (or another clock that never
+    steps backwards).
+    """
+
+    def __init__(self, gate=1.0, window=5.0, modulus=COUNTER_MODULUS):
+        self.gate = gate
+        self.window = window
+        self.modulus = modulus
+        self.total = 0
+        self.rate = None
+        self.average = None
+        self._last_count = None
+        self._gate_start = None
+        self._samples = collections.deque()
+
+    def reset(self):
+        self.total = 0
+        self.rate = None
+        self.average = None
+        self._last_count = None
+        self._gate_start = None
+        self._samples.clear()
+
+    def update(self, count, timestamp):
+        """Add one read; returns the gated rate (None until the first gate closes)."""
+        if self._last_count is None:
+            self._last_count = count
+            self._gate_start = (timestamp, self.total)
+            self._samples.append((timestamp, self.total))
+            return self.rate
+
+        self.total += (count - self._last_count) % self.modulus
+        self._last_count = count
+
+        gate_time, gate_total = self._gate_start
+        if timestamp - gate_time >= self.gate:
+            self.rate = (self.total - gate_total) / (timestamp - gate_time)
+            self._gate_start = (timestamp, self.total)
+
+        self._samples.append((timestamp, self.total))
+        # Keep one sample at or beyond the window edge so the window is always full
+        while len(self._samples) > 2 and timestamp - self._samples[1][0] >= self.window:
+            self._samples.popleft()
+        oldest_time, oldest_total = self._samples[0]
+        if timestamp > oldest_time:
+            self.average = (self.total - oldest_total) / (timestamp - oldest_time)
+        return self.rate
@@ -0,0 +1,24 @@
+# decimation.py
+import numpy as np
+
+
+def minmax_envelope(data, width, out=None):
+    """Reduce (channels, n) samples to a min/max envelope `width` bins wide.
+
+    Returns a (channels, 2 * width) array with each bin's min followed by
+    its max, which draws as a line that keeps every peak of the raw signal.
+    Pass a preallocated `out` to avoid allocating on every frame. When there
+    are fewer than two samples per bin the data is returned unchanged.
+    """
+    data = np.atleast_2d(data)
+    n = data.shape[-1]
+    bin_size = n // width
+    if bin_size < 2:
+        return data
+    if out is None:
+        out = np.empty(data.shape[:-1] + (2 * width,), dtype=data.dtype)
+    # Drop the oldest few samples so the rest split evenly into bins
+    binned = data[..., n - bin_size * width:].reshape(data.shape[:-1] + (width, bin_size))
+    np.min(binned, axis=-1, out=out[..., 0::2])
+    np.max(binned, axis=-1, out=out[..., 1::2])
+    return out
@@ -1,19 +1,61 @@
 # device_utils.py
+import threading
+
 from mcculw import ul
 from mcculw.enums import InterfaceType, InfoType, AiChanType, BoardInfo, AnalogInputMode
+from .channel_config import ChannelTable
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+
+def get_inventory(refresh=False):
+    """USB DAQ devices known to the UL, scanned once and then cached.
+
+    A scan takes hundreds of milliseconds, so only the engine's reconnect
+    loop (off the GUI thread) or an explicit refresh rescans.
+    """
+    global _inventory
+    with _inventory_lock:
+        if refresh or _inventory is None:
+            ul.ignore_instacal()
+            _inventory = ul.get_daq_device_inventory(InterfaceType.USB)
+        return list(_inventory)
+
+
+def find_device(unique_id=None, refresh=False):
+    """The inventory entry with `unique_id` (the first device if None), or None."""
+    for device in get_inventory(refresh):
+        if unique_id is None or device.unique_id == unique_id:
+            return device
+    return None
+
 
 def initialize_device(board_num):
-    ul.ignore_instacal()
-    devices = ul.get_daq_device_inventory(InterfaceType.USB)
-    if devices:
-        device = devices[0]
+    # An empty cache may predate plugging the board in, so look once more before giving up
+    device = find_device() or find_device(refresh=True)
+    if device:
         ul.create_daq_device(board_num, device)
         return device
     else:
         raise Exception("No DAQ devices found")
 
-def set_channel_settings(board_num):
-    channel = 0
-    ul.set_config(InfoType.BOARDINFO, board_num, channel, BoardInfo.ADCHANTYPE, AiChanType.VOLTAGE)
-    ul.a_chan_input_mode(board_num, channel, AnalogInputMode.DIFFERENTIAL)
-    ul.set_config(InfoType.BOARDINFO, board_num, channel, BoardInfo.ADDATARATE, 1000)
+def set_channel_settings(board_num, table=None, low_chan=None, high_chan=None):
+    """Apply every channel of a ChannelTable to the board in one pass.
+
+    With `low_chan`/`high_chan` the whole span a scan covers is set up,
+    unlisted channels with the table's default, so the board runs what the
+    planner assumed. Without a table only channel 0 is set up, as a DIFF
+    voltage input at 1000 S/s. Thermocouple channels are set up as voltage
+    inputs too: the engine scans their raw EMF with the CJC sensor and
+    converts them itself.
+    """
+    if table is None:
+        table = ChannelTable.single(0)
+    configs = table if low_chan is None else table.span(low_chan, high_chan)
+    for config in configs:
+        channel = config.channel
+        ul.set_config(InfoType.BOARDINFO, board_num, channel, BoardInfo.ADCHANTYPE, AiChanType.VOLTAGE)
+        mode = AnalogInputMode.DIFFERENTIAL if config.mode == "DIFF" else AnalogInputMode.SINGLE_ENDED
+        ul.a_chan_input_mode(board_num, channel, mode)
+        ul.set_config(InfoType.BOARDINFO, board_num, channel, BoardInfo.ADDATARATE, int(config.data_rate))
@@ -0,0 +1,201 @@
+# io_poller.py
+import queue
+import threading
+import time
+
+import numpy as np
+from mcculw import ul
+from .counter_rate import CounterRateMeter
+
+
+class Reading:
+    """One timestamped value read by the IoPoller.
+
+    Counter readings also carry the gated `rate` and moving-window
+    `average` in Hz; both stay None for ports.
+    """
+
+    def __init__(self, key, value, timestamp, rate=None, average=None):
+        self.key = key
+        self.value = value
+        self.timestamp = timestamp
+        self.rate = rate
+        self.average = average
+
+    def state(self):
+        return self.value, self.rate, self.average
+
+
+class IoPoller:
+    """Reads every watched digital port and counter from one background thread.
+
+    Each tick reads all watched inputs in one batch and timestamps them with
+    time.monotonic(). Only values that changed since the previous tick are
+    queued. dispatch() must be called from the GUI thread (the dashboard
+    calls it from a single after() loop); it hands the queued readings to
+    the subscribed callbacks, so no USB transaction ever runs on the Tk
+    mainloop.
+
+    Keys are ("port", DigitalPortType) and ("counter", counter_num).
+    Counters also get a CounterRateMeter, so the rate arithmetic runs here
+    rather than in the widgets.
+
+    Inputs the acquisition engine scans in hardware (see feed()) are not
+    polled while their samples keep arriving; polling resumes by itself
+    FEED_TIMEOUT seconds after the scan stops.
+    """
+
+    FEED_TIMEOUT = 1.0
+
+    def __init__(self, board_num, interval=0.05):
+        self.board_num = board_num
+        self.interval = interval
+        self.subscribers = {}
+        self.latest = {}
+        self.meters = {}
+        self.errors = 0
+        self._failing = set()
+        self._fed = {}
+
+        self._changes = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, key, callback):
+        """Call callback(reading) on the GUI thread whenever `key` changes."""
+        with self._lock:
+            self.subscribers.setdefault(key, []).append(callback)
+            if key in self.latest:
+                # A late subscriber gets the current value straight away
+                self._changes.put((self.latest[key], callback))
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def configure_counter(self, counter_num, gate=1.0, window=5.0):
+        """Set the gate time and moving-window length (seconds) for a counter's rate."""
+        with self._lock:
+            self.meters[("counter", counter_num)] = CounterRateMeter(gate, window)
+
+    def unsubscribe(self, key, callback):
+        with self._lock:
+            callbacks = self.subscribers.get(key, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self.subscribers.pop(key, None)
+                self.latest.pop(key, None)
+                if key in self.meters:
+                    self.meters[key].reset()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def dispatch(self):
+        """Deliver queued changes to their callbacks. Call from the GUI thread."""
+        while True:
+            try:
+                reading, callback = self._changes.get_nowait()
+            except queue.Empty:
+                return
+            callbacks = [callback] if callback else list(self.subscribers.get(reading.key, []))
+            for callback in callbacks:
+                try:
+                    callback(reading)
+                except Exception as e:
+                    print(f"Error updating {reading.key}: {e}")
+
+    def feed(self, key, values, timestamps):
+        """Take hardware-timed samples of `key` from the engine's scan (engine thread).
+
+        Port readings are queued for every change within the block, each
+        with the time of the scan that saw it; counters are reduced to the
+        last sample of the block, as the display only needs the newest count.
+        """
+        with self._lock:
+            self._fed[key] = time.monotonic()
+            if key not in self.subscribers or not len(values):
+                return
+            previous = self.latest.get(key)
+        if previous is not None:
+            # Right after polling hands over, the scan can still deliver samples older than the last poll
+            newer = timestamps > previous.timestamp
+            values, timestamps = values[newer], timestamps[newer]
+            if not len(values):
+                return
+        if key[0] == "port":
+            last = values[0] if previous is None else previous.value
+            changes = np.flatnonzero(np.diff(values, prepend=last))
+            if previous is None:
+                changes = np.union1d([0], changes)
+            for index in changes:
+                self._update(Reading(key, int(values[index]), float(timestamps[index])))
+        else:
+            self._update(Reading(key, int(values[-1]), float(timestamps[-1])))
+
+    def _read(self, key):
+        kind, num = key
+        if kind == "port":
+            return ul.d_in(self.board_num, num)
+        return ul.c_in_32(self.board_num, num)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                keys = list(self.subscribers)
+            if not keys:
+                with self._lock:
+                    if not self.subscribers:
+                        self._thread = None
+                        break
+                continue
+
+            now = time.monotonic()
+            for key in keys:
+                if now - self._fed.get(key, -self.FEED_TIMEOUT) < self.FEED_TIMEOUT:
+                    continue
+                try:
+                    before = time.monotonic()
+                    value = self._read(key)
+                    # Stamp the middle of the USB transaction to halve the timing jitter
+                    timestamp = (before + time.monotonic()) / 2
+                except Exception as e:
+                    self.errors += 1
+                    if key not in self._failing:
+                        # Report once per outage instead of on every tick
+                        self._failing.add(key)
+                        print(f"Error reading {key}: {e}")
+                    continue
+                self._failing.discard(key)
+                self._update(Reading(key, value, timestamp))
+
+            time.sleep(self.interval)
+
+    def _update(self, reading):
+        key = reading.key
+        with self._lock:
+            if key not in self.subscribers:
+                return
+            if key[0] == "counter":
+                meter = self.meters.setdefault(key, CounterRateMeter())
+                reading.rate = meter.update(reading.value, reading.timestamp)
+                reading.average = meter.average
+            previous = self.latest.get(key)
+            self.latest[key] = reading
+        if previous is None or previous.state() != reading.state():
+            self._changes.put((reading, None))
+
+
+_pollers = {}
+
+
+def get_poller(board_num, **kwargs):
+    """Return the shared IoPoller for board_num, creating it once."""
+    if board_num not in _pollers:
+        _pollers[board_num] = IoPoller(board_num, **kwargs)
+    return _pollers[board_num]
@@ -0,0 +1,300 @@
+# recorders.py
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from .clock_sync import FileTiming, write_timing
+from .seek_index import INDEX_EVERY, IndexedBackend
+
+
+def write_binary_header(file_path, channels, rate, dtype=np.float64, scale=1.0, **extra):
+    """Describe a raw binary recording in a JSON file next to it."""
+    header = {
+        "channels": list(channels),
+        "rate": rate,
+        "dtype": np.dtype(dtype).str,
+        "scale": scale,
+    }
+    header.update(extra)
+    with open(os.path.splitext(file_path)[0] + ".json", 'w') as file:
+        json.dump(header, file)
+
+
+class CsvBackend:
+    """Text output, one np.savetxt call per chunk instead of one write per sample."""
+
+    def __init__(self, file_path, channels, rate):
+        self.file_path = file_path
+        self.channels = channels
+        self.rate = rate
+        self.file = None
+
+    def open(self):
+        self.file = open(self.file_path, 'w')
+        header = ",".join([f"Channel {ch}" for ch in self.channels])
+        self.file.write(header + "\n")
+
+    def write(self, chunk):
+        start = self.file.tell()
+        np.savetxt(self.file, chunk, fmt="%.5f", delimiter=",")
+        return self.file.tell() - start
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class BinaryBackend:
+    """Raw row-major samples plus a small JSON header next to the data file.
+
+    float64 stores the scaled volts as-is. int32 stores round(volts / lsb),
+    which halves the file size and keeps the 24-bit resolution of the 2416;
+    NaN (e.g. a gap marker) is stored as the dtype's minimum, noted as
+    "nan_value" in the header.
+    """
+
+    def __init__(self, file_path, channels, rate, dtype=np.float64, lsb=20.0 / 2 ** 24):
+        self.file_path = file_path
+        self.channels = channels
+        self.rate = rate
+        self.dtype = np.dtype(dtype)
+        self.lsb = lsb
+        self.file = None
+
+    def open(self):
+        self.file = open(self.file_path, 'wb')
+        if self.dtype.kind == 'i':
+            write_binary_header(self.file_path, self.channels, self.rate, self.dtype, self.lsb,
+                                nan_value=int(np.iinfo(self.dtype).min))
+        else:
+            write_binary_header(self.file_path, self.channels, self.rate, self.dtype)
+
+    def write(self, chunk):
+        if self.dtype.kind == 'i':
+            counts = np.rint(chunk / self.lsb)
+            counts[np.isnan(counts)] = np.iinfo(self.dtype).min
+            chunk = counts.astype(self.dtype)
+        elif chunk.dtype != self.dtype:
+            chunk = chunk.astype(self.dtype)
+        chunk.tofile(self.file)
+        return chunk.nbytes
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class H5Backend:
+    """Appends chunks to an enlargeable array in a PyMoDAQ-compatible h5 file."""
+
+    def __init__(self, file_path, channels, rate):
+        self.file_path = file_path
+        self.channels = channels
+        self.rate = rate
+        self.saver = None
+        self.array = None
+
+    def open(self):
+        # pymodaq (and pytables) are only needed for this backend
+        from pathlib import Path
+        from pymodaq.utils.h5modules.saving import H5SaverLowLevel
+
+        self.saver = H5SaverLowLevel()
+        self.saver.init_file(Path(self.file_path), new_file=True,
+                             metadata={"channels": list(self.channels), "rate": self.rate})
+        self.array = self.saver.add_array(self.saver.raw_group, 'Data', 'data', data_shape=(len(self.channels),),
+                                          array_type=np.float64, data_dimension='Data1D', enlargeable=True)
+
+    def write(self, chunk):
+        self.array.append(chunk, expand=False)
+        return chunk.nbytes
+
+    def close(self):
+        if self.saver:
+            self.saver.close_file()
+            self.saver = None
+
+
+BACKENDS = {
+    ".csv": CsvBackend,
+    ".bin": BinaryBackend,
+    ".i32": lambda file_path, channels, rate: BinaryBackend(file_path, channels, rate, dtype=np.int32),
+    ".h5": H5Backend,
+}
+
+
+def make_backend(file_path, channels, rate, index_every=INDEX_EVERY):
+    """Pick a backend from the file extension, falling back to CSV.
+
+    CSV and binary files get a seek index every `index_every` rows (None
+    for none); h5 arrays can already be read by row.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    backend = BACKENDS.get(extension, CsvBackend)(file_path, channels, rate)
+    if index_every and hasattr(backend, "tell"):
+        backend = IndexedBackend(backend, index_every)
+    return backend
+
+
+class RotatingBackend:
+    """Splits a recording into numbered files (name_000.ext, name_001.ext, ...).
+
+    A new file starts once the current one holds `max_seconds` of recorded
+    data or `max_bytes` of output. Time is counted in scans at the sample
+    rate, so files split on exact sample boundaries regardless of when the
+    chunks arrived. Each file gets its own backend, picked from the extension,
+    and its own seek index.
+    """
+
+    def __init__(self, file_path, channels, rate, max_seconds=None, max_bytes=None):
+        self.file_path = file_path
+        self.channels = channels
+        self.rate = rate
+        self.max_scans = int(max_seconds * rate) if max_seconds else None
+        self.max_bytes = max_bytes
+        self.paths = []
+        self.backend = None
+        self.timing = None
+        self._rows = 0
+        self._file_scans = 0
+        self._file_bytes = 0
+
+    def _next_path(self):
+        stem, extension = os.path.splitext(self.file_path)
+        return f"{stem}_{len(self.paths):03d}{extension}"
+
+    def _open_next(self):
+        path = self._next_path()
+        self.backend = make_backend(path, self.channels, self.rate)
+        if self.timing is not None and hasattr(self.backend, "attach_timing"):
+            self.backend.attach_timing(self.timing, self._rows)
+        self.backend.open()
+        self.paths.append(path)
+        self._file_scans = 0
+        self._file_bytes = 0
+
+    def attach_timing(self, timing, first_row=0):
+        self.timing = timing
+        self._rows = first_row
+
+    def open(self):
+        self._open_next()
+
+    def write(self, chunk):
+        written = 0
+        while len(chunk):
+            if self.backend is None:
+                # Opened lazily so a rotation never leaves an empty trailing file
+                self._open_next()
+            room = self.max_scans - self._file_scans if self.max_scans else len(chunk)
+            part, chunk = chunk[:room], chunk[room:]
+            nbytes = self.backend.write(part)
+            written += nbytes
+            self._rows += len(part)
+            self._file_scans += len(part)
+            self._file_bytes += nbytes
+            if (self.max_scans and self._file_scans >= self.max_scans) or \
+                    (self.max_bytes and self._file_bytes >= self.max_bytes):
+                self.backend.close()
+                self.backend = None
+        return written
+
+    def close(self):
+        if self.backend:
+            self.backend.close()
+            self.backend = None
+
+
+class RecordingWriter(threading.Thread):
+    """Dedicated thread that drains a BlockQueue and writes whole chunks.
+
+    The acquisition thread only enqueues blocks; formatting and disk I/O
+    happen here. bytes_written and the source queue depth are exposed so
+    the GUI can show sustained throughput.
+
+    When a block follows a restart of the scan (block.gap), one row of NaN is written
+    before it as a gap marker and (scan in file, scans lost) goes to `gaps`;
+    the recording carries on in the same file. If the source reports an
+    `error` (the engine gave up), the writer stops with that error once the
+    queue is drained.
+
+    Blocks stamped by the engine's clock build a FileTiming, saved as
+    <stem>_timing.json when the writer stops: t0, dt and the occasional
+    correction point instead of a timestamp per row (see clock_sync). The
+    same model stamps the entries of the backend's seek index, if it has one.
+    """
+
+    def __init__(self, source, backend):
+        super().__init__(daemon=True)
+        self.source = source
+        self.backend = backend
+        self.bytes_written = 0
+        self.samples_written = 0
+        self.error = None
+        self.start_time = None
+        self.gaps = []
+        self.rows = 0
+        self.timing = FileTiming()
+        if hasattr(backend, "attach_timing"):
+            backend.attach_timing(self.timing)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        self.start_time = time.monotonic()
+        try:
+            self.backend.open()
+            while not self._stop_event.is_set() or self.source.depth:
+                block = self.source.get(timeout=0.2)
+                if block is None:
+                    if getattr(self.source, "error", None) and not self.source.depth:
+                        raise RuntimeError(self.source.error)
+                    continue
+                if block.gap:
+                    self.gaps.append((self.rows, block.gap))
+                    self.bytes_written += self.backend.write(np.full((1, len(block.channels)), np.nan))
+                    self.rows += 1
+                if block.t0 is not None:
+                    self.timing.add(self.rows, block.start_index, block.t0, block.dt, block.data.shape[1])
+                # DataBlocks are (channels, samples); files are row-per-scan
+                chunk = np.ascontiguousarray(block.data.T)
+                self.bytes_written += self.backend.write(chunk)
+                self.samples_written += chunk.size
+                self.rows += len(chunk)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.backend.close()
+            if self.timing.t0 is not None:
+                try:
+                    write_timing(self.backend.file_path, self.timing)
+                except OSError as e:
+                    self.error = self.error or e
+
+    def stop(self, timeout=5):
+        self._stop_event.set()
+        self.join(timeout)
+
+    @property
+    def mb_per_s(self):
+        if self.start_time is None:
+            return 0.0
+        elapsed = time.monotonic() - self.start_time
+        return self.bytes_written / elapsed / 1e6 if elapsed > 0 else 0.0
+
+    def status_text(self):
+        text = (f"Recording {self.mb_per_s:.2f} MB/s, "
+                f"queue {self.source.depth}/{self.source.maxsize}, dropped {self.source.dropped}")
+        if self.gaps:
+            text += f", {len(self.gaps)} gaps"
+        return text
@@ -0,0 +1,131 @@
+# ring_buffer.py
+import numpy as np
+
+COUNT_MODULUS = 2 ** 32
+
+
+class RingBufferReader:
+    """Pull only the new samples out of a circular UL scan buffer.
+
+    Uses the curr_count/curr_index pair returned by ul.get_status to find the
+    samples written since the last call, copies them (handling wrap-around)
+    into a preallocated scratch array and returns a view shaped
+    (scans, num_chans). Only whole channel scans are returned so rows stay
+    aligned.
+    """
+
+    def __init__(self, buffer, num_chans):
+        self.buffer = buffer
+        self.size = len(buffer)
+        self.num_chans = num_chans
+        self.prev_count = 0
+        self.prev_index = 0
+        self.overruns = 0
+        self._read_start = 0
+        self._scratch = np.empty(self.size, dtype=buffer.dtype)
+
+    def reset(self):
+        self.prev_count = 0
+        self.prev_index = 0
+        self._read_start = 0
+
+    @property
+    def scan_count(self):
+        """Number of whole channel scans consumed so far."""
+        return self.prev_count // self.num_chans
+
+    def available(self, curr_count):
+        # curr_count is a 32-bit counter in the UL and wraps on long scans
+        new_count = (curr_count - self.prev_count) % COUNT_MODULUS
+        return new_count - new_count % self.num_chans
+
+    def read(self, curr_count, curr_index=None):
+        new_count = self.available(curr_count)
+
+        if new_count > self.size:
+            # The board has lapped us; everything between prev and curr is lost
+            self.overruns += 1
+            self._resync(new_count, curr_index)
+            return self._scratch[:0].reshape(0, self.num_chans)
+
+        self._read_start = self.prev_count
+        start = self.prev_index
+        end = start + new_count
+        if end <= self.size:
+            self._scratch[:new_count] = self.buffer[start:end]
+        else:
+            first = self.size - start
+            self._scratch[:first] = self.buffer[start:]
+            self._scratch[first:new_count] = self.buffer[:end - self.size]
+
+        self.prev_count += new_count
+        self.prev_index = end % self.size
+        return self._scratch[:new_count].reshape(-1, self.num_chans)
+
+    def overwritten(self, curr_count):
+        """Check, after a read, whether the board overwrote data while copying.
+
+        Pass a curr_count sampled after read() returned.
+        """
+        if (curr_count - self._read_start) % COUNT_MODULUS > self.size:
+            self.overruns += 1
+            return True
+        return False
+
+    def _resync(self, new_count, curr_index):
+        # Count the lost scans so scan_count keeps tracking the board's clock
+        self.prev_count += new_count
+        self._read_start = self.prev_count
+        if curr_index is not None and curr_index >= 0:
+            # curr_index points at the first sample of the last completed scan
+            self.prev_index = (curr_index + self.num_chans) % self.size
+        else:
+            self.prev_index = (self.prev_index + new_count) % self.size
+
+
+class HistoryBuffer:
+    """Fixed-size per-channel history with zero allocations per append.
+
+    Every sample is written twice, capacity apart, so the latest `capacity`
+    samples are always one contiguous slice and view() never copies.
+    """
+
+    def __init__(self, num_chans, capacity, dtype=np.float64):
+        self.num_chans = num_chans
+        self.capacity = capacity
+        self._data = np.zeros((num_chans, 2 * capacity), dtype=dtype)
+        self._head = 0
+        self.count = 0
+
+    def append(self, block):
+        """Append a (num_chans, n) block of samples."""
+        n = block.shape[1]
+        if n == 0:
+            return
+        if n > self.capacity:
+            block = block[:, n - self.capacity:]
+            n = self.capacity
+
+        start = self._head
+        end = start + n
+        if end <= self.capacity:
+            self._data[:, start:end] = block
+            self._data[:, start + self.capacity:end + self.capacity] = block
+        else:
+            first = self.capacity - start
+            self._data[:, start:self.capacity] = block[:, :first]
+            self._data[:, start + self.capacity:] = block[:, :first]
+            self._data[:, :n - first] = block[:, first:]
+            self._data[:, self.capacity:self.capacity + n - first] = block[:, first:]
+
+        self._head = end % self.capacity
+        self.count += n
+
+    def view(self):
+        """Oldest-to-newest samples, shape (num_chans, capacity)."""
+        return self._data[:, self._head:self._head + self.capacity]
+
+    def clear(self):
+        self._data[:] = 0
+        self._head = 0
+        self.count = 0
@@ -0,0 +1,294 @@
+# seek_index.py
+"""Sidecar seek index for long recordings: <stem>_index.npz next to the data file.
+
+Every `every` rows the index stores the row number, the byte offset of
+that row in the data file and its time. A final entry marks the end of
+the file. Each block of `every` rows also gets a per-channel min, max,
+mean and count of finite samples. NaN gap markers are left out of the
+stats.
+
+RecordingIndex reads any time range by seeking to the block that holds
+it, so the work follows the window rather than the file size. overview()
+draws a whole recording from the block stats alone, without touching the
+data file.
+"""
+import io
+import json
+import math
+import os
+
+import numpy as np
+
+# Rows per index entry: one second per block at 1 kHz
+INDEX_EVERY = 1000
+
+
+def index_path(file_path):
+    return os.path.splitext(file_path)[0] + "_index.npz"
+
+
+def write_index(file_path, channels, rate, every, file_format, rows, offsets, times, absolute, stats):
+    """Save an index; `stats` is (minimum, maximum, mean, count), each (blocks, channels)."""
+    minimum, maximum, mean, count = stats
+    path = index_path(file_path)
+    # Written through a file object so np.savez does not append its own extension
+    with open(path, 'wb') as file:
+        np.savez(file, channels=np.asarray(channels), rate=rate, every=every, format=file_format,
+                 rows=np.asarray(rows, dtype=np.int64), offsets=np.asarray(offsets, dtype=np.int64),
+                 times=np.asarray(times, dtype=np.float64), absolute=absolute,
+                 minimum=minimum, maximum=maximum, mean=mean, count=count)
+    return path
+
+
+def _block_stats(data):
+    """NaN-free per-channel min, max, sum and count of (rows, channels) or (blocks, rows, channels) data."""
+    finite = np.isfinite(data)
+    axis = data.ndim - 2
+    return (np.fmin.reduce(data, axis=axis), np.fmax.reduce(data, axis=axis),
+            np.where(finite, data, 0.0).sum(axis=axis), finite.sum(axis=axis))
+
+
+def _finish_stats(minimum, maximum, total, count):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, total / count, np.nan)
+    return np.asarray(minimum), np.asarray(maximum), mean, np.asarray(count)
+
+
+class IndexedBackend:
+    """Wraps a recording backend and builds the seek index of the file it writes.
+
+    Chunks are split at index boundaries so the byte offset of every
+    `every`-th row is just the wrapped backend's tell() before that piece.
+    The index is saved when the backend closes. Entry times come from the
+    RecordingWriter's FileTiming when attach_timing() was called, and
+    otherwise count seconds from the first row at the nominal rate.
+    """
+
+    def __init__(self, backend, every=INDEX_EVERY):
+        self.backend = backend
+        self.every = every
+        self.timing = None
+        self.first_row = 0
+        self.rows = 0
+        self._reset()
+
+    def _reset(self):
+        self._offsets = []
+        self._minimum = []
+        self._maximum = []
+        self._total = []
+        self._count = []
+        self._block = None
+
+    @property
+    def file_path(self):
+        return self.backend.file_path
+
+    @property
+    def channels(self):
+        return self.backend.channels
+
+    @property
+    def rate(self):
+        return self.backend.rate
+
+    def attach_timing(self, timing, first_row=0):
+        """Stamp the entries with `timing` (a FileTiming); this file starts at its row `first_row`."""
+        self.timing = timing
+        self.first_row = first_row
+
+    def open(self):
+        self.rows = 0
+        self._reset()
+        self.backend.open()
+
+    def write(self, chunk):
+        written = 0
+        while len(chunk):
+            if self.rows % self.every == 0:
+                self._offsets.append(self.backend.tell())
+            room = self.every - self.rows % self.every
+            part, chunk = chunk[:room], chunk[room:]
+            written += self.backend.write(part)
+            self._add_stats(part)
+            self.rows += len(part)
+            if self.rows % self.every == 0:
+                self._close_block()
+        return written
+
+    def _add_stats(self, part):
+        stats = _block_stats(np.asarray(part, dtype=np.float64))
+        if self._block is None:
+            self._block = stats
+        else:
+            minimum, maximum, total, count = self._block
+            self._block = (np.fmin(minimum, stats[0]), np.fmax(maximum, stats[1]), total + stats[2],
+                           count + stats[3])
+
+    def _close_block(self):
+        minimum, maximum, total, count = self._block
+        self._minimum.append(minimum)
+        self._maximum.append(maximum)
+        self._total.append(total)
+        self._count.append(count)
+        self._block = None
+
+    def close(self):
+        if self.backend.file is None:
+            return
+        if self._block is not None:
+            self._close_block()
+        end = self.backend.tell()
+        file_format = "csv" if isinstance(self.backend.file, io.TextIOBase) else "binary"
+        self.backend.close()
+        if not self.rows:
+            return
+        rows = np.append(np.arange(0, self.rows, self.every), self.rows)
+        if self.timing is not None and self.timing.t0 is not None:
+            times, absolute = self.timing.times(self.first_row + rows), True
+        else:
+            times, absolute = rows / self.rate, False
+        stats = _finish_stats(np.array(self._minimum), np.array(self._maximum), np.array(self._total),
+                              np.array(self._count))
+        try:
+            write_index(self.file_path, self.channels, self.rate, self.every, file_format, rows,
+                        self._offsets + [end], times, absolute, stats)
+        except OSError as e:
+            print(f"Error writing seek index: {e}")
+
+
+def build_index(file_path, every=INDEX_EVERY, batch_blocks=256):
+    """Index an existing binary recording (.bin/.i32 with its JSON header), e.g. from ScanToFile.
+
+    Offsets follow from the row size. The stats are computed `batch_blocks`
+    blocks at a time from a memory map, so the whole file is never held in
+    memory. Times count seconds from the first row at the header's rate.
+    """
+    header = read_binary_header(file_path)
+    num_chans = len(header["channels"])
+    dtype = np.dtype(header["dtype"])
+    num_rows = os.path.getsize(file_path) // (num_chans * dtype.itemsize)
+    # An empty file (a scan that stopped before its first chunk) cannot be mapped
+    data = np.memmap(file_path, dtype=dtype, mode='r', shape=(num_rows, num_chans)) if num_rows else None
+    parts = []
+    for first in range(0, num_rows, every * batch_blocks):
+        batch = _to_volts(data[first:first + every * batch_blocks], header)
+        whole = len(batch) - len(batch) % every
+        if whole:
+            parts.append(_block_stats(batch[:whole].reshape(-1, every, num_chans)))
+        if whole < len(batch):
+            parts.append(tuple(stat[None] for stat in _block_stats(batch[whole:])))
+    minimum, maximum, total, count = (np.concatenate([part[n] for part in parts]) if parts
+                                      else np.empty((0, num_chans)) for n in range(4))
+    del data
+    rows = np.append(np.arange(0, num_rows, every), num_rows)
+    return write_index(file_path, header["channels"], header["rate"], every, "binary", rows,
+                       rows * num_chans * dtype.itemsize, rows / header["rate"], False,
+                       _finish_stats(minimum, maximum, total, count))
+
+
+def read_binary_header(file_path):
+    with open(os.path.splitext(file_path)[0] + ".json", 'r') as file:
+        return json.load(file)
+
+
+def _to_volts(data, header):
+    """Scaled float64 samples of raw binary rows, with the header's nan_value as NaN."""
+    volts = np.asarray(data, dtype=np.float64)
+    if "nan_value" in header:
+        volts[data == header["nan_value"]] = np.nan
+    if header.get("scale", 1.0) != 1.0:
+        volts *= header["scale"]
+    return volts
+
+
+class RecordingIndex:
+    """Random access to a recording through its seek index.
+
+    Times passed to and returned by read() and overview() are seconds from
+    the first row; `start_time` is that row's time.time() time when the
+    recording was stamped by the engine's clock (`absolute`). Row times in
+    between index entries are interpolated, which follows the FileTiming
+    model except within a block holding a gap marker.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with np.load(index_path(file_path)) as index:
+            self.channels = index["channels"].tolist()
+            self.rate = float(index["rate"])
+            self.every = int(index["every"])
+            self.format = str(index["format"])
+            self.rows = index["rows"]
+            self.offsets = index["offsets"]
+            self.times = index["times"]
+            self.absolute = bool(index["absolute"])
+            self.minimum = index["minimum"]
+            self.maximum = index["maximum"]
+            self.mean = index["mean"]
+            self.count = index["count"]
+        self.start_time = float(self.times[0])
+        self.header = read_binary_header(file_path) if self.format == "binary" else None
+
+    @property
+    def num_rows(self):
+        return int(self.rows[-1])
+
+    @property
+    def duration(self):
+        return float(self.times[-1] - self.times[0])
+
+    def row_at(self, seconds):
+        """Fractional row at `seconds` from the first row."""
+        return np.interp(self.start_time + np.asarray(seconds), self.times, self.rows)
+
+    def times_of(self, rows):
+        """Seconds from the first row of file `rows`."""
+        return np.interp(rows, self.rows, self.times) - self.start_time
+
+    def read_rows(self, first, last):
+        """Rows first..last-1 as float64 volts, shape (rows, channels)."""
+        first, last = max(int(first), 0), min(int(last), self.num_rows)
+        if last <= first:
+            return np.empty((0, len(self.channels)))
+        block = first // self.every
+        with open(self.file_path, 'rb') as file:
+            if self.format == "binary":
+                dtype = np.dtype(self.header["dtype"])
+                file.seek(self.offsets[block] + (first - self.rows[block]) * len(self.channels) * dtype.itemsize)
+                data = np.fromfile(file, dtype=dtype, count=(last - first) * len(self.channels))
+                return _to_volts(data.reshape(-1, len(self.channels)), self.header)
+            # Text rows have no fixed size: read the whole blocks around the range
+            end_block = min(math.ceil(last / self.every), len(self.offsets) - 1)
+            file.seek(self.offsets[block])
+            text = file.read(self.offsets[end_block] - self.offsets[block]).decode()
+        data = np.loadtxt(text.splitlines(), delimiter=",", ndmin=2)
+        skip = first - self.rows[block]
+        return data[skip:skip + last - first]
+
+    def read(self, start, end):
+        """(times, data) of the rows from `start` to `end` seconds, data shaped (rows, channels)."""
+        first = int(math.ceil(self.row_at(start)))
+        last = int(math.floor(self.row_at(end))) + 1
+        data = self.read_rows(first, last)
+        return self.times_of(np.arange(first, first + len(data))), data
+
+    def overview(self, points=1000):
+        """Whole-recording (times, minimum, maximum, mean), each at most `points` long, from the index alone.
+
+        Blocks are merged in groups when there are more than `points`;
+        times are the start of each group. minimum/maximum/mean are
+        (points, channels).
+        """
+        blocks = len(self.minimum)
+        group = max(math.ceil(blocks / points), 1)
+        starts = np.arange(0, blocks, group)
+        if not blocks:
+            empty = np.empty((0, len(self.channels)))
+            return np.empty(0), empty, empty, empty
+        count = np.add.reduceat(self.count, starts)
+        total = np.add.reduceat(np.where(self.count > 0, self.mean * self.count, 0.0), starts)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, total / count, np.nan)
+        return (self.times[starts] - self.start_time, np.fmin.reduceat(self.minimum, starts),
+                np.fmax.reduceat(self.maximum, starts), mean)
@@ -0,0 +1,632 @@
+# simulated_ul.py
+"""Drop-in stand-in for ``mcculw.ul`` that simulates a USB-2416.
+
+Background scans fill a real circular buffer from a timer thread at the
+requested rate, so a consumer that polls too slowly overruns exactly as it
+would on hardware. Only numpy and ``mcculw.enums``/``mcculw.structs`` are
+needed, so it runs on Linux without the Windows UL driver.
+
+Use ``install()`` before anything imports ``mcculw.ul``, or run a script
+unchanged with::
+
+    python simulated_ul.py path/to/script.py [args...]
+"""
+import collections
+import ctypes
+import math
+import os
+import runpy
+import sys
+import threading
+import time
+
+import numpy as np
+from mcculw.enums import (ErrorCode, FunctionType, Status, ScanOptions, InterfaceType, InfoType, BoardInfo,
+                          ULRange, ChannelType, DigitalPortType)
+from mcculw.structs import DaqDeviceDescriptor
+
+PRODUCT_NAME = "USB-2416"
+PRODUCT_ID = 208
+NUM_AI_CHANS = 32
+NUM_AO_CHANS = 4
+NUM_COUNTERS = 2
+AD_RESOLUTION = 24
+FILL_INTERVAL = 0.005
+AI_RANGES = [ULRange.BIP20VOLTS, ULRange.BIP10VOLTS, ULRange.BIP5VOLTS, ULRange.BIP2PT5VOLTS,
+             ULRange.BIP1PT25VOLTS, ULRange.BIPPT625VOLTS, ULRange.BIPPT312VOLTS, ULRange.BIPPT156VOLTS,
+             ULRange.BIPPT078VOLTS]
+AO_RANGES = [ULRange.BIP10VOLTS]
+
+ANALOG_TYPES = [ChannelType.ANALOG, ChannelType.ANALOG_SE, ChannelType.ANALOG_DIFF]
+DIGITAL_TYPES = [ChannelType.DIGITAL, ChannelType.DIGITAL8]
+COUNTER_TYPES = [ChannelType.CTR, ChannelType.CTR16, ChannelType.CTR32LOW, ChannelType.CTR32HIGH]
+
+StatusResult = collections.namedtuple("StatusResult", "status cur_count cur_index")
+DaqInScanResult = collections.namedtuple("DaqInScanResult", "actual_rate actual_pretrig_count actual_total_count")
+
+
+class ULError(Exception):
+    def __init__(self, errorcode):
+        super(ULError, self).__init__()
+        self.errorcode = errorcode
+        self.message = get_err_msg(errorcode)
+
+    def __str__(self):
+        return "Error " + str(self.errorcode) + ": " + self.message
+
+
+def get_err_msg(error_code):
+    try:
+        return ErrorCode(error_code).name
+    except ValueError:
+        return "Unknown error"
+
+
+# Waveforms, modelled on waveforms/waveforms.ino: the Arduino alternates a
+# 50 Hz 0-5 V square wave and a 0-5 V sine (360 steps of 2 ms) every 5 s.
+
+def square_wave(t, freq=50.0, low=0.0, high=5.0):
+    return np.where((t * freq) % 1.0 < 0.5, high, low)
+
+
+def sine_wave(t, freq=1 / 0.72, offset=2.5, amplitude=2.5):
+    return offset + amplitude * np.sin(2 * np.pi * freq * t)
+
+
+def arduino_wave(t, period=5.0):
+    return np.where((t // period) % 2 == 0, square_wave(t), sine_wave(t))
+
+
+def default_waveform(chan):
+    if chan == 0:
+        return arduino_wave
+    if chan == 1:
+        return sine_wave
+    if chan == 2:
+        return square_wave
+    return lambda t: np.sin(2 * np.pi * chan * t)
+
+
+class _Scan:
+    """One background scan writing into a window buffer in real time.
+
+    Input channels are AI channel numbers, or (ChannelType, number) pairs
+    for daq_in_scan.
+    """
+
+    def __init__(self, board, channels, count, rate, ul_range, memhandle, options, function_type):
+        self.board = board
+        self.channels = channels
+        self.num_chans = len(channels)
+        self.count = count
+        self.rate = rate
+        self.ul_range = ul_range
+        self.buffer = _buffers[memhandle]
+        self.options = options
+        self.function_type = function_type
+        self.continuous = bool(options & ScanOptions.CONTINUOUS)
+        self.cur_count = 0
+        self.running = True
+        self.start_time = time.monotonic()
+        # A board crystal is never exactly on frequency
+        self.clock_scale = 1.0 + board.clock_ppm * 1e-6
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self.options & ScanOptions.BACKGROUND:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        else:
+            # Foreground scans block for as long as the hardware would
+            time.sleep(self.count / self.num_chans / self.rate)
+            self._fill(self.count)
+            self.running = False
+
+    def stop(self):
+        self.running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+
+    def status(self):
+        with self._lock:
+            cur_count = self.cur_count
+        if cur_count >= self.num_chans:
+            cur_index = (cur_count - cur_count % self.num_chans - self.num_chans) % self.count
+        else:
+            cur_index = -1
+        # The UL reports counts as a 32-bit C long
+        cur_count = ctypes.c_int32(cur_count).value
+        return StatusResult(Status.RUNNING if self.running else Status.IDLE, cur_count, cur_index)
+
+    def _run(self):
+        while self.running:
+            elapsed = time.monotonic() - self.start_time
+            target = int(elapsed * self.rate * self.clock_scale) * self.num_chans
+            if not self.continuous:
+                target = min(target, self.count)
+            if target > self.cur_count:
+                self._fill(target)
+            if not self.continuous and self.cur_count >= self.count:
+                self.running = False
+                break
+            time.sleep(FILL_INTERVAL)
+
+    def _fill(self, target):
+        # Anything older than one buffer length would be overwritten anyway
+        first = max(self.cur_count, target - self.count)
+        first -= first % self.num_chans
+        if self.function_type in (FunctionType.AIFUNCTION, FunctionType.DAQIFUNCTION):
+            scans = np.arange(first // self.num_chans, target // self.num_chans)
+            t = scans / self.rate
+            values = np.empty((len(scans), self.num_chans))
+            for i, chan in enumerate(self.channels):
+                values[:, i] = self._sample(chan, t)
+            self._write(first, _to_buffer_type(self.buffer, values.ravel(), self.ul_range, self.options))
+        else:
+            self.board.ao_values = _read_back(self.buffer, (target - self.num_chans) % self.count,
+                                              self.num_chans, self.ul_range, self.options)
+        with self._lock:
+            self.cur_count = target
+
+    def _sample(self, chan, t):
+        chan_type, chan = chan if isinstance(chan, tuple) else (ChannelType.ANALOG, chan)
+        if chan_type == ChannelType.CJC:
+            return np.full(len(t), self.board.cjc_temperature)
+        if chan_type == ChannelType.PADZERO:
+            return np.zeros(len(t))
+        if chan_type in DIGITAL_TYPES or chan_type in COUNTER_TYPES:
+            # Same signals as d_in/c_in, on the scan's own clock
+            elapsed = self.start_time - self.board.counter_start + t
+            if chan_type in DIGITAL_TYPES:
+                return self.board.ports[chan] | ((elapsed.astype(np.int64) % 2) << 7)
+            counts = (elapsed * self.board.counter_freqs[chan]).astype(np.int64) - self.board.counter_offsets[chan]
+            if chan_type == ChannelType.CTR32HIGH:
+                return (counts >> 16) & 0xFFFF
+            if chan_type == ChannelType.CTR:
+                return counts & 0xFFFFFFFF
+            return counts & 0xFFFF
+        return self.board.waveform(chan)(t) + self.board.noise * self.board.rng.standard_normal(len(t))
+
+    def _write(self, first, samples):
+        start = first % self.count
+        end = start + len(samples)
+        if end <= self.count:
+            self.buffer[start:end] = samples
+        else:
+            split = self.count - start
+            self.buffer[start:] = samples[:split]
+            self.buffer[:end - self.count] = samples[split:]
+
+
+class _Board:
+    def __init__(self, descriptor):
+        self.descriptor = descriptor
+        self.config = {}
+        self.scans = {}
+        self.ports = collections.defaultdict(int)
+        self.counter_freqs = collections.defaultdict(lambda: 100.0)
+        self.counter_start = time.monotonic()
+        self.counter_offsets = collections.defaultdict(int)
+        self.ao_values = np.zeros(NUM_AO_CHANS)
+        self.waveforms = {}
+        self.noise = 0.005
+        self.cjc_temperature = 23.0
+        self.clock_ppm = 0.0
+        self.rng = np.random.default_rng(0)
+
+    def waveform(self, chan):
+        return self.waveforms.get(chan) or default_waveform(chan)
+
+
+_buffers = {}
+_boards = {}
+_unplugged = set()
+_lock = threading.Lock()
+
+
+def _board(board_num):
+    try:
+        board = _boards[board_num]
+    except KeyError:
+        raise ULError(ErrorCode.BADBOARD)
+    if board.descriptor.unique_id in _unplugged:
+        raise ULError(ErrorCode.DEADDEV)
+    return board
+
+
+def _check_range(ul_range, supported):
+    if ul_range not in supported:
+        raise ULError(ErrorCode.BADRANGE)
+
+
+def _alloc(ctype, count):
+    array = np.zeros(count, dtype=ctype)
+    memhandle = array.ctypes.data
+    _buffers[memhandle] = array
+    return memhandle
+
+
+def _to_buffer_type(buffer, volts, ul_range, options):
+    if buffer.dtype.kind == 'f':
+        return volts
+    return to_counts(volts, ul_range, buffer.dtype)
+
+
+def to_counts(volts, ul_range, dtype=np.uint32):
+    bits = 16 if np.dtype(dtype).itemsize == 2 else AD_RESOLUTION
+    span = ul_range.range_max - ul_range.range_min
+    counts = np.rint((np.asarray(volts) - ul_range.range_min) / span * (2 ** bits - 1))
+    return np.clip(counts, 0, 2 ** bits - 1).astype(dtype)
+
+
+def _read_back(buffer, first, num_chans, ul_range, options):
+    samples = buffer[first:first + num_chans].astype(np.float64)
+    if buffer.dtype.kind == 'f':
+        return samples
+    bits = 16 if buffer.dtype.itemsize == 2 else AD_RESOLUTION
+    span = ul_range.range_max - ul_range.range_min
+    return ul_range.range_min + samples / (2 ** bits - 1) * span
+
+
+# Device discovery
+
+def ignore_instacal():
+    pass
+
+
+def get_daq_device_inventory(interface_type, number_of_devices=100):
+    descriptor = DaqDeviceDescriptor()
+    descriptor.product_name = PRODUCT_NAME
+    descriptor.product_id = PRODUCT_ID
+    descriptor.interface_type = InterfaceType.USB
+    descriptor.dev_string = PRODUCT_NAME
+    descriptor.unique_id = "SIM00001"
+    if descriptor.unique_id in _unplugged:
+        return []
+    return [descriptor][:number_of_devices]
+
+
+def create_daq_device(board_num, descriptor):
+    with _lock:
+        _boards[board_num] = _Board(descriptor)
+
+
+def release_daq_device(board_num):
+    with _lock:
+        board = _boards.pop(board_num, None)
+    if board:
+        for scan in board.scans.values():
+            scan.stop()
+
+
+def get_board_name(board_num):
+    return _board(board_num).descriptor.product_name
+
+
+def get_config(info_type, board_num, dev_num, config_item):
+    board = _board(board_num)
+    key = (info_type, dev_num, config_item)
+    if key in board.config:
+        return board.config[key]
+    defaults = {
+        BoardInfo.BOARDTYPE: PRODUCT_ID,
+        BoardInfo.NUMADCHANS: NUM_AI_CHANS,
+        BoardInfo.NUMDACHANS: NUM_AO_CHANS,
+        BoardInfo.ADRES: AD_RESOLUTION,
+        BoardInfo.RANGE: -1,
+        BoardInfo.NUMTEMPCHANS: NUM_AI_CHANS,
+        BoardInfo.ADDATARATE: 1000,
+    }
+    return defaults.get(config_item, 0)
+
+
+def set_config(info_type, board_num, dev_num, config_item, config_val):
+    # cbSetConfig's argtypes are all c_int, which rejects floats
+    if not isinstance(config_val, int):
+        raise ctypes.ArgumentError(f"argument 5: TypeError: wrong type ({config_val!r})")
+    _board(board_num).config[(info_type, dev_num, config_item)] = config_val
+
+
+def get_config_string(info_type, board_num, dev_num, config_item, max_config_len):
+    board = _board(board_num)
+    if config_item == BoardInfo.DEVUNIQUEID:
+        return board.descriptor.unique_id
+    return board.descriptor.product_name
+
+
+def a_chan_input_mode(board_num, channel, input_mode):
+    _board(board_num).config[(InfoType.BOARDINFO, channel, "input_mode")] = input_mode
+
+
+def disable_event(board_num, event_type):
+    _board(board_num)
+
+
+def a_load_queue(board_num, chan_list, gain_list, count):
+    _board(board_num)
+
+
+# Window buffers
+
+def win_buf_alloc(num_points):
+    return _alloc(np.uint16, num_points)
+
+
+def win_buf_alloc_32(num_points):
+    return _alloc(np.uint32, num_points)
+
+
+def scaled_win_buf_alloc(num_points):
+    return _alloc(np.float64, num_points)
+
+
+def win_buf_free(memhandle):
+    _buffers.pop(memhandle, None)
+
+
+def _copy_out(memhandle, data_array, first_point, count):
+    source = _buffers[memhandle]
+    if isinstance(data_array, np.ndarray):
+        data_array[:count] = source[first_point:first_point + count]
+        return
+    address = data_array if isinstance(data_array, int) else ctypes.cast(data_array, ctypes.c_void_p).value
+    ctypes.memmove(address, source.ctypes.data + first_point * source.itemsize, count * source.itemsize)
+
+
+def _copy_in(data_array, memhandle, first_point, count):
+    target = _buffers[memhandle]
+    if isinstance(data_array, np.ndarray):
+        target[first_point:first_point + count] = data_array[:count]
+        return
+    address = data_array if isinstance(data_array, int) else ctypes.cast(data_array, ctypes.c_void_p).value
+    ctypes.memmove(target.ctypes.data + first_point * target.itemsize, address, count * target.itemsize)
+
+
+scaled_win_buf_to_array = _copy_out
+win_buf_to_array = _copy_out
+win_buf_to_array_32 = _copy_out
+scaled_win_array_to_buf = _copy_in
+win_array_to_buf = _copy_in
+
+
+# Analog input
+
+def a_in_scan(board_num, low_chan, high_chan, num_points, rate, ul_range, memhandle, options):
+    board = _board(board_num)
+    if memhandle not in _buffers:
+        raise ULError(ErrorCode.BAD_MEM_HANDLE)
+    if high_chan < low_chan or high_chan >= NUM_AI_CHANS:
+        raise ULError(ErrorCode.BADADCHAN)
+    if rate <= 0:
+        raise ULError(ErrorCode.BADRATE)
+    _check_range(ul_range, AI_RANGES)
+    _start(board, FunctionType.AIFUNCTION,
+           _Scan(board, list(range(low_chan, high_chan + 1)), num_points, rate, ul_range, memhandle, options,
+                 FunctionType.AIFUNCTION))
+    return int(rate)
+
+
+def daq_in_scan(board_num, chan_list, chan_type_list, gain_list, chan_count, rate, pretrig_count, total_count,
+                memhandle, options):
+    board = _board(board_num)
+    if memhandle not in _buffers:
+        raise ULError(ErrorCode.BAD_MEM_HANDLE)
+    if rate <= 0:
+        raise ULError(ErrorCode.BADRATE)
+    channels = []
+    for chan, chan_type, gain in zip(chan_list[:chan_count], chan_type_list[:chan_count], gain_list[:chan_count]):
+        if chan_type in ANALOG_TYPES:
+            if not 0 <= chan < NUM_AI_CHANS:
+                raise ULError(ErrorCode.BADADCHAN)
+            _check_range(gain, AI_RANGES)
+        elif chan_type in DIGITAL_TYPES:
+            if chan != DigitalPortType.FIRSTPORTA:
+                raise ULError(ErrorCode.BADPORTNUM)
+        elif chan_type in COUNTER_TYPES:
+            if not 0 <= chan < NUM_COUNTERS:
+                raise ULError(ErrorCode.BADCOUNTERDEVNUM)
+        elif chan_type not in (ChannelType.CJC, ChannelType.PADZERO):
+            raise ULError(ErrorCode.BADCHANTYPE)
+        channels.append((chan_type, chan))
+    total_count -= total_count % chan_count
+    _start(board, FunctionType.DAQIFUNCTION,
+           _Scan(board, channels, total_count, rate, gain_list[0], memhandle, options, FunctionType.DAQIFUNCTION))
+    return DaqInScanResult(int(rate), pretrig_count, total_count)
+
+
+def _start(board, function_type, scan):
+    previous = board.scans.get(function_type)
+    if previous is not None and previous.running:
+        raise ULError(ErrorCode.ALREADYACTIVE)
+    board.scans[function_type] = scan
+    scan.start()
+
+
+def get_status(board_num, function_type):
+    scan = _board(board_num).scans.get(function_type)
+    if scan is None:
+        return StatusResult(Status.IDLE, 0, 0)
+    return scan.status()
+
+
+def stop_background(board_num, function_type):
+    scan = _board(board_num).scans.get(function_type)
+    if scan is not None:
+        scan.stop()
+
+
+def v_in(board_num, channel, ul_range, options=0):
+    board = _board(board_num)
+    _check_range(ul_range, AI_RANGES)
+    return float(board.waveform(channel)(np.array([time.monotonic() - board.counter_start]))[0])
+
+
+def a_in(board_num, channel, ul_range):
+    return int(to_counts(v_in(board_num, channel, ul_range), ul_range, np.uint16))
+
+
+def a_in_32(board_num, channel, ul_range, options=0):
+    return int(to_counts(v_in(board_num, channel, ul_range), ul_range, np.uint32))
+
+
+def t_in(board_num, channel, scale, options=0):
+    _board(board_num)
+    return 22.0 + 0.5 * math.sin(time.monotonic() / 60.0)
+
+
+# Analog output
+
+def a_out_scan(board_num, low_chan, high_chan, num_points, rate, ul_range, memhandle, options):
+    board = _board(board_num)
+    if memhandle not in _buffers:
+        raise ULError(ErrorCode.BAD_MEM_HANDLE)
+    if high_chan < low_chan or high_chan >= NUM_AO_CHANS:
+        raise ULError(ErrorCode.BADDACHAN)
+    _check_range(ul_range, AO_RANGES)
+    _start(board, FunctionType.AOFUNCTION,
+           _Scan(board, list(range(low_chan, high_chan + 1)), num_points, rate, ul_range, memhandle, options,
+                 FunctionType.AOFUNCTION))
+    return int(rate)
+
+
+def v_out(board_num, channel, ul_range, data_value, options=0):
+    _board(board_num).ao_values[channel] = data_value
+
+
+def a_out(board_num, channel, ul_range, data_value):
+    v_out(board_num, channel, ul_range, to_eng_units(board_num, ul_range, data_value))
+
+
+def from_eng_units(board_num, ul_range, eng_units_value):
+    return int(to_counts(eng_units_value, ul_range, np.uint16))
+
+
+def to_eng_units(board_num, ul_range, data_value):
+    span = ul_range.range_max - ul_range.range_min
+    return ul_range.range_min + data_value / (2 ** 16 - 1) * span
+
+
+# Digital I/O
+
+def d_config_port(board_num, port_type, direction):
+    _board(board_num)
+
+
+def d_config_bit(board_num, port_type, bit_num, direction):
+    _board(board_num)
+
+
+def d_in(board_num, port_type):
+    board = _board(board_num)
+    # Bit 7 toggles at 1 Hz so input indicators have something to show
+    toggle = int(time.monotonic() - board.counter_start) % 2
+    return board.ports[port_type] | (toggle << 7)
+
+
+def d_bit_in(board_num, port_type, bit_num):
+    return (d_in(board_num, port_type) >> bit_num) & 1
+
+
+def d_out(board_num, port_type, data_value):
+    _board(board_num).ports[port_type] = data_value & 0xFF
+
+
+def d_bit_out(board_num, port_type, bit_num, bit_value):
+    board = _board(board_num)
+    if bit_value:
+        board.ports[port_type] |= 1 << bit_num
+    else:
+        board.ports[port_type] &= ~(1 << bit_num)
+
+
+# Counters
+
+def _counts(board_num, counter_num, elapsed=None):
+    board = _board(board_num)
+    if elapsed is None:
+        elapsed = time.monotonic() - board.counter_start
+    return int(elapsed * board.counter_freqs[counter_num]) - board.counter_offsets[counter_num]
+
+
+def c_in(board_num, counter_num):
+    return _counts(board_num, counter_num) & 0xFFFF
+
+
+def c_in_32(board_num, counter_num):
+    return _counts(board_num, counter_num) & 0xFFFFFFFF
+
+
+def c_clear(board_num, counter_num):
+    board = _board(board_num)
+    board.counter_offsets[counter_num] += _counts(board_num, counter_num)
+
+
+def c_load_32(board_num, reg_num, load_value):
+    c_clear(board_num, reg_num)
+    _board(board_num).counter_offsets[reg_num] -= load_value
+
+
+# Simulation controls (not part of mcculw.ul)
+
+def set_waveform(board_num, channel, func):
+    """Replace the signal on an input channel; func maps seconds to volts."""
+    _board(board_num).waveforms[channel] = func
+
+
+def set_cjc_temperature(board_num, celsius):
+    """Set the cold-junction temperature returned by CJC scan channels."""
+    _board(board_num).cjc_temperature = celsius
+
+
+def set_clock_error(board_num, ppm):
+    """Make scans started from now on run `ppm` parts per million fast (negative: slow)."""
+    _board(board_num).clock_ppm = ppm
+
+
+def set_counter_frequency(board_num, counter_num, freq):
+    """Set the simulated pulse rate, in Hz, seen by a counter input."""
+    board = _board(board_num)
+    elapsed = time.monotonic() - board.counter_start
+    counts = _counts(board_num, counter_num, elapsed)
+    board.counter_freqs[counter_num] = freq
+    board.counter_offsets[counter_num] = int(elapsed * freq) - counts
+
+
+def unplug(unique_id="SIM00001"):
+    """Pull the simulated board off USB: scans stop and every call on it fails."""
+    with _lock:
+        _unplugged.add(unique_id)
+        boards = [board for board in _boards.values() if board.descriptor.unique_id == unique_id]
+    for board in boards:
+        for scan in board.scans.values():
+            scan.stop()
+
+
+def replug(unique_id="SIM00001"):
+    """Plug the board back in; it has to be created again, as after a real hot-plug."""
+    with _lock:
+        _unplugged.discard(unique_id)
+        for board_num, board in list(_boards.items()):
+            if board.descriptor.unique_id == unique_id:
+                del _boards[board_num]
+
+
+def install():
+    """Make ``from mcculw import ul`` return this module."""
+    import mcculw
+    module = sys.modules[__name__]
+    sys.modules['mcculw.ul'] = module
+    mcculw.ul = module
+    return module
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("usage: python simulated_ul.py script.py [args...]")
+        sys.exit(1)
+    install()
+    sys.argv = sys.argv[1:]
+    # Behave like `python script.py`: the script's folder comes first on sys.path
+    sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[0])))
+    runpy.run_path(sys.argv[0], run_name='__main__')
@@ -0,0 +1,109 @@
+# spectrum.py
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+WINDOWS = {
+    "hann": np.hanning,
+    "hamming": np.hamming,
+    "blackman": np.blackman,
+    "rectangular": np.ones,
+}
+AVERAGING = ["exponential", "linear"]
+
+_windows = {}
+_log_bins = {}
+
+
+def get_window(name, size):
+    """Window array for a segment length, built once and cached."""
+    key = (name, size)
+    if key not in _windows:
+        _windows[key] = WINDOWS[name](size)
+    return _windows[key]
+
+
+class WelchSpectrum:
+    """Streaming Welch power spectral density for every channel of a stream.
+
+    Samples are cut into `nperseg`-long segments overlapping by `overlap`
+    (a fraction), windowed with a cached window and transformed with
+    rfft, all channels and all segments completed by a block at once.
+    Each segment's one-sided PSD (V^2/Hz) is then averaged into `psd`:
+    exponentially with weight 1/`num_averages`, or linearly over every
+    segment since reset(). Only new segments are transformed, never the
+    whole history.
+    """
+
+    def __init__(self, num_chans, rate, nperseg=1024, overlap=0.5, window="hann", averaging="exponential",
+                 num_averages=8):
+        if averaging not in AVERAGING:
+            raise ValueError(f"Unknown averaging {averaging}, expected one of {', '.join(AVERAGING)}")
+        self.num_chans = num_chans
+        self.rate = rate
+        self.nperseg = nperseg
+        self.step = max(int(round(nperseg * (1 - overlap))), 1)
+        self.window = get_window(window, nperseg)
+        self.averaging = averaging
+        self.num_averages = num_averages
+        self.freqs = np.fft.rfftfreq(nperseg, 1.0 / rate)
+
+        # One-sided density: every bin but DC (and Nyquist, for even lengths) is doubled
+        self._scale = np.full(len(self.freqs), 2.0 / (rate * np.sum(self.window ** 2)))
+        self._scale[0] /= 2
+        if nperseg % 2 == 0:
+            self._scale[-1] /= 2
+        self.reset()
+
+    def reset(self):
+        self.psd = np.zeros((self.num_chans, len(self.freqs)))
+        self.segments = 0
+        self._pending = np.empty((self.num_chans, 0))
+
+    @property
+    def enbw(self):
+        """Equivalent noise bandwidth of one bin in Hz."""
+        return self.rate * np.sum(self.window ** 2) / np.sum(self.window) ** 2
+
+    def rms_spectrum(self):
+        """RMS amplitude per bin in V, so a mains line reads its actual level."""
+        return np.sqrt(self.psd * self.enbw)
+
+    def append(self, data):
+        """Add a (num_chans, n) block; returns how many new segments were averaged in."""
+        samples = np.concatenate((self._pending, data), axis=1) if self._pending.shape[1] else data
+        count = (samples.shape[1] - self.nperseg) // self.step + 1 if samples.shape[1] >= self.nperseg else 0
+        if count:
+            segments = sliding_window_view(samples, self.nperseg, axis=1)[:, ::self.step][:, :count]
+            power = np.abs(np.fft.rfft(segments * self.window, axis=-1)) ** 2
+            power *= self._scale
+            for k in range(count):
+                self._average(power[:, k])
+        self._pending = samples[:, count * self.step:].copy()
+        return count
+
+    def _average(self, power):
+        self.segments += 1
+        if self.averaging == "linear":
+            weight = 1.0 / self.segments
+        else:
+            # Start as a linear average so the first frames are not biased towards zero
+            weight = 1.0 / min(self.segments, self.num_averages)
+        self.psd += weight * (power - self.psd)
+
+
+def log_decimate(freqs, values, points=400):
+    """Reduce a spectrum to about `points` log-spaced bins for display.
+
+    Each display bin keeps the maximum of the bins it covers, so narrow
+    lines (mains, pump harmonics) survive at every zoom. The bin edges
+    only depend on the frequency axis and are cached. DC is dropped, as a
+    log axis cannot show it. Returns (freqs, values[..., bins]).
+    """
+    key = (len(freqs), freqs[-1], points)
+    if key not in _log_bins:
+        edges = np.geomspace(freqs[1], freqs[-1], points + 1)
+        starts = np.unique(np.searchsorted(freqs, edges[:-1]))
+        starts = starts[starts < len(freqs)]
+        _log_bins[key] = (starts, freqs[starts])
+    starts, display_freqs = _log_bins[key]
+    return display_freqs, np.maximum.reduceat(values, starts, axis=-1)
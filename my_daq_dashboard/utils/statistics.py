@@ -0,0 +1,114 @@
+# statistics.py
+import collections
+
+import numpy as np
+
+
+class RunningStats:
+    """Per-channel count, mean, M2, min and max of a stream of blocks.
+
+    Blocks are reduced with NumPy and folded in with the parallel form of
+    Welford's update (Chan et al.), so the variance stays accurate for
+    long runs with a large DC offset and no per-sample Python loop runs.
+    """
+
+    def __init__(self, num_chans):
+        self.num_chans = num_chans
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = np.zeros(self.num_chans)
+        self.m2 = np.zeros(self.num_chans)
+        self.minimum = np.full(self.num_chans, np.inf)
+        self.maximum = np.full(self.num_chans, -np.inf)
+
+    @classmethod
+    def from_block(cls, data):
+        """Stats of one (num_chans, n) block."""
+        stats = cls(data.shape[0])
+        n = data.shape[1]
+        if n:
+            stats.count = n
+            stats.mean = data.mean(axis=1)
+            stats.m2 = ((data - stats.mean[:, None]) ** 2).sum(axis=1)
+            stats.minimum = data.min(axis=1)
+            stats.maximum = data.max(axis=1)
+        return stats
+
+    def add(self, data):
+        self.merge(RunningStats.from_block(data))
+
+    def merge(self, other):
+        if not other.count:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.count / total)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (self.count * other.count / total)
+        self.count = total
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else np.full(self.num_chans, np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def rms(self):
+        # mean(x^2) = mean^2 + population variance
+        return np.sqrt(self.mean ** 2 + self.variance)
+
+    @property
+    def peak_to_peak(self):
+        return self.maximum - self.minimum
+
+    def channel(self, row):
+        """Summary of one channel as a dict, for labels and logs."""
+        return {"mean": self.mean[row], "rms": self.rms[row], "std": self.std[row], "min": self.minimum[row],
+                "max": self.maximum[row], "p2p": self.peak_to_peak[row], "count": self.count}
+
+
+class WindowedStats:
+    """Running statistics over the newest `window_seconds` of a stream.
+
+    Each appended block is summarised once; window() merges the block
+    summaries that cover the window, so the window moves in whole blocks
+    (one engine poll, ~50 ms) and the cost of a query depends only on how
+    many blocks the window spans. `total` keeps the stats since reset().
+    """
+
+    def __init__(self, num_chans, rate, window_seconds=1.0):
+        self.num_chans = num_chans
+        self.rate = rate
+        self.window_seconds = window_seconds
+        self.total = RunningStats(num_chans)
+        self._blocks = collections.deque()
+        self._window_count = 0
+
+    def append(self, data):
+        """Add a (num_chans, n) block of samples."""
+        if data.shape[1] == 0:
+            return
+        stats = RunningStats.from_block(data)
+        self.total.merge(stats)
+        self._blocks.append(stats)
+        self._window_count += stats.count
+        limit = max(int(self.window_seconds * self.rate), 1)
+        while self._window_count - self._blocks[0].count >= limit:
+            self._window_count -= self._blocks.popleft().count
+
+    def window(self):
+        stats = RunningStats(self.num_chans)
+        for block in self._blocks:
+            stats.merge(block)
+        return stats
+
+    def reset(self):
+        self.total.reset()
+        self._blocks.clear()
+        self._window_count = 0
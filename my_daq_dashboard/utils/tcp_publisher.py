@@ -0,0 +1,266 @@
+# tcp_publisher.py
+"""Publish the acquisition stream to remote subscribers over the PyMoDAQ TCP protocol.
+
+Every message uses PyMoDAQ's serializer framing, the same way a TCPClient
+sends grabbed data: the string 'Done' followed by a DataToExport with one
+Data1D per channel and a time axis in seconds since the scan started.
+
+A subscriber connects, sends its client type string (e.g. 'GRABBER') and
+then only reads. It may send 'set_decimation' followed by an integer to
+receive every Nth scan, or 'Quit'. See receive() for a client.
+
+pymodaq is only needed when a publisher or subscriber actually runs.
+"""
+import select
+import socket
+import threading
+
+import numpy as np
+
+from .acquisition import BlockQueue
+
+DEFAULT_PORT = 6341
+
+
+def decimate_block(block, factor):
+    """Every `factor`-th scan of a DataBlock, counted from the start of the scan.
+
+    Returns (indices, data). Decimating on the absolute scan index keeps the
+    output evenly spaced across blocks of any length, so every client with
+    the same factor receives the same samples.
+    """
+    if factor <= 1:
+        return block.start_index + np.arange(block.data.shape[1]), block.data
+    first = -block.start_index % factor
+    data = block.data[:, first::factor]
+    return block.start_index + first + factor * np.arange(data.shape[1]), data
+
+
+def to_dte(block, rate, factor=1, name="USB2416"):
+    """DataToExport of a (decimated) DataBlock, or None if no scan survives decimation."""
+    from pymodaq.utils.data import Axis, DataFromPlugins, DataToExport
+
+    indices, data = decimate_block(block, factor)
+    if not data.shape[1]:
+        return None
+    time_axis = Axis('Time', units='s', data=indices / rate, index=0)
+    return DataToExport(name, data=[
+        DataFromPlugins(name=name, data=list(data), dim='Data1D', axes=[time_axis],
+                        labels=[f'AI{chan}' for chan in block.channels])])
+
+
+class RemoteClient:
+    """One connected subscriber: its own drop-oldest queue and sender thread.
+
+    A slow or stalled client only loses its own oldest blocks; the engine,
+    the local recorder and the other clients never wait on its socket.
+    """
+
+    def __init__(self, publisher, sock, address, client_type, decimation=1, maxsize=64):
+        from pymodaq.utils.tcp_ip.mysocket import Socket
+
+        self.publisher = publisher
+        self.socket = Socket(sock)
+        self.address = address
+        self.client_type = client_type
+        self.decimation = decimation
+        self.queue = BlockQueue(maxsize)
+        self.sent = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def dropped(self):
+        return self.queue.dropped
+
+    def _run(self):
+        try:
+            while not self.closed:
+                self._read_commands()
+                block = self.queue.get(timeout=0.2)
+                if block is None:
+                    continue
+                payload = self.publisher.encode(block, self.decimation)
+                if payload:
+                    self.socket.check_sended(payload)
+                    self.sent += 1
+        except Exception as e:
+            if not self.closed:
+                print(f"Subscriber {self.address[0]}:{self.address[1]} disconnected: {e}")
+        finally:
+            self.publisher.remove(self)
+
+    def _read_commands(self):
+        from pymodaq.utils.tcp_ip.serializer import DeSerializer
+
+        while select.select([self.socket.socket], [], [], 0)[0]:
+            # Readable with nothing to read means the subscriber closed its end
+            if not self.socket.socket.recv(1, socket.MSG_PEEK):
+                raise ConnectionError("closed by the subscriber")
+            deserializer = DeSerializer(self.socket)
+            message = deserializer.string_deserialization()
+            if message == 'set_decimation':
+                self.decimation = max(int(deserializer.scalar_deserialization()), 1)
+            elif message == 'Infos':
+                # A PyMoDAQ TCPClient sends its settings after connecting; nothing to apply here
+                deserializer.string_deserialization()
+            elif message == 'Quit':
+                raise ConnectionError("closed by the subscriber")
+
+    def close(self):
+        self.closed = True
+        try:
+            self.socket.close()
+        except Exception:
+            pass
+
+
+class StreamPublisher:
+    """TCP server that fans the engine's blocks out to any number of subscribers.
+
+    The publisher holds one engine subscription; a fan-out thread copies
+    each block reference into every client's queue. Serialization happens
+    in the client threads and is shared by clients with the same decimation.
+    """
+
+    def __init__(self, engine, channels, port=DEFAULT_PORT, host="", decimation=1, maxsize=64):
+        self.engine = engine
+        self.channels = sorted(set(channels))
+        self.port = port
+        self.host = host
+        self.decimation = decimation
+        self.maxsize = maxsize
+        self.clients = []
+        self.subscription = None
+
+        self._server = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._encoded = {}
+
+    def start(self):
+        # A missing pymodaq or a busy port fails here, before any thread is started
+        import pymodaq.utils.tcp_ip.serializer  # noqa: F401
+
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self._server.bind((self.host, self.port))
+        except OSError:
+            self._server.close()
+            self._server = None
+            raise
+        self._server.listen(5)
+        self.port = self._server.getsockname()[1]
+        self._stop.clear()
+        self.subscription = self.engine.subscribe(self.channels, maxsize=self.maxsize)
+        self._threads = [threading.Thread(target=target, daemon=True) for target in (self._accept, self._fan_out)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+        with self._lock:
+            clients = list(self.clients)
+        for client in clients:
+            client.close()
+        if self.subscription:
+            self.subscription.close()
+            self.subscription = None
+        if self._server:
+            self._server.close()
+            self._server = None
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    def _accept(self):
+        from pymodaq.utils.tcp_ip.mysocket import Socket
+        from pymodaq.utils.tcp_ip.serializer import DeSerializer
+
+        while not self._stop.is_set():
+            if not select.select([self._server], [], [], 0.2)[0]:
+                continue
+            sock, address = self._server.accept()
+            try:
+                # A client that connects but never identifies itself must not hold up the others
+                sock.settimeout(2)
+                if not sock.recv(1, socket.MSG_PEEK):
+                    raise ConnectionError("closed before identifying")
+                client_type = DeSerializer(Socket(sock)).string_deserialization()
+                # Sends can block on a stalled subscriber; past this it is dropped
+                sock.settimeout(10)
+            except Exception as e:
+                print(f"Error accepting subscriber {address[0]}:{address[1]}: {e}")
+                sock.close()
+                continue
+            client = RemoteClient(self, sock, address, client_type, self.decimation, self.maxsize)
+            with self._lock:
+                self.clients.append(client)
+            client.thread.start()
+            print(f"{client_type} subscribed from {address[0]}:{address[1]}")
+
+    def _fan_out(self):
+        while not self._stop.is_set():
+            block = self.subscription.get(timeout=0.2)
+            if block is None:
+                continue
+            with self._lock:
+                clients = list(self.clients)
+            for client in clients:
+                client.queue.put(block)
+
+    def encode(self, block, factor):
+        """'Done' plus the serialized DataToExport for a block, built once per decimation factor."""
+        from pymodaq.utils.tcp_ip.serializer import Serializer
+
+        with self._lock:
+            cached = self._encoded.get(factor)
+        if cached is not None and cached[0] is block:
+            return cached[1]
+        dte = to_dte(block, self.engine.actual_rate or self.engine.rate, factor)
+        payload = Serializer('Done').to_bytes() + Serializer(dte).to_bytes() if dte is not None else b''
+        with self._lock:
+            self._encoded[factor] = (block, payload)
+        return payload
+
+    def remove(self, client):
+        client.close()
+        with self._lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def status_text(self):
+        with self._lock:
+            clients = list(self.clients)
+        return (f"Publishing on port {self.port}: {len(clients)} subscribers, "
+                f"dropped {sum(client.dropped for client in clients)}")
+
+
+def receive(host, port=DEFAULT_PORT, decimation=1, client_type="GRABBER"):
+    """Yield the DataToExport objects published at host:port, e.g. on another workstation."""
+    from pymodaq.utils.tcp_ip.mysocket import Socket
+    from pymodaq.utils.tcp_ip.serializer import DeSerializer
+
+    sock = Socket(socket.create_connection((host, port)))
+    try:
+        sock.check_sended_with_serializer(client_type)
+        if decimation > 1:
+            sock.check_sended_with_serializer('set_decimation')
+            sock.check_sended_with_serializer(int(decimation))
+        deserializer = DeSerializer(sock)
+        # The deserializer would wait forever on a closed socket, so check for EOF first
+        while sock.socket.recv(1, socket.MSG_PEEK):
+            if deserializer.string_deserialization() == 'Done':
+                yield deserializer.dte_deserialization()
+    finally:
+        try:
+            sock.check_sended_with_serializer('Quit')
+        except OSError:
+            pass
+        sock.close()
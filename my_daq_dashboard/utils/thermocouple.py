@@ -0,0 +1,131 @@
+# thermocouple.py
+import numpy as np
+
+# NIST ITS-90 thermocouple polynomials (NIST Monograph 175).
+# INVERSE: (low mV, high mV, coefficients) giving degC from mV.
+# FORWARD: (low degC, high degC, coefficients) giving mV from degC, used to
+# turn the cold-junction temperature into the voltage it hides.
+INVERSE = {
+    "J": [
+        (-8.095, 0.0, [0.0, 1.9528268e1, -1.2286185, -1.0752178, -5.9086933e-1, -1.7256713e-1, -2.8131513e-2,
+                       -2.3963370e-3, -8.3823321e-5]),
+        (0.0, 42.919, [0.0, 1.978425e1, -2.001204e-1, 1.036969e-2, -2.549687e-4, 3.585153e-6, -5.344285e-8,
+                       5.099890e-10]),
+        (42.919, 69.553, [-3.11358187e3, 3.00543684e2, -9.94773230, 1.70276630e-1, -1.43033468e-3,
+                          4.73886084e-6]),
+    ],
+    "K": [
+        (-5.891, 0.0, [0.0, 2.5173462e1, -1.1662878, -1.0833638, -8.9773540e-1, -3.7342377e-1, -8.6632643e-2,
+                       -1.0450598e-2, -5.1920577e-4]),
+        (0.0, 20.644, [0.0, 2.508355e1, 7.860106e-2, -2.503131e-1, 8.315270e-2, -1.228034e-2, 9.804036e-4,
+                       -4.413030e-5, 1.057734e-6, -1.052755e-8]),
+        (20.644, 54.886, [-1.318058e2, 4.830222e1, -1.646031, 5.464731e-2, -9.650715e-4, 8.802193e-6,
+                          -3.110810e-8]),
+    ],
+    "T": [
+        (-5.603, 0.0, [0.0, 2.5949192e1, -2.1316967e-1, 7.9018692e-1, 4.2527777e-1, 1.3304473e-1, 2.0241446e-2,
+                       1.2668171e-3]),
+        (0.0, 20.872, [0.0, 2.592800e1, -7.602961e-1, 4.637791e-2, -2.165394e-3, 6.048144e-5, -7.293422e-7]),
+    ],
+    "E": [
+        (-8.825, 0.0, [0.0, 1.6977288e1, -4.3514970e-1, -1.5859697e-1, -9.2502871e-2, -2.6084314e-2,
+                       -4.1360199e-3, -3.4034030e-4, -1.1564890e-5]),
+        (0.0, 76.373, [0.0, 1.7057035e1, -2.3301759e-1, 6.5435585e-3, -7.3562749e-5, -1.7896001e-6,
+                       8.4036165e-8, -1.3735879e-9, 1.0629823e-11, -3.2447087e-14]),
+    ],
+    "N": [
+        (-3.990, 0.0, [0.0, 3.8436847e1, 1.1010485, 5.2229312, 7.2060525, 5.8488586, 2.7754916, 7.7075166e-1,
+                       1.1582665e-1, 7.3138868e-3]),
+        (0.0, 20.613, [0.0, 3.86896e1, -1.08267, 4.70205e-2, -2.12169e-6, -1.17272e-4, 5.39280e-6,
+                       -7.98156e-8]),
+        (20.613, 47.513, [1.972485e1, 3.300943e1, -3.915159e-1, 9.855391e-3, -1.274371e-4, 7.767022e-7]),
+    ],
+}
+
+FORWARD = {
+    "J": [
+        (-210.0, 760.0, [0.0, 5.0381187815e-2, 3.0475836930e-5, -8.5681065720e-8, 1.3228195295e-10,
+                         -1.7052958337e-13, 2.0948090697e-16, -1.2538395336e-19, 1.5631725697e-23]),
+    ],
+    "K": [
+        (-270.0, 0.0, [0.0, 3.9450128025e-2, 2.3622373598e-5, -3.2858906784e-7, -4.9904828777e-9,
+                       -6.7509059173e-11, -5.7410327428e-13, -3.1088872894e-15, -1.0451609365e-17,
+                       -1.9889266878e-20, -1.6322697486e-23]),
+        (0.0, 1372.0, [-1.7600413686e-2, 3.8921204975e-2, 1.8558770032e-5, -9.9457592874e-8, 3.1840945719e-10,
+                       -5.6072844889e-13, 5.6075059059e-16, -3.2020720003e-19, 9.7151147152e-23,
+                       -1.2104721275e-26]),
+    ],
+    "T": [
+        (-270.0, 0.0, [0.0, 3.8748106364e-2, 4.4194434347e-5, 1.1844323105e-7, 2.0032973554e-8,
+                       9.0138019559e-10, 2.2651156593e-11, 3.6071154205e-13, 3.8493939883e-15,
+                       2.8213521925e-17, 1.4251594779e-19, 4.8768662286e-22, 1.0795539270e-24,
+                       1.3945027062e-27, 7.9795153927e-31]),
+        (0.0, 400.0, [0.0, 3.8748106364e-2, 3.3292227880e-5, 2.0618243404e-7, -2.1882256846e-9,
+                      1.0996880928e-11, -3.0815758772e-14, 4.5479135290e-17, -2.7512901673e-20]),
+    ],
+    "E": [
+        (-270.0, 0.0, [0.0, 5.8665508708e-2, 4.5410977124e-5, -7.7998048686e-7, -2.5800160843e-8,
+                       -5.9452583057e-10, -9.3214058667e-12, -1.0287605534e-13, -8.0370123621e-16,
+                       -4.3979497391e-18, -1.6414776355e-20, -3.9673619516e-23, -5.5827328721e-26,
+                       -3.4657842013e-29]),
+        (0.0, 1000.0, [0.0, 5.8665508710e-2, 4.5032275582e-5, 2.8908407212e-8, -3.3056896652e-10,
+                       6.5024403270e-13, -1.9197495504e-16, -1.2536600497e-18, 2.1489217569e-21,
+                       -1.4388041782e-24, 3.5960899481e-28]),
+    ],
+    "N": [
+        (-270.0, 0.0, [0.0, 2.6159105962e-2, 1.0957484228e-5, -9.3841111554e-8, -4.6412039759e-11,
+                       -2.6303357716e-12, -2.2653438003e-14, -7.6089300791e-17, -9.3419667835e-20]),
+        (0.0, 1300.0, [0.0, 2.5929394601e-2, 1.5710141880e-5, 4.3825627237e-8, -2.5261169794e-10,
+                       6.4311819339e-13, -1.0063471519e-15, 9.9745338992e-19, -6.0863245607e-22,
+                       2.0849229339e-25, -3.0682196151e-29]),
+    ],
+}
+
+# Type K's forward function above 0 degC adds a0 * exp(a1 * (t - a2) ** 2)
+K_EXPONENTIAL = (1.185976e-1, -1.183432e-4, 1.269686e2)
+
+SUPPORTED_TYPES = sorted(INVERSE)
+
+
+def _piecewise(x, pieces):
+    """Evaluate a piecewise polynomial on an array; NaN outside every piece."""
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    for low, high, coefficients in pieces:
+        mask = (x >= low) & (x <= high)
+        if mask.all():
+            # The common case, one piece covers the whole block: no fancy indexing
+            return np.polynomial.polynomial.polyval(x, coefficients)
+        if mask.any():
+            out[mask] = np.polynomial.polynomial.polyval(x[mask], coefficients)
+    return out
+
+
+def celsius_to_mv(tc_type, celsius):
+    """Thermocouple EMF in mV for a junction at `celsius` referenced to 0 degC."""
+    mv = _piecewise(celsius, FORWARD[tc_type])
+    if tc_type == "K":
+        a0, a1, a2 = K_EXPONENTIAL
+        celsius = np.asarray(celsius, dtype=np.float64)
+        mv = mv + np.where(celsius > 0, a0 * np.exp(a1 * (celsius - a2) ** 2), 0.0)
+    return mv
+
+
+def mv_to_celsius(tc_type, mv):
+    """Junction temperature in degC for an EMF in mV referenced to 0 degC."""
+    return _piecewise(mv, INVERSE[tc_type])
+
+
+def tc_to_celsius(tc_type, volts, cjc_celsius):
+    """Convert raw thermocouple voltages to degC with cold-junction compensation.
+
+    `volts` is an array of measured thermocouple voltages and `cjc_celsius`
+    the cold-junction temperature (a scalar or an array broadcastable to
+    `volts`). The CJC temperature is turned into its equivalent EMF with the
+    forward polynomial, added to the measured EMF, and the sum is converted
+    back with the inverse polynomial. Voltages outside the type's range
+    (e.g. an open thermocouple at the rail) come back as NaN.
+    """
+    if tc_type not in INVERSE:
+        raise ValueError(f"Block conversion supports TC types {', '.join(SUPPORTED_TYPES)}, not {tc_type}")
+    return mv_to_celsius(tc_type, np.asarray(volts) * 1000.0 + celsius_to_mv(tc_type, cjc_celsius))
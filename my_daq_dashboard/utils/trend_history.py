@@ -0,0 +1,135 @@
+# trend_history.py
+import math
+
+import numpy as np
+from .ring_buffer import HistoryBuffer
+
+# (bin length, span) in seconds for each tier after the raw samples:
+# 0.1 s bins for 10 minutes, 2 s bins for 8 hours, 1 min bins for a week
+DEFAULT_TIERS = [(0.1, 600), (2.0, 8 * 3600), (60.0, 7 * 24 * 3600)]
+
+
+class _Tier:
+    """Fixed-size min/max/mean summary of the tier (or raw samples) below it."""
+
+    def __init__(self, num_chans, factor, capacity, bin_seconds):
+        self.num_chans = num_chans
+        self.factor = factor
+        self.capacity = capacity
+        self.bin_seconds = bin_seconds
+        # Rows are all channel minima, then maxima, then means
+        self.buffer = HistoryBuffer(3 * num_chans, capacity)
+        self._pending = np.empty((3, num_chans, 0))
+
+    @property
+    def span(self):
+        return self.capacity * self.bin_seconds
+
+    def add(self, entries):
+        """Fold (3, num_chans, n) min/max/mean entries into whole bins.
+
+        Returns the new bins in the same layout, or None if none completed.
+        """
+        if self._pending.shape[-1]:
+            entries = np.concatenate((self._pending, entries), axis=-1)
+        n = entries.shape[-1] - entries.shape[-1] % self.factor
+        self._pending = entries[..., n:].copy()
+        if not n:
+            return None
+
+        binned = entries[..., :n].reshape(3, self.num_chans, n // self.factor, self.factor)
+        bins = np.empty((3, self.num_chans, n // self.factor))
+        np.min(binned[0], axis=-1, out=bins[0])
+        np.max(binned[1], axis=-1, out=bins[1])
+        np.mean(binned[2], axis=-1, out=bins[2])
+        self.buffer.append(bins.reshape(3 * self.num_chans, -1))
+        return bins
+
+    def last(self, count):
+        return self.buffer.view()[:, self.capacity - min(count, self.capacity):]
+
+    def clear(self):
+        self.buffer.clear()
+        self._pending = np.empty((3, self.num_chans, 0))
+
+
+class TrendHistory:
+    """Bounded multi-resolution history for long trend views.
+
+    The newest `raw_seconds` are kept sample by sample. Every sample is also
+    folded into progressively coarser tiers of min/max/mean bins, each
+    built from the tier below, so memory is fixed by the tier sizes no
+    matter how long the dashboard runs. window() answers a zoomed-out
+    query from the finest tier that covers it, so showing 8 h of 1 kHz
+    data touches 14400 bins instead of 28.8 million samples.
+    """
+
+    def __init__(self, num_chans, rate, raw_seconds=10, tiers=DEFAULT_TIERS):
+        self.num_chans = num_chans
+        self.rate = rate
+        self.raw = HistoryBuffer(num_chans, max(int(rate * raw_seconds), 1))
+        self.raw_seconds = self.raw.capacity / rate
+        self.tiers = []
+        samples_per_bin = 1
+        for bin_seconds, span in tiers:
+            # Each bin must be a whole number (at least two) of bins of the tier below
+            factor = max(round(bin_seconds * rate / samples_per_bin), 2)
+            samples_per_bin *= factor
+            bin_seconds = samples_per_bin / rate
+            self.tiers.append(_Tier(num_chans, factor, max(math.ceil(span / bin_seconds), 1), bin_seconds))
+
+    @property
+    def count(self):
+        return self.raw.count
+
+    @property
+    def nbytes(self):
+        return self.raw._data.nbytes + sum(tier.buffer._data.nbytes for tier in self.tiers)
+
+    def append(self, block):
+        """Append a (num_chans, n) block of samples."""
+        if block.shape[-1] == 0:
+            return
+        self.raw.append(block)
+        # A raw sample is its own min, max and mean
+        entries = np.broadcast_to(block, (3,) + block.shape)
+        for tier in self.tiers:
+            entries = tier.add(entries)
+            if entries is None:
+                break
+
+    def _tier_for(self, seconds):
+        for tier in self.tiers:
+            if seconds <= tier.span:
+                return tier
+        return self.tiers[-1]
+
+    def window(self, seconds):
+        """The newest `seconds` of history, shape (num_chans, n).
+
+        Within raw_seconds this is the raw samples. Beyond that it is the
+        min/max envelope (each bin's min followed by its max) of the finest
+        tier covering the window, which min/max decimation keeps exact.
+        """
+        if seconds <= self.raw_seconds or not self.tiers:
+            count = min(int(round(seconds * self.rate)), self.raw.capacity)
+            return self.raw.view()[:, self.raw.capacity - count:]
+        tier = self._tier_for(seconds)
+        bins = tier.last(math.ceil(seconds / tier.bin_seconds))
+        envelope = np.empty((self.num_chans, 2 * bins.shape[-1]))
+        envelope[:, 0::2] = bins[:self.num_chans]
+        envelope[:, 1::2] = bins[self.num_chans:2 * self.num_chans]
+        return envelope
+
+    def means(self, seconds):
+        """Bin means over the newest `seconds` and their bin length in seconds."""
+        if seconds <= self.raw_seconds or not self.tiers:
+            return self.window(seconds), 1.0 / self.rate
+        tier = self._tier_for(seconds)
+        bins = tier.last(math.ceil(seconds / tier.bin_seconds))
+        return bins[2 * self.num_chans:], tier.bin_seconds
+
+    def clear(self):
+        self.raw.clear()
+        for tier in self.tiers:
+            tier.clear()
@@ -0,0 +1,185 @@
+# trigger.py
+import collections
+
+import numpy as np
+from .acquisition import DataBlock
+from .ring_buffer import HistoryBuffer
+
+KINDS = ["level", "edge", "window", "bit"]
+SLOPES = ["rising", "falling", "either"]
+
+
+class TriggerCondition:
+    """When to capture, evaluated on one channel of the acquisition stream.
+
+    level  - fires whenever `channel` is above `level` (below, for a falling
+             slope), so a signal that stays there retriggers back to back
+    edge   - fires where `channel` crosses `level` in the `slope` direction
+    window - fires where `channel` leaves the `low`..`high` band
+             (re-enters it, for a falling slope)
+    bit    - fires where bit `bit` of digital port `channel` (a
+             DigitalPortType name such as "FIRSTPORTA", scanned with the
+             analog inputs through the ChannelTable's ports) changes in
+             the `slope` direction; a TTL line on an analog input is an
+             edge trigger at ~1.5 V
+    """
+
+    def __init__(self, kind, channel, level=0.0, slope="rising", low=None, high=None, bit=0):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown trigger kind {kind}, expected one of {', '.join(KINDS)}")
+        if slope not in SLOPES:
+            raise ValueError(f"Unknown trigger slope {slope}, expected one of {', '.join(SLOPES)}")
+        if kind == "level" and slope == "either":
+            raise ValueError("A level trigger needs a rising or falling slope")
+        if kind == "window" and (low is None or high is None or low >= high):
+            raise ValueError("A window trigger needs low < high")
+        self.kind = kind
+        self.channel = channel
+        self.level = level
+        self.slope = slope
+        self.low = low
+        self.high = high
+        self.bit = bit
+
+    def active(self, samples):
+        """Boolean state per sample; triggers are its false-to-true transitions."""
+        if self.kind == "window":
+            state = (samples < self.low) | (samples > self.high)
+        elif self.kind == "bit":
+            state = (samples.astype(np.int64) >> self.bit) & 1 == 1
+        else:
+            state = samples > self.level
+        return ~state if self.slope == "falling" else state
+
+    def find(self, samples, previous):
+        """Indices of the samples that fire, given the state before the block."""
+        state = self.active(samples)
+        if self.kind == "level":
+            return np.flatnonzero(state), state[-1]
+        before = np.empty_like(state)
+        before[0] = previous
+        before[1:] = state[:-1]
+        if self.slope == "either":
+            return np.flatnonzero(state != before), state[-1]
+        return np.flatnonzero(state & ~before), state[-1]
+
+    def to_dict(self):
+        return {"kind": self.kind, "channel": self.channel, "level": self.level, "slope": self.slope,
+                "low": self.low, "high": self.high, "bit": self.bit}
+
+    @classmethod
+    def from_dict(cls, info):
+        return cls(info["kind"], info["channel"], info.get("level", 0.0), info.get("slope", "rising"),
+                   info.get("low"), info.get("high"), info.get("bit", 0))
+
+
+class TriggerStage:
+    """Passes on only the samples around trigger events.
+
+    Wraps a BlockQueue (normally an engine Subscription) and looks the same
+    to a RecordingWriter, so any recorder backend can store the events.
+    Each event becomes one fixed-length record of `pre` samples before the
+    trigger sample and `post` samples from it on; `events` holds the scan
+    index of every trigger, so record k is rows k*(pre+post) onwards.
+
+    The last `pre` samples live in a HistoryBuffer, the condition is
+    evaluated on whole blocks with NumPy, and Python only loops over the
+    events themselves. Triggers are ignored until the pre-trigger ring has
+    filled and while a record is still being captured. If blocks were
+    dropped upstream, a record in progress is completed with NaN and the
+    ring refills before the next event.
+    """
+
+    def __init__(self, source, condition, rate, pre_seconds=0.01, post_seconds=0.01):
+        self.source = source
+        self.condition = condition
+        self.rate = rate
+        self.pre = max(int(round(pre_seconds * rate)), 0)
+        self.post = max(int(round(post_seconds * rate)), 1)
+        self.events = []
+
+        self._ring = None
+        self._pending = collections.deque()
+        self._previous = True  # no edge on the very first sample
+        self._remaining = 0
+        self._seen = 0
+        self._next_index = None
+
+    @property
+    def record_length(self):
+        return self.pre + self.post
+
+    @property
+    def depth(self):
+        return len(self._pending) + self.source.depth
+
+    @property
+    def maxsize(self):
+        return self.source.maxsize
+
+    @property
+    def dropped(self):
+        return self.source.dropped
+
+    @property
+    def error(self):
+        return getattr(self.source, "error", None)
+
+    def get(self, timeout=None):
+        """Next block of event data, or None if nothing is ready yet."""
+        if not self._pending:
+            block = self.source.get(timeout)
+            if block is not None:
+                self.process(block)
+        return self._pending.popleft() if self._pending else None
+
+    def _emit(self, channels, data, start_index):
+        if data.shape[1]:
+            self._pending.append(DataBlock(channels, np.array(data), start_index))
+
+    def process(self, block):
+        """Check one DataBlock for events and queue the samples to keep."""
+        data = block.data
+        n = data.shape[1]
+        if self._ring is None:
+            self._ring = HistoryBuffer(data.shape[0], max(self.pre, 1))
+        if self._next_index is not None and block.start_index != self._next_index:
+            if self._remaining:
+                gap = np.full((data.shape[0], self._remaining), np.nan)
+                self._emit(block.channels, gap, self._next_index)
+                self._remaining = 0
+            self._seen = 0
+            self._previous = True
+        self._next_index = block.start_index + n
+
+        # Finish a record that started in an earlier block
+        first = min(self._remaining, n)
+        self._emit(block.channels, data[:, :first], block.start_index)
+        self._remaining -= first
+
+        if self.condition.kind == "bit":
+            samples = block.port(self.condition.channel)
+        else:
+            samples = block.channel(self.condition.channel)
+        triggers, self._previous = self.condition.find(samples, self._previous)
+        # Before `armed` the ring does not yet hold a full pre-trigger window
+        armed = max(self.pre - self._seen, 0)
+        i = np.searchsorted(triggers, max(first, armed))
+        while i < len(triggers):
+            t = int(triggers[i])
+            self.events.append(block.start_index + t)
+            if t >= self.pre:
+                self._emit(block.channels, data[:, t - self.pre:t], block.start_index + t - self.pre)
+            else:
+                older = self.pre - t
+                self._emit(block.channels, self._ring.view()[:, self._ring.capacity - older:],
+                           block.start_index + t - self.pre)
+                self._emit(block.channels, data[:, :t], block.start_index)
+            end = min(t + self.post, n)
+            self._emit(block.channels, data[:, t:end], block.start_index + t)
+            self._remaining = t + self.post - end
+            i = np.searchsorted(triggers, t + self.post)
+
+        if self.pre:
+            self._ring.append(data)
+        self._seen += n
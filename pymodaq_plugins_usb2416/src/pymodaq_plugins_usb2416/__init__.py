@@ -0,0 +1,2 @@
+"""PyMoDAQ instrument plugins for the MCC USB-2416, built on the USB-2416-DAQdash acquisition engine."""
+__version__ = "0.1.0"
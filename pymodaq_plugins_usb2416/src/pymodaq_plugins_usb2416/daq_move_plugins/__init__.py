@@ -0,0 +1,14 @@
+import importlib
+from pathlib import Path
+from pymodaq.utils.logger import set_logger
+
+logger = set_logger('daq_move_plugins', add_to_console=False)
+
+# PyMoDAQ finds the plugins of this folder through the module-level `path`
+for path in Path(__file__).parent.iterdir():
+    try:
+        if '__init__' not in str(path):
+            importlib.import_module('.' + path.stem, __package__)
+    except Exception as e:
+        logger.warning("{:} plugin couldn't be loaded due to some missing packages or errors: {:}".format(path.stem,
+                                                                                                            str(e)))
@@ -0,0 +1,71 @@
+from pymodaq.control_modules.move_utility_classes import (DAQ_Move_base, comon_parameters_fun, main,
+                                                          DataActuatorType, DataActuator)
+from pymodaq.utils.daq_utils import ThreadCommand
+from pymodaq.utils.parameter import Parameter
+
+from pymodaq_plugins_usb2416.hardware.usb2416 import USB2416Controller, board_parameters, AO_CHANNELS, DO_BITS
+
+
+class DAQ_Move_USB2416(DAQ_Move_base):
+    """ Instrument plugin class for the outputs of an MCC USB-2416(-4AO).
+
+    Each axis is one output: AO0-AO3 take volts (-10 to 10 V, -4AO variant only), DO0-DO7 take 0 or 1 on
+    FIRSTPORTA. Outputs cannot be read back, so the position is the last value written.
+
+    Tested against the simulated USB-2416 (Simulate setting, or DAQ_SIMULATE=1).
+    """
+    _controller_units = 'V'
+    is_multiaxes = True
+    _axis_names = AO_CHANNELS + DO_BITS
+    _epsilon = 0.001
+    data_actuator_type = DataActuatorType['DataActuator']
+
+    params = board_parameters + comon_parameters_fun(is_multiaxes, axis_names=_axis_names, epsilon=_epsilon)
+
+    def ini_attributes(self):
+        self.controller: USB2416Controller = None
+
+    def get_actuator_value(self):
+        pos = DataActuator(data=self.controller.outputs.get(self.axis_name, 0.0))
+        pos = self.get_position_with_scaling(pos)
+        return pos
+
+    def close(self):
+        if self.controller is not None:
+            self.controller.close()
+
+    def commit_settings(self, param: Parameter):
+        if param.name() == 'axis':
+            self.controller_units = 'V' if self.axis_name in AO_CHANNELS else ''
+
+    def ini_stage(self, controller=None):
+        self.controller = self.ini_stage_init(old_controller=controller,
+                                              new_controller=USB2416Controller(self.settings['board_num'],
+                                                                               self.settings['simulate']))
+        device = self.controller.open()
+        info = f"{device.product_name} on board {self.settings['board_num']}"
+        initialized = True
+        return info, initialized
+
+    def move_abs(self, value: DataActuator):
+        value = self.check_bound(value)
+        self.target_value = value
+        value = self.set_position_with_scaling(value)
+        self.controller.write(self.axis_name, value.value())
+        self.emit_status(ThreadCommand('Update_Status', [f'{self.axis_name} set to {value.value()}']))
+
+    def move_rel(self, value: DataActuator):
+        value = self.check_bound(self.current_position + value) - self.current_position
+        self.target_value = value + self.current_position
+        self.move_abs(self.target_value)
+
+    def move_home(self):
+        self.move_abs(DataActuator(data=0.0))
+
+    def stop_motion(self):
+        # Outputs change immediately; there is no motion to stop
+        self.move_done()
+
+
+if __name__ == '__main__':
+    main(__file__)
@@ -0,0 +1,87 @@
+import numpy as np
+from qtpy import QtWidgets
+
+from pymodaq.utils.daq_utils import ThreadCommand
+from pymodaq.utils.data import DataFromPlugins, DataToExport, Axis
+from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base, comon_parameters, main
+from pymodaq.utils.parameter import Parameter
+
+from pymodaq_plugins_usb2416.hardware.usb2416 import (USB2416Controller, scan_parameters, parse_channels,
+                                                      SCAN_SETTINGS)
+
+
+class DAQ_1DViewer_USB2416(DAQ_Viewer_base):
+    """ Instrument plugin class for the analog inputs of an MCC USB-2416, one waveform per channel.
+
+    Each grab is `samples` consecutive scans of the dashboard's continuous BACKGROUND scan against a time
+    axis, read as whole blocks. Averaging is done here (hardware_averaging): Naverage consecutive records are
+    averaged point by point from one read. In live mode the plugin emits records back to back until stop()
+    is called, instead of DAQ_Detector calling grab_data once per record.
+
+    Tested against the simulated USB-2416 (Simulate setting, or DAQ_SIMULATE=1). Needs the my_daq_dashboard
+    folder of the USB-2416-DAQdash repository (see hardware/usb2416.py).
+    """
+    hardware_averaging = True
+    live_mode_available = True
+    params = comon_parameters + scan_parameters
+
+    def ini_attributes(self):
+        self.controller: USB2416Controller = None
+        self.live = False
+
+    def commit_settings(self, param: Parameter):
+        if param.name() in SCAN_SETTINGS:
+            self.configure()
+
+    def configure(self):
+        plan = self.controller.configure(parse_channels(self.settings['channels']), self.settings['rate'],
+                                         self.settings['mode'], self.settings['ai_range'],
+                                         self.settings['data_rate'])
+        self.emit_status(ThreadCommand('Update_Status', [plan.summary()]))
+        for error in plan.errors:
+            self.emit_status(ThreadCommand('Update_Status', [error, 'log']))
+
+    def ini_detector(self, controller=None):
+        self.ini_detector_init(old_controller=controller,
+                               new_controller=USB2416Controller(self.settings['board_num'],
+                                                                self.settings['simulate']))
+        device = self.controller.open()
+        self.configure()
+        self.dte_signal_temp.emit(self.to_dte(np.zeros((len(self.controller.channels), self.settings['samples']))))
+        info = f"{device.product_name} on board {self.settings['board_num']}"
+        initialized = True
+        return info, initialized
+
+    def close(self):
+        self.live = False
+        if self.controller is not None:
+            self.controller.close()
+
+    def to_dte(self, data):
+        time_axis = Axis('Time', units='s', data=np.arange(data.shape[1]) / self.controller.rate, index=0)
+        return DataToExport('USB2416', data=[
+            DataFromPlugins(name='USB2416', data=list(data), dim='Data1D', axes=[time_axis],
+                            labels=[f'AI{chan}' for chan in self.controller.channels])])
+
+    def grab_data(self, Naverage=1, **kwargs):
+        """Emit one averaged record, or keep emitting them in live mode until stop()."""
+        self.live = kwargs.get('live', False)
+        samples = self.settings['samples']
+        self.controller.flush()
+        while True:
+            data = self.controller.read(samples * Naverage)
+            if Naverage > 1:
+                data = data.reshape(data.shape[0], Naverage, samples).mean(axis=1)
+            self.dte_signal.emit(self.to_dte(data))
+            if not self.live:
+                break
+            # Lets the stop command reach this thread between records
+            QtWidgets.QApplication.processEvents()
+
+    def stop(self):
+        self.live = False
+        return ''
+
+
+if __name__ == '__main__':
+    main(__file__)
@@ -0,0 +1,178 @@
+# usb2416.py
+"""Wrapper around the dashboard's acquisition engine for the PyMoDAQ plugins.
+
+The plugins reuse my_daq_dashboard/utils rather than a copy of it, so the
+viewer streams from the same continuous BACKGROUND scan, channel table and
+simulator as the Tk dashboard. The dashboard folder is found next to this
+package in the repository, or through the DAQ_DASHBOARD_PATH variable.
+
+The utils package is imported as pymodaq_plugins_usb2416.hardware.dashboard_utils
+instead of putting the dashboard folder on sys.path, where its generic
+`utils` and `dashboard` packages would shadow those of other plugins.
+"""
+import importlib.util
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+DASHBOARD_PATH = Path(os.environ.get("DAQ_DASHBOARD_PATH",
+                                     Path(__file__).resolve().parents[4] / "my_daq_dashboard"))
+DASHBOARD_UTILS = f"{__package__}.dashboard_utils"
+
+
+def _load_dashboard_utils():
+    """Import my_daq_dashboard/utils by path, as DASHBOARD_UTILS; its modules import each other relatively."""
+    if DASHBOARD_UTILS not in sys.modules:
+        utils_path = DASHBOARD_PATH / "utils"
+        spec = importlib.util.spec_from_file_location(DASHBOARD_UTILS, utils_path / "__init__.py",
+                                                      submodule_search_locations=[str(utils_path)])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[DASHBOARD_UTILS] = module
+        spec.loader.exec_module(module)
+    return sys.modules[DASHBOARD_UTILS]
+
+
+_load_dashboard_utils()
+
+# channel_config only needs mcculw.enums, so importing it does not pick the UL driver yet
+from .dashboard_utils.channel_config import DATA_RATES, MODES, RANGES  # noqa: E402
+
+AO_CHANNELS = [f"AO{chan}" for chan in range(4)]
+DO_BITS = [f"DO{bit}" for bit in range(8)]
+
+board_parameters = [
+    {'title': 'Board number:', 'name': 'board_num', 'type': 'int', 'value': 0, 'min': 0},
+    {'title': 'Simulate:', 'name': 'simulate', 'type': 'bool', 'value': False},
+]
+
+scan_parameters = board_parameters + [
+    {'title': 'Channels:', 'name': 'channels', 'type': 'str', 'value': '0',
+     'tip': 'Comma-separated AI channels, e.g. 0,1,4'},
+    {'title': 'Mode:', 'name': 'mode', 'type': 'list', 'limits': MODES, 'value': 'DIFF'},
+    {'title': 'Range:', 'name': 'ai_range', 'type': 'list', 'limits': RANGES, 'value': 'BIP10VOLTS'},
+    {'title': 'ADC data rate (S/s):', 'name': 'data_rate', 'type': 'list', 'limits': DATA_RATES, 'value': 1000},
+    {'title': 'Scan rate (S/s/ch):', 'name': 'rate', 'type': 'float', 'value': 100., 'min': 0.1},
+    {'title': 'Samples per point:', 'name': 'samples', 'type': 'int', 'value': 10, 'min': 1},
+]
+
+SCAN_SETTINGS = ['channels', 'mode', 'ai_range', 'data_rate', 'rate']
+
+
+def parse_channels(text):
+    """'0, 1,4' -> [0, 1, 4]"""
+    return sorted({int(chan) for chan in text.replace(';', ',').split(',') if chan.strip()})
+
+
+def load_dashboard(simulate=False):
+    """Pick the UL driver for the dashboard's `utils`: the real one or the simulated USB-2416.
+
+    The simulator has to be installed before anything imports mcculw.ul,
+    so the first caller decides for the whole process, as with DAQ_SIMULATE
+    for the dashboard itself.
+    """
+    if simulate or os.environ.get("DAQ_SIMULATE"):
+        from .dashboard_utils import simulated_ul
+        if sys.modules.get(f"{DASHBOARD_UTILS}.acquisition") is not None and not _simulated():
+            raise RuntimeError("The UL driver is already in use; restart PyMoDAQ to simulate")
+        simulated_ul.install()
+
+
+def _simulated():
+    import mcculw
+    return getattr(mcculw.ul, "__name__", "") == f"{DASHBOARD_UTILS}.simulated_ul"
+
+
+class USB2416Controller:
+    """One board as seen by the plugins: block reads from the shared scan, AO/DO writes.
+
+    read() collects whole engine blocks, so a grab of N scans costs one
+    queue drain per ~50 ms engine poll, not one call per sample.
+    """
+
+    def __init__(self, board_num=0, simulate=False):
+        load_dashboard(simulate)
+        from .dashboard_utils.acquisition import get_engine
+
+        self.board_num = board_num
+        self.engine = get_engine(board_num)
+        self.subscription = None
+        self.device = None
+        self.outputs = {}
+        self._pending = None
+
+    def open(self):
+        self.device = self.engine.open()
+        return self.device
+
+    def configure(self, channels, rate, mode="DIFF", ai_range="BIP10VOLTS", data_rate=1000):
+        """Scan `channels` at `rate` S/s/ch; returns the ScanPlan for status messages.
+
+        The engine is shared by every plugin on the board, so the last
+        configure() sets the channel table for all of them.
+        """
+        from .dashboard_utils.channel_config import ChannelConfig, ChannelTable
+
+        table = ChannelTable([ChannelConfig(chan, mode, ai_range, data_rate) for chan in channels])
+        plan = self.engine.configure(table, rate)
+        if self.subscription is not None:
+            self.subscription.close()
+        self.subscription = self.engine.subscribe(channels, maxsize=256)
+        self._pending = None
+        return plan
+
+    @property
+    def channels(self):
+        return list(self.subscription.channels) if self.subscription else []
+
+    @property
+    def rate(self):
+        return self.engine.rate
+
+    def flush(self):
+        """Drop queued data so the next read starts with fresh samples."""
+        if self.subscription is not None:
+            self.subscription.get_all()
+        self._pending = None
+
+    def read(self, scans, timeout=10.0):
+        """The next `scans` samples of every channel, shape (channels, scans).
+
+        Samples beyond `scans` in the last block are kept for the next read,
+        so consecutive reads are contiguous.
+        """
+        parts = [] if self._pending is None else [self._pending]
+        count = sum(part.shape[1] for part in parts)
+        deadline = time.monotonic() + timeout
+        while count < scans:
+            block = self.subscription.get(timeout=max(deadline - time.monotonic(), 0))
+            if block is None:
+                raise TimeoutError(f"No data from board {self.board_num} within {timeout} s")
+            parts.append(block.data)
+            count += block.data.shape[1]
+        data = np.concatenate(parts, axis=1) if len(parts) > 1 else parts[0]
+        self._pending = data[:, scans:] if data.shape[1] > scans else None
+        return data[:, :scans]
+
+    def write(self, output, value):
+        """Set an analog output (AO0-AO3, volts) or a digital output bit (DO0-DO7)."""
+        from mcculw import ul
+        from mcculw.enums import DigitalPortType, ULRange
+
+        if output in AO_CHANNELS:
+            ul.v_out(self.board_num, AO_CHANNELS.index(output), ULRange.BIP10VOLTS, float(value))
+        elif output in DO_BITS:
+            value = 1 if value >= 0.5 else 0
+            ul.d_bit_out(self.board_num, DigitalPortType.FIRSTPORTA, DO_BITS.index(output), value)
+        else:
+            raise ValueError(f"Unknown output {output}")
+        # Outputs cannot be read back, so the last written value is the position
+        self.outputs[output] = value
+        return value
+
+    def close(self):
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None